@@ -0,0 +1,54 @@
+# src/analysis_workers.py
+# 分析进程池的工作函数：高潮检测在按物理核数设置大小的进程池中执行，人声分离在独立的小进程池中执行。
+# 函数需位于模块顶层以便进程池序列化。
+import os
+import time
+from pathlib import Path
+from typing import Tuple
+from utils.logger import logger
+from utils.climax_clipper import ANALYSIS_SR, features_cached, find_climax_segment
+from utils import vocal_separator
+
+def physical_cores() -> int:
+    """物理核心数；未安装 psutil 时按逻辑核数的一半估算（超线程）。"""
+    try:
+        import psutil
+        n = psutil.cpu_count(logical=False)
+        if n:
+            return n
+    except ImportError:
+        pass
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def _init_analysis_worker() -> None:
+    """分析进程初始化：每个进程只用单线程计算，由进程数决定并行度，避免线程超额。"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMBA_NUM_THREADS"):
+        os.environ[var] = "1"
+    try:
+        # fork 出的进程中 BLAS 线程池已初始化，环境变量不再生效，需在运行时限制
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    # 人声分离由独立的分离进程池完成，分析进程只读取人声缓存，不各自加载模型
+    vocal_separator.ALLOW_SEPARATION = False
+
+def _init_separation_worker() -> None:
+    """分离进程初始化：各进程各自加载一个模型，CPU 核在 MAX_CONCURRENT 个进程间平分。"""
+    vocal_separator.TORCH_THREADS = max(1, (os.cpu_count() or 1) // vocal_separator.MAX_CONCURRENT)
+
+def _analyze_clip(audio: str, clip_duration: float) -> Tuple[float, float]:
+    """在分析进程中执行高潮检测，返回 (起始秒数, 耗时)；分析失败时记录错误并从0秒开始截取。"""
+    t0 = time.perf_counter()
+    try:
+        start, _ = find_climax_segment(audio, clip_duration=clip_duration)
+    except Exception as e:
+        logger.error(f"高潮分析失败，从0秒开始截取 {Path(audio).name}: {e}")
+        start = 0.0
+    return start, time.perf_counter() - t0
+
+def _separate_vocals(audio: str) -> bool:
+    """在分离进程中为音频生成人声缓存；分析特征已有缓存时跳过。返回是否有可用的人声。"""
+    if features_cached(audio):
+        return True
+    return vocal_separator.separate_vocals(audio, ANALYSIS_SR) is not None
@@ -1,17 +1,53 @@
 # src/bilibili_api_client.py
 import asyncio
 import aiohttp
+import json
 import subprocess
+import threading
 from pathlib import Path
 from bilibili_api import request_settings, search
 from datetime import datetime
 import random
-from typing import List, Optional, Dict, Any, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from utils.logger import logger
 from utils.proxy import Proxy 
 from utils.retry_handler import RetryHandler
-from utils.dataclass import Config, SearchOptions, SearchRestrictions
+from utils.dataclass import Config, SearchOptions, SearchRestrictions, SectionAlignmentError
+from utils.media_cache import MediaCache
+from utils.media_probe import default_ffprobe_bin, locate_audio_offset, probe_start_times
+
+# 片段最终缩放到 1080 宽，下载宽度不低于该值的最小格式即可
+MIN_VIDEO_WIDTH = 1080
+# 区间下载时在需要的范围前后各多取的秒数
+SECTION_MARGIN = 2.0
+# 流复制截取时实际起点可能早于请求起点的最大秒数（关键帧间隔上限）
+KEYFRAME_SEARCH = 10.0
+
+def _format_size(f: Dict[str, Any]) -> float:
+    size = f.get("filesize") or f.get("filesize_approx")
+    if size:
+        return float(size)
+    # 没有大小信息时按码率估计
+    return float(f.get("tbr") or f.get("vbr") or 0) or float("inf")
+
+def select_download_format(formats: List[Dict[str, Any]], min_width: int = MIN_VIDEO_WIDTH) -> Optional[str]:
+    """选择宽度不低于 min_width 的最小视频流（没有满足条件的则取最宽的）并搭配最佳音频流。
+
+    Returns:
+        Optional[str]: yt-dlp 的 format 参数，例如 "30080+30280"；没有可用的分离视频流时返回None。
+    """
+    videos = [f for f in formats if f.get("vcodec") not in (None, "none") and f.get("acodec") in (None, "none")]
+    audios = [f for f in formats if f.get("acodec") not in (None, "none") and f.get("vcodec") in (None, "none")]
+    if not videos or not audios:
+        return None
+    wide = [f for f in videos if (f.get("width") or 0) >= min_width]
+    if wide:
+        video = min(wide, key=_format_size)
+    else:
+        video = max(videos, key=lambda f: (f.get("width") or 0, f.get("tbr") or 0))
+    audio = max(audios, key=lambda f: f.get("abr") or f.get("tbr") or 0)
+    return f"{video['format_id']}+{audio['format_id']}"
 
 class BilibiliApiClient:
     """
@@ -22,7 +58,8 @@ class BilibiliApiClient:
         config: Config, 
         proxy: Optional[Proxy] = None, 
         videos_root: Optional[Path] = None,
-        ffmpeg_bin: Optional[str] = "ffmpeg"
+        ffmpeg_bin: Optional[str] = "ffmpeg",
+        media_cache: Optional[MediaCache] = None
     ):
         self.config = config
         self.proxy = proxy
@@ -32,6 +69,12 @@ class BilibiliApiClient:
         
         self.videos_root = videos_root
         self.ffmpeg_bin = ffmpeg_bin
+        # 可选的素材缓存索引：命中索引时不再访问文件系统，写入新文件后登记大小
+        self.media_cache = media_cache
+        self._info_cache: Dict[str, Dict[str, Any]] = {}
+        self._info_lock = threading.Lock()
+        # yt-dlp 下载进度回调，由下载管理器注册
+        self.progress_hooks: List[Callable[[Dict[str, Any]], None]] = []
         if self.videos_root:
             self.videos_root.mkdir(parents=True, exist_ok=True)
 
@@ -200,60 +243,212 @@ class BilibiliApiClient:
             await asyncio.sleep(self.config.SLEEP_TIME)
         return all_videos
 
+    def _ydl_opts(self, out_template: Path, **extra) -> Dict[str, Any]:
+        opts = {
+            "outtmpl": str(out_template),
+            "quiet": True,
+            "no_warnings": True,
+            "merge_output_format": "mp4",
+            # 保留 .part 文件，重试时断点续传
+            "continuedl": True,
+            "nopart": False,
+            "progress_hooks": list(self.progress_hooks),
+        }
+        opts.update(extra)
+        return opts
+
+    def _extract_info(self, bvid: str) -> Optional[Dict[str, Any]]:
+        """解析视频信息（含全部可用格式），同一 bvid 只请求一次。"""
+        with self._info_lock:
+            if bvid in self._info_cache:
+                return self._info_cache[bvid]
+        import yt_dlp
+        url = f"https://www.bilibili.com/video/{bvid}"
+        try:
+            with yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True}) as ydl:
+                info = ydl.extract_info(url, download=False, process=False)
+        except Exception as e:
+            logger.error(f"[{bvid}] 解析视频信息失败: {e}")
+            return None
+        with self._info_lock:
+            self._info_cache[bvid] = info
+        return info
+
+    def invalidate_info(self, bvid: str) -> None:
+        """丢弃缓存的视频信息（其中的下载地址会过期），下次下载时重新解析。"""
+        with self._info_lock:
+            self._info_cache.pop(bvid, None)
+
+    def _download_with_format(self, bvid: str, fmt: str, out_template: Path, **extra) -> None:
+        import yt_dlp
+        info = self._extract_info(bvid)
+        opts = self._ydl_opts(out_template, format=fmt, **extra)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if info is not None:
+                # 复用已解析的信息，只按新的格式选择下载
+                ydl.process_ie_result(dict(info), download=True)
+            else:
+                ydl.extract_info(f"https://www.bilibili.com/video/{bvid}", download=True)
+
+    @staticmethod
+    def _take_output(bvid_dir: Path, stem: str, target: Path, suffixes: Tuple[str, ...]) -> Optional[Path]:
+        """在下载目录中找到 yt-dlp 的输出文件并重命名为标准文件名。"""
+        if target.exists():
+            return target
+        candidates = [p for p in bvid_dir.glob(f"{stem}*") if p.suffix.lower() in suffixes]
+        if not candidates:
+            return None
+        candidates[0].rename(target)
+        return target
+
+    def _video_format(self, bvid: str) -> str:
+        info = self._extract_info(bvid)
+        formats = (info or {}).get("formats") or []
+        return select_download_format(formats, MIN_VIDEO_WIDTH) or "bv*+ba/best"
+
     def download_video(self, bvid: str) -> Optional[Path]:
-        """下载视频 (同步方法，因 yt-dlp 是阻塞的)"""
+        """下载视频 (同步方法，因 yt-dlp 是阻塞的)。选择宽度不低于 1080 的最小格式。"""
         if not self.videos_root:
             logger.error("未配置 videos_root，无法下载视频")
             return None
             
-        import yt_dlp
+        if self.media_cache:
+            hit = self.media_cache.lookup(bvid, f"{bvid}.mp4")
+            if hit:
+                return hit
 
         bvid_dir = self.videos_root / bvid
         bvid_dir.mkdir(exist_ok=True)
 
         cached_video = bvid_dir / f"{bvid}.mp4"
         if cached_video.exists():
+            self._record_cache(bvid)
             return cached_video
 
         logger.info(f"开始下载视频: {bvid}")
-        url = f"https://www.bilibili.com/video/{bvid}"
-        out_template = bvid_dir / f"{bvid}.%(ext)s"
-
-        ydl_opts = {
-            "format": "bv*+ba/best",
-            "outtmpl": str(out_template),
-            "quiet": True,
-            "no_warnings": True,
-        }
-
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.extract_info(url, download=True)
-
-            candidates = [p for p in bvid_dir.glob(f"{bvid}.*") if p.suffix.lower() == ".mp4"]
-            if not candidates:
+            self._download_with_format(bvid, self._video_format(bvid), bvid_dir / f"{bvid}.%(ext)s")
+            if not self._take_output(bvid_dir, f"{bvid}.", cached_video, (".mp4",)):
                 return None
 
-            video_path = candidates[0]
-            # 重命名确保标准文件名
-            if video_path != cached_video:
-                video_path.rename(cached_video)
-
             logger.info(f"[{bvid}] 下载完成并缓存: {cached_video}")
+            self._record_cache(bvid)
             return cached_video
         except Exception as e:
             logger.error(f"[{bvid}] 下载失败: {e}")
             return None
 
+    def download_audio(self, bvid: str) -> Optional[Path]:
+        """只下载音频流（用于高潮检测，或只需要音乐的场合）。"""
+        if not self.videos_root:
+            logger.error("未配置 videos_root，无法下载音频")
+            return None
+
+        name = f"{bvid}_audio.m4a"
+        if self.media_cache:
+            hit = self.media_cache.lookup(bvid, name)
+            if hit:
+                return hit
+
+        bvid_dir = self.videos_root / bvid
+        bvid_dir.mkdir(exist_ok=True)
+        cached = bvid_dir / name
+        if cached.exists():
+            self._record_cache(bvid)
+            return cached
+
+        try:
+            self._download_with_format(bvid, "ba/bestaudio/best", bvid_dir / f"{bvid}_audio.%(ext)s")
+            if not self._take_output(bvid_dir, f"{bvid}_audio.", cached, (".m4a", ".mp4", ".webm", ".aac")):
+                return None
+            self._record_cache(bvid)
+            return cached
+        except Exception as e:
+            logger.error(f"[{bvid}] 音频下载失败: {e}")
+            return None
+
+    def download_section(
+        self, bvid: str, start: float, duration: float, reference_audio: Path
+    ) -> Optional[Tuple[Path, float]]:
+        """只下载 [start, start + duration] 附近的视频区间（流复制，不重编码）。
+
+        流复制截取的实际起点落在关键帧上，因此下载后用音频互相关与完整音频对齐，
+        求出 start 在区间文件中的准确位置。
+
+        Args:
+            bvid (str): 视频 bvid。
+            start (float): 需要的起点（秒，完整视频时间轴）。
+            duration (float): 需要的时长（秒）。
+            reference_audio (Path): 完整音频，用于对齐。
+
+        Returns:
+            Optional[Tuple[Path, float]]: (区间文件, start 在区间文件中对应的 -ss 位置)，下载失败时返回None。
+
+        Raises:
+            SectionAlignmentError: 区间已下载但无法与完整音频对齐。
+        """
+        if not self.videos_root:
+            logger.error("未配置 videos_root，无法下载视频")
+            return None
+        import yt_dlp
+
+        bvid_dir = self.videos_root / bvid
+        bvid_dir.mkdir(exist_ok=True)
+        stem = f"{bvid}_s{int(round(start * 1000))}_{int(duration)}s_src"
+        section = bvid_dir / f"{stem}.mp4"
+        meta_path = bvid_dir / f"{stem}.json"
+
+        hit = self.media_cache.lookup(bvid, section.name) if self.media_cache else None
+        if hit or section.exists():
+            try:
+                return section, float(json.loads(meta_path.read_text(encoding="utf-8"))["offset"])
+            except (OSError, ValueError, KeyError):
+                pass
+
+        lo = max(0.0, start - SECTION_MARGIN)
+        hi = start + duration + SECTION_MARGIN
+        try:
+            self._download_with_format(
+                bvid, self._video_format(bvid), bvid_dir / f"{stem}.%(ext)s",
+                download_ranges=yt_dlp.utils.download_range_func(None, [(lo, hi)]),
+                force_keyframes_at_cuts=False,
+            )
+            if not self._take_output(bvid_dir, f"{stem}.", section, (".mp4", ".mkv")):
+                return None
+        except Exception as e:
+            logger.error(f"[{bvid}] 区间下载失败: {e}")
+            return None
+
+        t0 = locate_audio_offset(
+            section, reference_audio, lo - KEYFRAME_SEARCH, lo + 0.5, ffmpeg_bin=self.ffmpeg_bin or "ffmpeg"
+        )
+        starts = probe_start_times(section, default_ffprobe_bin(self.ffmpeg_bin or "ffmpeg"))
+        if t0 is None or starts is None or t0 > start:
+            section.unlink(missing_ok=True)
+            raise SectionAlignmentError(f"[{bvid}] 区间视频无法与完整音频对齐")
+        fmt_start, audio_start = starts
+        # -ss 相对文件起始时间；区间文件第一个音频采样对应完整时间轴上的 t0
+        offset = audio_start - fmt_start + (start - t0)
+        meta_path.write_text(json.dumps({"start": start, "t0": t0, "offset": offset}), encoding="utf-8")
+        logger.info(f"[{bvid}] 区间下载完成: {lo:.1f}-{hi:.1f}s, 对齐起点 {t0:.3f}s")
+        self._record_cache(bvid)
+        return section, offset
+
     def ensure_audio(self, bvid: str, cached_video: Path) -> Optional[Path]:
         """从视频提取音频"""
         if not self.ffmpeg_bin:
             logger.error("未配置 ffmpeg_bin，无法提取音频")
             return None
             
+        if self.media_cache:
+            hit = self.media_cache.lookup(bvid, f"{bvid}.wav")
+            if hit:
+                return hit
+
         bvid_dir = cached_video.parent
         cached_audio = bvid_dir / f"{bvid}.wav"
         if cached_audio.exists():
+            self._record_cache(bvid)
             return cached_audio
 
         cmd = [
@@ -264,6 +459,11 @@ class BilibiliApiClient:
         ]
         try:
             subprocess.run(cmd, check=True)
+            self._record_cache(bvid)
             return cached_audio
         except Exception:
             return None
+
+    def _record_cache(self, bvid: str) -> None:
+        if self.media_cache:
+            self.media_cache.record(bvid)
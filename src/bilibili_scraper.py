@@ -5,10 +5,11 @@ from datetime import datetime, timedelta
 from dataclasses import asdict
 from typing import List, Optional, Dict, Literal, Any, Set, Union, Callable, Coroutine
 from pathlib import Path
-import json
 
 from utils.logger import logger
 from utils.io_utils import save_to_excel
+from utils.excel_stream import read_excel_stream
+from utils.song_db import SongDatabase
 from utils.formatters import clean_tags, convert_duration
 from utils.calculator import calculate_threshold, calculate_failed_mask
 from utils.dataclass import VideoInfo, SearchOptions, SearchRestrictions, Config
@@ -44,7 +45,8 @@ class BilibiliScraper:
             self.start_time = self.today - timedelta(days=days)
         elif self.mode == "old":
             self.filename = self.config.OUTPUT_DIR / f"{self.today.strftime('%Y%m%d')}.xlsx"
-            self.songs = pd.read_excel(input_file)
+            self.song_db = SongDatabase(Path(input_file))
+            self.songs = self.song_db.load()
             if 'streak' not in self.songs.columns:
                 self.songs['streak'] = 0
             if 'aid' in self.songs.columns:
@@ -62,7 +64,11 @@ class BilibiliScraper:
 
     def _load_existing_bvids(self, file_path: Union[str, Path]) -> Set[str]:
         try:
-            existing_df = pd.read_excel(file_path, usecols=['bvid'])
+            # Excel视图不再随每次写入导出，数据库存在时以数据库为准
+            if Path(file_path).with_suffix('.db').exists():
+                existing_df = SongDatabase(Path(file_path)).load(['bvid'])
+            else:
+                existing_df = read_excel_stream(file_path, columns=['bvid'])
             bvids = set(existing_df['bvid'].dropna().astype(str))
             logger.info(f"从 {file_path} 加载了 {len(bvids)} 个已收录的 bvid。")
             return bvids
@@ -282,8 +288,10 @@ class BilibiliScraper:
         
         self.songs = self.songs.sort_values(['is_failed', 'view'], ascending=[False, False]).drop('is_failed', axis=1)
         
-        usecols = json.load(Path('config/usecols.json').open(encoding='utf-8'))["columns"]["record"]
-        save_to_excel(self.songs, "收录曲目.xlsx", usecols=usecols)
+        # 只将更新列和在榜天数的变化写入收录曲目数据库，避免覆盖其他脚本对元数据的修改
+        written = self.song_db.upsert(self.songs, self.config.UPDATE_COLS + ['streak'])
+        self.song_db.reorder(self.songs['bvid'].astype(str).tolist())
+        logger.info(f"收录曲目更新 {written} 行")
     
     async def process_hot_rank_videos(self) -> None:
         """
@@ -1,13 +1,15 @@
 # src/clip_flow.py
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 import subprocess
 import pandas as pd
 from utils.logger import logger
 from src.bilibili_api_client import BilibiliApiClient
 from utils.climax_clipper import find_climax_segment
-from utils.clip_overlay import build_clip_overlay_cmd
+from utils.clip_overlay import STAT_ICON_LABELS, build_clip_overlay_cmd, save_overlay_image
+from utils.icon_assets import build_icon_assets
+from utils.render_profile import DEFAULT_PROFILES, RenderProfile
 
 class ClipFlow:
     def __init__(
@@ -19,6 +21,8 @@ class ClipFlow:
         ffmpeg_bin: str,
         font_regular: str,
         font_bold: str,
+        single_pass: bool = True,
+        render_profile: Optional[RenderProfile] = None,
     ) -> None:
         self.api_client = api_client
         self.daily_video_dir = daily_video_dir
@@ -26,27 +30,25 @@ class ClipFlow:
         self.ffmpeg_bin = ffmpeg_bin
         self.font_file = font_regular
         self.font_bold_file = font_bold
-
-    def _add_x264_encode_args(self, cmd: list[str]) -> None:
-        cmd += [
-            "-c:v", "libx264",
-            "-crf", "16",
-            "-pix_fmt", "yuv420p",
-            "-c:a", "aac",
-            "-b:a", "192k",
-        ]
-
-    def _ensure_segment(self, bvid: str, clip_duration: float) -> Optional[Path]:
+        # 单次渲染：裁剪、淡入淡出、叠加和编码在一次 ffmpeg 调用中完成，不再生成中间片段
+        self.single_pass = single_pass
+        self.render_profile = render_profile or DEFAULT_PROFILES["final"]
+        # 一次性烘焙数据区图标，之后每个片段直接使用缓存的成品
+        build_icon_assets(self.icon_dir / f"{label}.png" for label in STAT_ICON_LABELS)
+
+    def _add_x264_encode_args(self, cmd: list[str], intermediate: bool = False) -> None:
+        # 所有片段统一编码参数（含音频采样率与声道），以便最终拼接时直接流复制
+        if intermediate:
+            cmd += self.render_profile.intermediate_encode_args()
+        else:
+            cmd += self.render_profile.encode_args()
+
+    def _resolve_clip_window(self, bvid: str, clip_duration: float) -> Optional[Tuple[Path, float]]:
+        """下载视频并检测高潮起点，返回 (源视频路径, 起始秒数)。"""
         cached_video = self.api_client.download_video(bvid)
         if not cached_video:
             return None
 
-        bvid_dir = cached_video.parent
-        cached_segment = bvid_dir / f"{bvid}_{int(clip_duration)}s.mp4"
-
-        if cached_segment.exists():
-            return cached_segment
-
         audio_path = self.api_client.ensure_audio(bvid, cached_video)
         if not audio_path:
             return None
@@ -55,6 +57,35 @@ class ClipFlow:
             start, _ = find_climax_segment(str(audio_path), clip_duration=clip_duration)
         except Exception:
             start = 0.0
+        return cached_video, start
+
+    @staticmethod
+    def segment_path(cached_video: Path, bvid: str, clip_duration: float, profile: str = "final") -> Path:
+        """中间片段路径；非成片档位的片段单独命名，切换档位时不会互相覆盖或误用低分辨率片段。"""
+        suffix = "" if profile == "final" else f"_{profile}"
+        return cached_video.parent / f"{bvid}_{int(clip_duration)}s{suffix}.mp4"
+
+    def _ensure_segment(self, bvid: str, clip_duration: float) -> Optional[Path]:
+        cached_video = self.api_client.download_video(bvid)
+        if not cached_video:
+            return None
+
+        cached_segment = self.segment_path(cached_video, bvid, clip_duration, self.render_profile.name)
+        cache = self.api_client.media_cache
+        if cache and cache.lookup(bvid, cached_segment.name):
+            return cached_segment
+        if cached_segment.exists():
+            return cached_segment
+
+        window = self._resolve_clip_window(bvid, clip_duration)
+        if not window:
+            return None
+        _, start = window
+        return self.cut_segment(cached_video, bvid, start, clip_duration)
+
+    def cut_segment(self, cached_video: Path, bvid: str, start: float, clip_duration: float) -> Optional[Path]:
+        """从源视频截取带淡入淡出的中间片段（两步渲染模式），覆盖已有的同名片段。"""
+        cached_segment = self.segment_path(cached_video, bvid, clip_duration, self.render_profile.name)
 
         out_start = max(clip_duration - 1.0, 0.0)
         vf_filter = (
@@ -75,7 +106,7 @@ class ClipFlow:
             "-vf", vf_filter,
             "-af", af_filter,
         ]
-        self._add_x264_encode_args(segment_cmd)
+        self._add_x264_encode_args(segment_cmd, intermediate=True)
         segment_cmd += [
             "-avoid_negative_ts", "make_zero",
             "-movflags", "+faststart",
@@ -88,8 +119,15 @@ class ClipFlow:
         except Exception:
             return None
 
+        # 中间片段不含叠加信息，登记到素材缓存后可跨期复用
+        if self.api_client.media_cache:
+            self.api_client.media_cache.record(bvid)
         return cached_segment
 
+    def render_overlay(self, row: pd.Series, issue_date_str: str) -> Path:
+        """渲染片段的静态叠加层图片，返回图片路径。"""
+        return save_overlay_image(row, issue_date_str, self.daily_video_dir, self.icon_dir, self.font_file)
+
     def generate_clip(
         self,
         row: pd.Series,
@@ -103,18 +141,42 @@ class ClipFlow:
 
         logger.info(f"处理 #{clip_index} | {row.get('title', '')}")
 
-        segment_path = self._ensure_segment(bvid, clip_duration=clip_duration)
-        if not segment_path:
-            return None
-
+        if self.single_pass:
+            window = self._resolve_clip_window(bvid, clip_duration)
+            if not window:
+                return None
+            source_path, source_start = window
+            source_duration: Optional[float] = clip_duration
+        else:
+            segment_path = self._ensure_segment(bvid, clip_duration=clip_duration)
+            if not segment_path:
+                return None
+            source_path, source_start, source_duration = segment_path, None, None
+
+        return self.encode_clip(row, clip_index, issue_date_str, source_path, source_start, source_duration)
+
+    def encode_clip(
+        self,
+        row: pd.Series,
+        clip_index: int,
+        issue_date_str: str,
+        source_path: Path,
+        source_start: Optional[float],
+        source_duration: Optional[float],
+        overlay_path: Optional[Path] = None,
+    ) -> Optional[Path]:
+        """叠加信息并编码最终片段。source_start/source_duration 为None时 source_path 是已截取好的中间片段。"""
         overlay_args, clip_filename = build_clip_overlay_cmd(
-            segment_source_path=segment_path,
+            segment_source_path=source_path,
             row=row,
             clip_index=clip_index,
             issue_date_str=issue_date_str,
             daily_video_dir=self.daily_video_dir,
             icon_dir=self.icon_dir,
             font_file=self.font_file,
+            source_start=source_start,
+            source_duration=source_duration,
+            overlay_path=overlay_path,
         )
 
         cmd = [self.ffmpeg_bin] + overlay_args
@@ -1,28 +1,55 @@
 # src/daily_video_flow.py
 import shutil
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import pandas as pd
-from PIL import Image
 from utils.app_config import load_app_config, AppConfig
 from utils.logger import logger
+from utils.media_cache import MediaCache
+from utils.media_probe import probe_stream_params, stream_mismatches
+from utils.render_profile import RenderProfile
 from utils.climax_clipper import find_climax_segment
+from utils.clip_overlay import clip_output_path
 from utils.issue import Issue
 from utils.cover import Cover
+from utils.scroll_renderer import ScrollFrameRenderer
 from utils.achievement_clipper import AchievementClipper
 from utils.dataclass import Config as ScraperConfig 
 from src.bilibili_api_client import BilibiliApiClient
 from src.clip_flow import ClipFlow
+from src.analysis_workers import (
+    _analyze_clip, _init_analysis_worker, _init_separation_worker, _separate_vocals, physical_cores,
+)
+from utils import vocal_separator
+from src.render_graph import RenderGraph, Task
+from src.download_manager import DownloadManager
+
+def concat_target(profile: RenderProfile) -> Dict[str, Dict[str, Any]]:
+    """最终拼接要求的流参数，与渲染档位的编码参数及各片段的滤镜输出保持一致。"""
+    return {
+        "video": {"codec_name": "h264", "width": profile.width, "height": profile.height,
+                  "r_frame_rate": f"{profile.fps}/1", "pix_fmt": "yuv420p"},
+        "audio": {"codec_name": "aac", "sample_rate": 44100, "channels": 2,
+                  "channel_layout": "stereo", "sample_fmt": "fltp"},
+    }
 
 class DailyVideoFlow:
     def __init__(self, cfg: AppConfig | None = None) -> None:
         self.cfg = cfg or load_app_config()
+        self.media_cache = MediaCache(
+            self.cfg.paths.videos_root,
+            budget_bytes=int(self.cfg.cache.budget_gb * 1024 ** 3),
+        )
         self.api_client = BilibiliApiClient(
             config=ScraperConfig(), 
             videos_root=self.cfg.paths.videos_root,
-            ffmpeg_bin=self.cfg.ffmpeg.bin
+            ffmpeg_bin=self.cfg.ffmpeg.bin,
+            media_cache=self.media_cache
         )
 
         self.issue_mgr = Issue(
@@ -38,7 +65,8 @@ class DailyVideoFlow:
             card_width=self.cfg.ui.card_width,
             card_height=self.cfg.ui.card_height,
             card_radius=self.cfg.ui.card_radius,
-            ffmpeg_bin=self.cfg.ffmpeg.bin
+            ffmpeg_bin=self.cfg.ffmpeg.bin,
+            media_cache=self.media_cache
         )
 
         self.achieve_clipper = AchievementClipper(
@@ -53,56 +81,361 @@ class DailyVideoFlow:
             icon_dir=self.cfg.paths.icon_dir,
             font_regular=self.cfg.fonts.regular,
             font_bold=self.cfg.fonts.bold,
-            ffmpeg_bin=self.cfg.ffmpeg.bin
+            ffmpeg_bin=self.cfg.ffmpeg.bin,
+            single_pass=self.cfg.video.single_pass,
+            render_profile=self.cfg.render
         )
 
         self.daily_video_dir = self.cfg.paths.daily_video_dir
         self.clip_duration = self.cfg.video.clip_duration
         self.ffmpeg_bin = self.cfg.ffmpeg.bin
+        self.ffprobe_bin = self.cfg.ffmpeg.probe_bin
 
         c = self.cfg.ui.scroll_bg_color
         self.bg_color = tuple(c) if len(c) == 4 else (c[0], c[1], c[2], 255)
         self.ui = self.cfg.ui
+        # 下载管理器，每次 run 时创建
+        self.downloads: Optional[DownloadManager] = None
+        # 最近一次 run 的各阶段耗时（秒）
+        self.stage_times: Dict[str, float] = {}
+
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[stage] = time.perf_counter() - t0
 
     async def close(self):
         """关闭资源"""
         await self.api_client.close_session()
 
     def run(self) -> None:
+        """渲染最新一期。"""
+        self._run_issues([None])
+
+    def run_batch(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Optional[Path]]:
+        """
+        批量渲染（回填）一段日期内的各期，例如更换模板后重渲整月。
+        所有期共用一张任务图：同一首歌同一时长的下载、音频提取、高潮分析与区间截取只执行一次，
+        各期的任务交错执行，并发受同一组资源池（即全局的 CPU / ffmpeg 预算）限制。
+
+        Args:
+            start (str, optional): 起始期日期（YYYYMMDD，含），为None时不限。
+            end (str, optional): 结束期日期（YYYYMMDD，含），为None时不限。
+
+        Returns:
+            Dict[str, Optional[Path]]: {期日期: 成片路径}，失败的期为None。
+        """
+        excel_paths = self.issue_mgr.find_total_excels(start, end)
+        if not excel_paths:
+            logger.warning(f"没有找到 {start or '-'} ~ {end or '-'} 范围内的总榜文件")
+            return {}
+        return self._run_issues(excel_paths)
+
+    def _run_issues(self, excel_paths: List[Optional[Path]]) -> Dict[str, Optional[Path]]:
         self.daily_video_dir.mkdir(exist_ok=True)
 
-        combined_rows, issue_date, issue_idx, excel_date = self.issue_mgr.prepare_video_data(self.cfg.video.top_n)
-
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_clips = executor.submit(self._generate_clips, combined_rows, issue_date)
-            future_achieve = executor.submit(self._generate_achievement_video, excel_date, issue_date, issue_idx)
-            self._generate_covers(combined_rows, issue_date, issue_idx)
-            
-            cover_vertical_path = self.daily_video_dir / f"{issue_idx}_{issue_date}_cover_3-4.jpg"
-            cover_intro_path = self.daily_video_dir / f"tmp_cover_intro_{issue_date}.mp4"
-            if cover_vertical_path.exists():
-                self._create_cover_intro_clip(cover_vertical_path, cover_intro_path)
-            
-            index_to_path = future_clips.result()
-            achieve_vid = future_achieve.result()
-
-        if not index_to_path:
-            logger.error("没有生成视频片段")
-            return
-        
-        all_clips = [index_to_path[i] for i in sorted(index_to_path.keys())]
-
-        if cover_intro_path.exists():
-            all_clips.insert(0, cover_intro_path)
-
-        if achieve_vid:
-            all_clips.append(achieve_vid)
+        self.stage_times.clear()
+        issues = []
+        with self._timed("prepare"):
+            for excel_path in excel_paths:
+                try:
+                    issues.append(self.issue_mgr.prepare_video_data(self.cfg.video.top_n, excel_path))
+                except Exception as e:
+                    # 批量模式下某一期数据不全（如缺少新曲榜）时跳过该期，不影响其余各期
+                    if excel_path is None:
+                        raise
+                    logger.error(f"读取 {excel_path.name} 失败，跳过该期: {e}")
+
+        # 上榜信息用于缓存淘汰时估计再次上榜的可能性；各期按日期升序，每首歌只记一次使用，取最近一期的排名与在榜次数
+        chart: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        for combined_rows, *_ in issues:
+            for r in combined_rows:
+                bvid = str(r.get("bvid", "")).strip()
+                if bvid:
+                    chart[bvid] = (self._int_or_none(r.get("rank")), self._int_or_none(r.get("count")))
+        for bvid, (rank, count) in chart.items():
+            self.media_cache.touch(bvid, rank=rank, count=count)
+        bvids = set(chart)
+
+        sc = self.cfg.scheduler
+        cpu_workers = sc.cpu_workers or physical_cores()
+        graph = RenderGraph(
+            {"io": sc.io_workers, "cpu": cpu_workers, "ffmpeg": sc.ffmpeg_workers},
+            state_path=self.daily_video_dir / ".render_graph.json",
+        )
+        # 高潮分析受 GIL 限制，由 cpu 任务提交到同样大小的进程池中执行；
+        # 人声分离模型占用大量内存，只在至多 MAX_CONCURRENT 个进程的独立进程池中加载和运行
+        analysis_pool = ProcessPoolExecutor(max_workers=cpu_workers, initializer=_init_analysis_worker)
+        separation_pool = ProcessPoolExecutor(
+            max_workers=vocal_separator.MAX_CONCURRENT, initializer=_init_separation_worker
+        )
+        self.downloads = DownloadManager(
+            self.api_client, max_concurrent=sc.download_workers, max_retries=sc.download_retries
+        )
+        try:
+            for combined_rows, issue_date, issue_idx, excel_date in issues:
+                self._build_graph(graph, analysis_pool, separation_pool, combined_rows, issue_date, issue_idx, excel_date)
+            if len(issues) > 1:
+                kinds = [t.kind for t in graph.tasks.values()]
+                logger.info(
+                    f"批量渲染 {len(issues)} 期: {kinds.count('clip')} 个片段，"
+                    f"去重后 {kinds.count('download') + kinds.count('download_audio')} 个下载、"
+                    f"{kinds.count('climax')} 个高潮分析"
+                )
+            with self._timed("graph"):
+                results = graph.run()
+        finally:
+            analysis_pool.shutdown(wait=True)
+            separation_pool.shutdown(wait=True)
+            self.downloads.shutdown()
+            logger.info(f"下载统计: {self.downloads.stats()}")
+            with self._timed("cache_evict"):
+                self.media_cache.evict(protect=bvids)
+                self.media_cache.save()
+        for kind, seconds in graph.seconds_by_kind().items():
+            self.stage_times[f"{kind} (累计)"] = seconds
+
+        outputs: Dict[str, Optional[Path]] = {}
+        parts: List[Path] = []
+        for _, issue_date, issue_idx, _ in issues:
+            concat = f"concat:{issue_date}"
+            final_path = results.get(concat)
+            outputs[issue_date] = final_path
+            if final_path is None:
+                logger.error(f"第 {issue_idx} 期（{issue_date}）日刊视频生成失败")
+                continue
+            logger.info(f"完成: {final_path}")
+            parts += [p for p in (results.get(name) for name in graph.tasks[concat].deps) if isinstance(p, Path)]
+        # 有失败的期时保留文字图层，重新运行时可直接复用
+        self._cleanup_temp_files(parts, remove_texts=all(outputs.values()))
+        return outputs
+
+    def _build_graph(self, graph: RenderGraph, analysis_pool: ProcessPoolExecutor,
+                     separation_pool: ProcessPoolExecutor, combined_rows, issue_date, issue_idx, excel_date) -> None:
+        """
+        将一期的任务加入任务图（按 bvid 与片段时长命名的素材任务在多期之间共用）：
+        每首歌 download -> audio -> vocals -> climax -> window ->（segment ->）clip，clip 还依赖 overlay；
+        区间模式下 download 只下载音频，window 再下载所需区间的视频；
+        covers -> cover_intro；片尾曲 download_audio -> audio -> vocals -> achievement；concat 依赖全部片段、片头与成就视频。
+        """
+        videos_root = self.cfg.paths.videos_root
+        section_mode = self.cfg.video.download_mode == "section"
+        clip_tasks: List[str] = []
+        for i, r in enumerate(combined_rows):
+            idx = i + 1
+            row = pd.Series(r.to_dict())
+            bvid = str(row.get("bvid", "")).strip()
+            if not bvid:
+                continue
+            dur = self._clip_duration_for(row)
+            sig = partial(self._signature, f"{dur:g}")
+
+            # 区间模式先只下载音频做高潮检测，再只下载所需区间的视频；完整模式下载整个视频
+            if section_mode:
+                dl = graph.add(Task(f"download_audio:{bvid}", partial(self._download_audio, bvid), "io")).name
+            else:
+                dl = graph.add(Task(f"download:{bvid}", partial(self._download, bvid), "io")).name
+            au = graph.add(Task(f"audio:{bvid}", partial(self._extract_audio, bvid), "ffmpeg", deps=[dl])).name
+            vo = graph.add(Task(
+                f"vocals:{bvid}", partial(self._separate, separation_pool, bvid), "cpu", deps=[au]
+            )).name
+            # 人声分离失败时仍做高潮分析（不使用人声特征），不因此丢弃该曲目
+            cl = graph.add(Task(
+                f"climax:{bvid}:{dur:g}", partial(self._analyze, analysis_pool, bvid, dur), "cpu",
+                deps=[au, vo], allow_failed_deps=True
+            )).name
+            # window 的结果为 (源视频, 起始秒数)
+            if section_mode:
+                win = graph.add(Task(
+                    f"window:{bvid}:{dur:g}", partial(self._download_section, bvid, dur), "io", deps=[au, cl]
+                )).name
+            else:
+                win = graph.add(Task(f"window:{bvid}:{dur:g}", self._full_window, "cpu", deps=[dl, cl])).name
+            ov = graph.add(Task(
+                f"overlay:{issue_date}:{idx}", partial(self.clip_flow.render_overlay, row, issue_date), "cpu"
+            )).name
+
+            clip_path = clip_output_path(self.daily_video_dir, issue_date, idx, bvid)
+            if self.cfg.video.single_pass:
+                clip = Task(
+                    f"clip:{issue_date}:{idx}", partial(self._encode_clip, row, idx, issue_date, dur), "ffmpeg",
+                    deps=[win, ov], outputs=[clip_path], signature=sig,
+                )
+            else:
+                segment_path = ClipFlow.segment_path(
+                    videos_root / bvid / f"{bvid}.mp4", bvid, dur, self.cfg.render.name
+                )
+                seg = graph.add(Task(
+                    f"segment:{bvid}:{dur:g}", partial(self._cut_segment, bvid, dur), "ffmpeg",
+                    deps=[win], outputs=[segment_path], signature=sig,
+                )).name
+                clip = Task(
+                    f"clip:{issue_date}:{idx}", partial(self._encode_clip_from_segment, row, idx, issue_date), "ffmpeg",
+                    deps=[seg, ov], outputs=[clip_path], signature=sig,
+                )
+            clip_tasks.append(graph.add(clip).name)
+
+        cover_paths = [
+            self.daily_video_dir / f"{issue_idx}_{issue_date}_cover.jpg",
+            self.daily_video_dir / f"{issue_idx}_{issue_date}_cover_3-4.jpg",
+        ]
+        cover_sig = ",".join(str(r.get("bvid", "")).strip() for r in combined_rows)
+        covers = graph.add(Task(
+            f"covers:{issue_date}", partial(self._generate_covers, combined_rows, issue_date, issue_idx), "ffmpeg",
+            outputs=cover_paths, signature=lambda: cover_sig,
+        )).name
+        cover_intro = graph.add(Task(
+            f"cover_intro:{issue_date}",
+            partial(self._cover_intro_task, self.daily_video_dir / f"tmp_cover_intro_{issue_date}.mp4"),
+            "ffmpeg", deps=[covers],
+            outputs=[self.daily_video_dir / f"tmp_cover_intro_{issue_date}.mp4"],
+            signature=self._signature,
+        )).name
+
+        achievement_inputs = [
+            self.achieve_clipper.achievement_dir / f"十万记录{excel_date}与{issue_date}.xlsx",
+            self.achieve_clipper.config_dir / "ED.yaml",
+        ]
+        # 片尾曲音频的下载与人声分离作为独立任务（与上榜曲目共用），成就视频渲染不必在渲染线程中等待
+        ed_bvid = self.achieve_clipper.get_ed_info(issue_idx).get("bvid")
+        ed_deps: List[str] = []
+        if ed_bvid:
+            ed_dl = graph.add(Task(f"download_audio:{ed_bvid}", partial(self._download_audio, ed_bvid), "io")).name
+            ed_au = graph.add(Task(
+                f"audio:{ed_bvid}", partial(self._extract_audio, ed_bvid), "ffmpeg", deps=[ed_dl]
+            )).name
+            ed_vo = graph.add(Task(
+                f"vocals:{ed_bvid}", partial(self._separate, separation_pool, ed_bvid), "cpu", deps=[ed_au]
+            )).name
+            ed_deps = [ed_dl, ed_vo]
+        achievement = graph.add(Task(
+            f"achievement:{issue_date}",
+            partial(self._achievement_task, excel_date, issue_date, issue_idx), "ffmpeg",
+            deps=ed_deps, allow_failed_deps=True,
+            outputs=[self.daily_video_dir / f"tmp_achievement_{issue_date}.mp4"],
+            inputs=[p for p in achievement_inputs if p.exists()],
+            signature=partial(self._signature, issue_idx, repr(self.ui)),
+        )).name
+
+        # 预览档位单独命名，避免覆盖成片
+        suffix = "" if self.cfg.render.name == "final" else f"_{self.cfg.render.name}"
+        final_path = self.daily_video_dir / f"{issue_idx}_{issue_date}{suffix}.mp4"
+        graph.add(Task(
+            f"concat:{issue_date}", partial(self._concat_task, final_path, len(clip_tasks)), "ffmpeg",
+            deps=clip_tasks + [cover_intro, achievement],
+            outputs=[final_path],
+            signature=lambda *parts: "|".join(str(p) for p in parts),
+            allow_failed_deps=True,
+        ))
+
+    def _signature(self, *parts) -> str:
+        """任务参数签名：依赖结果中的非路径值（如高潮起点）、附加参数与渲染档位。"""
+        vals = [f"{p:.3f}" if isinstance(p, float) else str(p) for p in parts if not isinstance(p, Path)]
+        return "|".join(vals + [repr(self.cfg.render)])
+
+    @staticmethod
+    def _int_or_none(value) -> Optional[int]:
+        try:
+            return None if pd.isna(value) else int(value)
+        except (TypeError, ValueError):
+            return None
 
-        final_path = self.daily_video_dir / f"{issue_idx}_{issue_date}.mp4"
+    @staticmethod
+    def _require(value, message: str):
+        if value is None:
+            raise RuntimeError(message)
+        return value
+
+    def _download(self, bvid: str) -> Future:
+        return self.downloads.download_video(bvid)
+
+    def _extract_audio(self, bvid: str, video: Path) -> Path:
+        return self._require(self.api_client.ensure_audio(bvid, video), "音频提取失败")
+
+    def _separate(self, pool: ProcessPoolExecutor, bvid: str, audio: Path) -> Future:
+        """在分离进程池中生成人声缓存，结果为是否有可用的人声。"""
+        future = pool.submit(_separate_vocals, str(audio))
+        # 分离进程写入的人声缓存由主进程登记到素材缓存索引
+        future.add_done_callback(lambda _: self.media_cache.record(bvid))
+        return future
+
+    def _analyze(self, pool: ProcessPoolExecutor, bvid: str, clip_duration: float,
+                 audio: Optional[Path], _vocals: Optional[bool] = None) -> float:
+        """提交高潮分析，结果为起始秒数；人声分离失败时 _vocals 为None，分析不使用人声特征。"""
+        if audio is None:
+            raise RuntimeError(f"{bvid} 音频提取失败，无法进行高潮分析")
+        try:
+            start, _ = pool.submit(_analyze_clip, str(audio), clip_duration).result()
+        finally:
+            self.media_cache.record(bvid)
+        return start
+
+    def _download_audio(self, bvid: str) -> Future:
+        return self.downloads.download_audio(bvid)
+
+    def _download_section(self, bvid: str, clip_duration: float, audio: Path, start: float) -> Future:
+        """区间下载；失败（含音频对齐失败）时改为下载完整视频。结果为 (源视频, 起始秒数)。"""
+        window: Future = Future()
+
+        def on_full(f: Future) -> None:
+            if f.exception() is not None:
+                window.set_exception(f.exception())
+            else:
+                window.set_result((f.result(), start))
+
+        def on_section(f: Future) -> None:
+            if f.exception() is None:
+                window.set_result(f.result())
+                return
+            logger.warning(f"[{bvid}] 区间下载失败，改为下载完整视频")
+            self.downloads.download_video(bvid).add_done_callback(on_full)
+
+        self.downloads.download_section(bvid, start, clip_duration, audio).add_done_callback(on_section)
+        return window
+
+    @staticmethod
+    def _full_window(video: Path, start: float) -> Tuple[Path, float]:
+        return video, start
+
+    def _cut_segment(self, bvid: str, clip_duration: float, window: Tuple[Path, float]) -> Path:
+        video, start = window
+        return self._require(self.clip_flow.cut_segment(video, bvid, start, clip_duration), "截取片段失败")
+
+    def _encode_clip(self, row, idx: int, issue_date: str, clip_duration: float,
+                     window: Tuple[Path, float], overlay: Path) -> Path:
+        logger.info(f"处理 #{idx} | {row.get('title', '')}")
+        video, start = window
+        path = self.clip_flow.encode_clip(row, idx, issue_date, video, start, clip_duration, overlay)
+        return self._require(path, "片段编码失败")
+
+    def _encode_clip_from_segment(self, row, idx: int, issue_date: str, segment: Path, overlay: Path) -> Path:
+        logger.info(f"处理 #{idx} | {row.get('title', '')}")
+        path = self.clip_flow.encode_clip(row, idx, issue_date, segment, None, None, overlay)
+        return self._require(path, "片段编码失败")
+
+    def _cover_intro_task(self, output_path: Path, covers: List[Path]) -> Path:
+        cover_vertical_path = covers[1]
+        if not cover_vertical_path.exists():
+            raise RuntimeError("竖版封面不存在")
+        self._create_cover_intro_clip(cover_vertical_path, output_path)
+        return self._require(output_path if output_path.exists() else None, "封面片头生成失败")
+
+    def _achievement_task(self, excel_date: str, issue_date: str, issue_idx: int,
+                          ed_audio: Optional[Path] = None, _vocals: Optional[bool] = None) -> Path:
+        video = self._generate_achievement_video(excel_date, issue_date, issue_idx, bgm_media=ed_audio)
+        return self._require(video, "成就视频生成失败")
+
+    def _concat_task(self, final_path: Path, n_clips: int, *parts) -> Path:
+        clips = [p for p in parts[:n_clips] if p is not None]
+        if not clips:
+            raise RuntimeError("没有生成视频片段")
+        cover_intro, achieve_vid = parts[n_clips], parts[n_clips + 1]
+        all_clips = ([cover_intro] if cover_intro else []) + clips + ([achieve_vid] if achieve_vid else [])
         self._concat_clips(all_clips, final_path)
-        logger.info(f"完成: {final_path}")
-        
-        self._cleanup_temp_files(all_clips)
+        return final_path
 
     def _create_cover_intro_clip(self, image_path: Path, output_path: Path) -> None:
         filter_complex = (
@@ -117,11 +450,11 @@ class DailyVideoFlow:
             self.ffmpeg_bin, "-y",
             "-loop", "1", "-i", str(image_path),
             "-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100",
-            "-c:v", "libx264",
             "-t", "0.5",
             "-filter_complex", filter_complex,
-            "-pix_fmt", "yuv420p",
-            "-c:a", "aac",
+        ]
+        self._add_x264_encode_args(cmd)
+        cmd += [
             "-shortest",
             str(output_path),
             "-loglevel", "error"
@@ -131,42 +464,31 @@ class DailyVideoFlow:
         except Exception as e:
             logger.error(f"生成封面片头视频出错: {e}")
 
-    def _cleanup_temp_files(self, clip_paths: List[Path]) -> None:
+    def _cleanup_temp_files(self, clip_paths: List[Path], remove_texts: bool = True) -> None:
         for p in clip_paths:
             if p.exists():
                 p.unlink()
         temp_text_root = self.daily_video_dir / "temp_texts"
-        if temp_text_root.exists():
+        if remove_texts and temp_text_root.exists():
             shutil.rmtree(temp_text_root, ignore_errors=True)
 
-    def _generate_clips(self, rows, issue_date) -> Dict[int, Path]:
-        tasks = [(i + 1, r.to_dict()) for i, r in enumerate(rows)]
-        res = {}
-        with ThreadPoolExecutor(max_workers=6) as ex:
-            futures = {ex.submit(self._worker, t, issue_date): t for t in tasks}
-            for f in as_completed(futures):
-                idx, path = f.result()
-                if path:
-                    res[idx] = path
-        return res
-
-    def _worker(self, task, issue_date):
-        idx, r_dict = task
-        row = pd.Series(r_dict)
-        current_duration = self.clip_duration
-        rank_val = row.get("rank", 999)
-            
-        if rank_val <= 3:
-            current_duration = 20.0
-            
-        path = self.clip_flow.generate_clip(row, idx, current_duration, issue_date)
-        return idx, path
-
-    def _generate_covers(self, rows, date_str, idx):
+    def _clip_duration_for(self, row) -> float:
+        """前三名使用 20 秒片段，其余使用配置的片段时长。"""
+        if row.get("rank", 999) <= 3:
+            return 20.0
+        return self.clip_duration
+
+    def _generate_covers(self, rows, date_str, idx) -> List[Path]:
+        grid_path = self.daily_video_dir / f"{idx}_{date_str}_cover.jpg"
+        vertical_path = self.daily_video_dir / f"{idx}_{date_str}_cover_3-4.jpg"
+
+        # 两种封面共用大部分图片，先并发下载一次到本地缓存，之后封面合成只读本地文件
+        self.cover_mgr.prefetch_covers(rows)
+
         urls_16_9 = self.cover_mgr.select_cover_urls_grid(rows)
         self.cover_mgr.generate_grid_cover(
             urls_16_9, 
-            self.daily_video_dir / f"{idx}_{date_str}_cover.jpg",
+            grid_path,
             issue_date=date_str, 
             issue_index=idx
         )
@@ -174,12 +496,13 @@ class DailyVideoFlow:
         urls_3_4 = self.cover_mgr.select_cover_urls_3_4(rows)
         self.cover_mgr.generate_vertical_cover(
             urls_3_4, 
-            self.daily_video_dir / f"{idx}_{date_str}_cover_3-4.jpg",
+            vertical_path,
             issue_date=date_str,
             issue_index=idx
         )
+        return [grid_path, vertical_path]
 
-    def _generate_achievement_video(self, ex_date, is_date, idx) -> Optional[Path]:
+    def _generate_achievement_video(self, ex_date, is_date, idx, bgm_media: Optional[Path] = None) -> Optional[Path]:
         rows = self.achieve_clipper.load_rows(ex_date, is_date)
 
         out_path = self.daily_video_dir / f"tmp_achievement_{is_date}.mp4"
@@ -208,9 +531,10 @@ class DailyVideoFlow:
         audio_map = "1:a"
 
         if bgm_bvid:
-            v_path = self.api_client.download_video(bgm_bvid)
-            if v_path:
-                a_path = self.api_client.ensure_audio(bgm_bvid, v_path)
+            # 片尾曲只需要音乐，只下载音频流（由任务图预先下载时直接使用）
+            m_path = bgm_media or self.api_client.download_audio(bgm_bvid)
+            if m_path:
+                a_path = self.api_client.ensure_audio(bgm_bvid, m_path)
                 if a_path:
                     start, _ = find_climax_segment(str(a_path), clip_duration=total_duration)
                     audio_input_args = ["-ss", f"{start:.3f}", "-i", str(a_path)]
@@ -221,7 +545,7 @@ class DailyVideoFlow:
             "-f", "rawvideo",
             "-vcodec", "rawvideo",
             "-s", f"{screen_w}x{screen_h}",
-            "-pix_fmt", "rgba",
+            "-pix_fmt", "rgb24",
             "-r", str(fps),
             "-i", "-",
         ]
@@ -241,8 +565,15 @@ class DailyVideoFlow:
             "-loglevel", "error",
         ]
 
+        # 卡片长图与标题图层只渲染一次，逐帧只做数组切片和局部混合
+        header_layers = self.cover_mgr.create_header_layers(screen_w, screen_h, ed_info=ed_info)
+        renderer = ScrollFrameRenderer(
+            screen_w, screen_h, self.bg_color, strip_img, header_layers,
+            header_ed_y=lambda list_top_y: self.cover_mgr.header_ed_y(
+                header_layers["ed_region_top"], screen_h, list_top_y
+            ),
+        )
         process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
-        bg_base = Image.new("RGBA", (screen_w, screen_h), self.bg_color)
 
         try:
             logger.info(f"开始生成成就视频 (总时长: {total_duration:.1f}s)...")
@@ -260,20 +591,7 @@ class DailyVideoFlow:
                     else:
                         header_opacity = 0.0
 
-                frame = bg_base.copy()
-                paste_y = int(curr_strip_y)
-                
-                if paste_y < screen_h and (paste_y + strip_h) > 0:
-                    frame.paste(strip_img, (0, paste_y), strip_img)
-                    
-                if header_opacity > 0:
-                    header_img = self.cover_mgr.create_header(
-                        screen_w, screen_h, header_opacity,
-                        ed_info=ed_info,
-                        list_top_y=paste_y
-                    )
-                    frame.alpha_composite(header_img)
-                process.stdin.write(frame.tobytes())
+                process.stdin.write(renderer.render(int(curr_strip_y), header_opacity))
 
                 if frame_index % 300 == 0:
                     logger.info(f"成就视频进度: {t:.1f}/{total_duration:.1f}s")
@@ -290,21 +608,67 @@ class DailyVideoFlow:
             return None
 
     def _concat_clips(self, clip_paths: List[Path], output_path: Path) -> None:
-        cmd = [self.ffmpeg_bin, "-y"]
+        # 校验各片段流参数，一致的直接流复制，仅对不一致的片段单独重编码
+        target = concat_target(self.cfg.render)
+        inputs: List[Path] = []
+        conformed: List[Path] = []
         for p in clip_paths:
-            cmd += ["-i", str(p)]
+            diffs = stream_mismatches(probe_stream_params(p, self.ffprobe_bin), target)
+            if not diffs:
+                inputs.append(p)
+                continue
+            logger.warning(f"片段参数不一致，重新编码 {p.name}: {', '.join(diffs)}")
+            fixed = p.with_name(f"{p.stem}_conform.mp4")
+            self._conform_clip(p, fixed)
+            inputs.append(fixed)
+            conformed.append(fixed)
+
+        list_path = self.daily_video_dir / f"concat_{output_path.stem}.txt"
+        lines = []
+        for p in inputs:
+            escaped = p.resolve().as_posix().replace("'", r"'\''")
+            lines.append(f"file '{escaped}'")
+        list_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
-        n = len(clip_paths)
-        va = "".join(f"[{i}:v][{i}:a]" for i in range(n))
-        filter_complex = f"{va}concat=n={n}:v=1:a=1[v][a]"
-        
-        cmd += ["-filter_complex", filter_complex, "-map", "[v]", "-map", "[a]"]
+        cmd = [
+            self.ffmpeg_bin, "-y",
+            "-f", "concat", "-safe", "0",
+            "-i", str(list_path),
+            "-c", "copy",
+            "-movflags", "+faststart",
+            str(output_path),
+            "-loglevel", "error",
+        ]
+        try:
+            subprocess.run(cmd, check=True)
+        finally:
+            for p in [list_path, *conformed]:
+                if p.exists():
+                    p.unlink()
+
+    def _conform_clip(self, src: Path, dst: Path) -> None:
+        """将片段重编码为拼接目标参数；源文件没有音轨时补一条静音音轨。"""
+        target = concat_target(self.cfg.render)
+        v = target["video"]
+        a = target["audio"]
+        params = probe_stream_params(src, self.ffprobe_bin) or {}
+        cmd = [self.ffmpeg_bin, "-y", "-i", str(src)]
+        if params.get("audio") is None:
+            cmd += ["-f", "lavfi", "-i", f"anullsrc=channel_layout=stereo:sample_rate={a['sample_rate']}", "-shortest"]
+            audio_map = "1:a"
+        else:
+            audio_map = "0:a:0"
+        cmd += [
+            "-map", "0:v:0", "-map", audio_map,
+            "-vf", (
+                f"scale={v['width']}:{v['height']}:force_original_aspect_ratio=decrease,"
+                f"pad={v['width']}:{v['height']}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={v['r_frame_rate']}"
+            ),
+            "-af", f"aformat=sample_fmts={a['sample_fmt']}:channel_layouts={a['channel_layout']}",
+        ]
         self._add_x264_encode_args(cmd)
-        cmd += ["-movflags", "+faststart", str(output_path), "-loglevel", "error"]
+        cmd += ["-movflags", "+faststart", str(dst), "-loglevel", "error"]
         subprocess.run(cmd, check=True)
 
     def _add_x264_encode_args(self, cmd: List[str]) -> None:
-        cmd.extend([
-            "-c:v", "libx264", "-crf", "16", "-pix_fmt", "yuv420p",
-            "-c:a", "aac", "-b:a", "192k"
-        ])
+        cmd.extend(self.cfg.render.encode_args())
@@ -0,0 +1,135 @@
+# src/download_manager.py
+# 下载管理模块：统一调度视频/音频下载，限制并发、失败重试（指数退避）、合并同一素材的并发请求并统计进度。
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+from utils.logger import logger
+from src.bilibili_api_client import BilibiliApiClient
+from utils.dataclass import SectionAlignmentError
+
+class DownloadManager:
+    """
+    下载管理器。
+    所有下载请求返回 Future，调用方（渲染任务图）在结果就绪后才继续，不占用渲染线程等待网络。
+    相同 (类型, bvid, 参数) 的请求在进行中或已成功时直接返回同一个 Future；
+    失败（返回None或抛出异常）时按 backoff * 2^n 加随机抖动的间隔重试，
+    yt-dlp 保留 .part 文件并在重试时断点续传；重试用尽后 Future 以 RuntimeError 结束。
+    区间对齐失败（SectionAlignmentError）与网络无关，不重试，Future 直接以该异常结束。
+    """
+    def __init__(
+        self,
+        api_client: BilibiliApiClient,
+        max_concurrent: int = 4,
+        max_retries: int = 3,
+        backoff: float = 2.0,
+    ) -> None:
+        self.api_client = api_client
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="download")
+        self._futures: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        # 每个 bvid 的下载进度：{"status", "downloaded_bytes", "total_bytes", "speed", "attempts"}
+        self.progress: Dict[str, Dict[str, Any]] = {}
+        self.retries = 0
+        self.failures = 0
+        api_client.progress_hooks.append(self._on_progress)
+
+    def _entry(self, bvid: str) -> Dict[str, Any]:
+        return self.progress.setdefault(
+            bvid, {"status": "", "downloaded_bytes": 0, "total_bytes": 0, "speed": 0.0, "attempts": 0}
+        )
+
+    def _on_progress(self, d: Dict[str, Any]) -> None:
+        """yt-dlp 进度回调，按输出文件所在的 bvid 目录归类。"""
+        filename = d.get("filename") or d.get("tmpfilename")
+        if not filename:
+            return
+        bvid = Path(filename).parent.name
+        with self._lock:
+            p = self._entry(bvid)
+            p["status"] = d.get("status", "")
+            p["downloaded_bytes"] = d.get("downloaded_bytes") or p["downloaded_bytes"]
+            p["total_bytes"] = d.get("total_bytes") or d.get("total_bytes_estimate") or p["total_bytes"]
+            p["speed"] = d.get("speed") or 0.0
+
+    def _run(self, key: Tuple, fn: Callable[..., Any], args: Tuple, bvid: str) -> Any:
+        retries = self.max_retries
+        for attempt in range(retries + 1):
+            with self._lock:
+                self._entry(bvid)["attempts"] += 1
+            try:
+                result = fn(*args)
+            except SectionAlignmentError:
+                with self._lock:
+                    self.failures += 1
+                raise
+            except Exception as e:
+                logger.warning(f"[{bvid}] {key[0]} 出错: {e}")
+                result = None
+            if result is not None:
+                return result
+            if attempt < retries:
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+                logger.warning(f"[{bvid}] {key[0]} 失败，{delay:.1f}s 后第 {attempt + 1} 次重试")
+                with self._lock:
+                    self.retries += 1
+                # 下载地址可能已过期，重试前重新解析
+                self.api_client.invalidate_info(bvid)
+                time.sleep(delay)
+        with self._lock:
+            self.failures += 1
+        raise RuntimeError(f"{key[0]} 下载失败（已重试 {retries} 次）")
+
+    def _submit(self, kind: str, fn: Callable[..., Any], bvid: str, *args) -> Future:
+        key = (kind, bvid) + args
+        with self._lock:
+            existing = self._futures.get(key)
+            if existing is not None:
+                return existing
+            future = self._pool.submit(self._run, key, fn, (bvid,) + args, bvid)
+            self._futures[key] = future
+
+        def forget_failure(f: Future) -> None:
+            # 失败的请求不保留，之后再次请求时重新下载
+            if f.exception() is not None:
+                with self._lock:
+                    if self._futures.get(key) is f:
+                        del self._futures[key]
+
+        future.add_done_callback(forget_failure)
+        return future
+
+    def download_video(self, bvid: str) -> Future:
+        """Future 结果为完整视频路径。"""
+        return self._submit("video", self.api_client.download_video, bvid)
+
+    def download_audio(self, bvid: str) -> Future:
+        """Future 结果为音频流文件路径。"""
+        return self._submit("audio", self.api_client.download_audio, bvid)
+
+    def download_section(self, bvid: str, start: float, duration: float, reference_audio: Path) -> Future:
+        """Future 结果为 (区间文件, 起始位置)。网络失败按常规重试；对齐失败立即以 SectionAlignmentError 结束，由调用方改为完整下载。"""
+        return self._submit("section", self.api_client.download_section, bvid, start, duration, reference_audio)
+
+    def stats(self) -> Dict[str, Any]:
+        """汇总下载进度。"""
+        with self._lock:
+            done = sum(1 for p in self.progress.values() if p["status"] == "finished")
+            return {
+                "tracked": len(self.progress),
+                "finished": done,
+                "downloaded_mb": sum(p["downloaded_bytes"] for p in self.progress.values()) / 1024 ** 2,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        try:
+            self.api_client.progress_hooks.remove(self._on_progress)
+        except ValueError:
+            pass
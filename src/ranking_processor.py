@@ -2,10 +2,14 @@
 import asyncio
 import pandas as pd
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from utils.logger import logger
 from utils.config_handler import ConfigHandler
 from utils.data_handler import DataHandler
+from utils.excel_cache import read_excel_cached
+from utils.excel_stream import read_excel_stream
+from utils.song_db import SongDatabase
 from utils.calculator import calculate_ranks, merge_duplicate_names, update_rank_and_rate, update_count
 from utils.processing import process_records
 
@@ -27,6 +31,15 @@ class RankingProcessor:
             'special': self.run_special,
             'history': self.run_history
         }
+        self._song_db = None
+
+    @property
+    def song_db(self) -> SongDatabase:
+        """收录曲目数据库，首次访问时打开。"""
+        if self._song_db is None:
+            collected_path = self.config.get_path('collected_songs', 'input_paths')
+            self._song_db = SongDatabase(collected_path, columns=self.data_handler.usecols.get('record'))
+        return self._song_db
 
     async def run(self, **kwargs):
         """根据不同的榜单类型，动态分发到相应的主处理流程。"""
@@ -117,8 +130,7 @@ class RankingProcessor:
         """执行每日数据的合并与更新流程。"""
         dates = self.config.get_daily_new_song_dates()
         raw_combined_df = self._load_and_combine_diffs(dates)
-        collected_path = self.config.get_path('collected_songs', 'input_paths')
-        existing_collected_df = pd.read_excel(collected_path)
+        existing_collected_df = self.song_db.load()
         raw_combined_df = self._resolve_name_conflicts(raw_combined_df, existing_collected_df)
         updated_collected_df = self._update_collected_songs(raw_combined_df, existing_collected_df)
         self._process_and_save_combined_ranking(raw_combined_df, dates)
@@ -128,8 +140,8 @@ class RankingProcessor:
         """加载并合并新旧曲的日增数据。"""
         main_diff_path = self.config.get_path('main_diff', 'input_paths', **dates)
         new_song_diff_path = self.config.get_path('new_song_diff', 'input_paths', **dates)
-        df_main_diff = pd.read_excel(main_diff_path)
-        df_new_song_diff = pd.read_excel(new_song_diff_path)
+        df_main_diff = read_excel_cached(main_diff_path)
+        df_new_song_diff = read_excel_cached(new_song_diff_path)
         
         merged_df = pd.merge(df_new_song_diff, df_main_diff, on='bvid', how='outer', suffixes=('_new', '_main'))
         all_cols = df_main_diff.columns.union(df_new_song_diff.columns).drop('bvid')
@@ -194,10 +206,12 @@ class RankingProcessor:
 
     
     def _update_collected_songs(self, df: pd.DataFrame, existing_collected_df: pd.DataFrame = None) -> pd.DataFrame:
-        """更新收录曲目列表。"""
+        """更新收录曲目列表。
+
+        元数据更新和新曲追加以事务方式写入收录曲目数据库，只修改发生变化的行；Excel视图按需单独导出。
+        """
         if existing_collected_df is None:
-            collected_path = self.config.get_path('collected_songs', 'input_paths')
-            existing_collected_df = pd.read_excel(collected_path)
+            existing_collected_df = self.song_db.load()
         metadata_cols = self.data_handler.usecols.get('metadata_update_cols', [])
         latest_metadata = df[['bvid'] + [col for col in metadata_cols if col in df.columns]].copy()
         latest_metadata = latest_metadata.drop_duplicates(subset=['bvid'], keep='last')
@@ -208,19 +222,23 @@ class RankingProcessor:
         existing_collected_df.reset_index(inplace=True)
         new_songs_bvid = df[~df['bvid'].isin(existing_collected_df['bvid'])]['bvid'].unique()
         
+        # 仅更新已收录曲目中出现在日增数据里的行
+        changed_metadata = latest_metadata[latest_metadata.index.isin(existing_collected_df['bvid'])].reset_index()
+        written = self.song_db.upsert(changed_metadata, metadata_cols)
+
         if len(new_songs_bvid) > 0:
             record_cols = self.data_handler.usecols.get('record', [])
             new_songs_df = df[df['bvid'].isin(new_songs_bvid)].copy()
             new_songs_df = new_songs_df.drop_duplicates(subset=['bvid'], keep='last')
             new_songs_df['streak'] = 0
             new_songs_to_add = new_songs_df[[col for col in record_cols if col in new_songs_df.columns]]
+            written += self.song_db.upsert(new_songs_to_add, record_cols)
             
             updated_df = pd.concat([existing_collected_df, new_songs_to_add], ignore_index=True)
         else:
             updated_df = existing_collected_df
 
-        output_path = self.config.get_path('collected_songs', 'output_paths')
-        self.data_handler.save_df(updated_df, output_path, 'record')
+        logger.info(f"收录曲目更新 {written} 行（新增 {len(new_songs_bvid)} 首）")
         return updated_df
     
     def _process_and_save_combined_ranking(self, df: pd.DataFrame, dates: dict):
@@ -240,8 +258,8 @@ class RankingProcessor:
         """将新曲数据合并到主数据文件中。"""
         main_data_path = self.config.get_path('main_data', 'input_paths', **dates)
         new_song_data_path = self.config.get_path('new_song_data', 'input_paths', **dates)
-        df_main = pd.read_excel(main_data_path)
-        df_new_song = pd.read_excel(new_song_data_path)
+        df_main = read_excel_cached(main_data_path)
+        df_new_song = read_excel_cached(new_song_data_path)
         
         promotable_songs = pd.merge(df_new_song, df_collected[['bvid']], on='bvid', how='inner')
         stat_cols = self.data_handler.usecols.get('stat', [])
@@ -265,8 +283,8 @@ class RankingProcessor:
         diff_file_path = self.config.get_path('diff_file', 'input_paths', **dates)
         previous_rank_path = self.config.get_path('previous_ranking', 'input_paths', **dates)
         
-        new_ranking_df = pd.read_excel(diff_file_path)
-        previous_ranking_df = pd.read_excel(previous_rank_path)[['name', 'rank']]
+        new_ranking_df = read_excel_cached(diff_file_path)
+        previous_ranking_df = read_excel_cached(previous_rank_path)[['name', 'rank']]
         
         new_ranking_df = merge_duplicate_names(new_ranking_df)
         new_ranking_df = self.filter_new_song(new_ranking_df, previous_ranking_df)
@@ -319,17 +337,16 @@ class RankingProcessor:
             old_path = self.config.get_path('new_song_data', 'input_paths', date=dates['old_date'])
             new_path = self.config.get_path('new_song_data', 'input_paths', date=dates['new_date'])
             output_path = self.config.get_path('new_song_diff', 'output_paths', **dates)
-            collected_path = self.config.get_path('collected_songs', 'input_paths')
             # 使用 asyncio.to_thread 在独立的线程中执行同步的I/O操作，避免阻塞事件循环
-            collected_data = await asyncio.to_thread(pd.read_excel, collected_path)
+            collected_data = await asyncio.to_thread(lambda: self.song_db.load())
             point_threshold = self.config.config.get('threshold')
         else:
             return pd.DataFrame()
             
         # 异步读取新旧数据文件
         old_data, new_data = await asyncio.gather(
-            asyncio.to_thread(pd.read_excel, old_path),
-            asyncio.to_thread(pd.read_excel, new_path)
+            asyncio.to_thread(read_excel_cached, old_path),
+            asyncio.to_thread(read_excel_cached, new_path)
         )
         
         # 计算数据差异
@@ -355,10 +372,12 @@ class RankingProcessor:
         """执行特刊榜单的生成流程。"""
         input_path = self.config.get_path('input_path', 'paths', song_data=song_data)
         output_path = self.config.get_path('output_path', 'paths', song_data=song_data)
-        df = pd.read_excel(input_path)
+        df = read_excel_cached(input_path)
         
         processing_opts = self.config.config.get('processing_options', {})
-        collected_data = pd.read_excel(processing_opts['collected_data']) if 'collected_data' in processing_opts else None
+        collected_data = None
+        if 'collected_data' in processing_opts:
+            collected_data = SongDatabase(Path(processing_opts['collected_data']), columns=self.data_handler.usecols.get('record')).load()
             
         df = process_records(
             new_data=df,
@@ -375,8 +394,9 @@ class RankingProcessor:
     def run_history(self, dates: dict):
         """执行历史榜单的生成流程。"""
         input_path = self.config.get_path('input_path', **dates)
-        df = pd.read_excel(input_path)
-        # 筛选出排名进入前5的歌曲
-        df = df[df['rank'] <= 5][self.data_handler.usecols['history']].copy()
+        # 筛选出排名进入前5的歌曲：总榜按排名升序保存，读到排名大于5的行即可停止
+        df = read_excel_stream(input_path, columns=self.data_handler.usecols['history'],
+                               stop_when=lambda r: r['rank'] is not None and r['rank'] > 5)
+        df = df[df['rank'] <= 5].copy()
         output_path = self.config.get_path('output_path', **dates)
         self.data_handler.save_df(df, output_path)
@@ -0,0 +1,259 @@
+# src/render_graph.py
+# 渲染任务图：将日刊视频拆成有依赖关系的任务，按资源类型分别限制并发，输入就绪即执行，输出已是最新的任务直接跳过。
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+from utils.logger import logger
+
+RESOURCES = ("io", "cpu", "ffmpeg")
+
+@dataclass
+class Task:
+    """
+    任务节点。fn 按 deps 的顺序接收各依赖任务的结果作为位置参数；
+    fn 返回 Future 时（如提交给下载管理器的下载）不占用线程等待，以 Future 的结果作为任务结果。
+
+    Attributes:
+        name (str): 任务名，图内唯一，形如 "clip:3"；冒号前的部分作为耗时统计的类别。
+        fn (Callable[..., Any]): 任务函数。
+        resource (str): 占用的资源类型：io（网络/磁盘）、cpu（Python/NumPy 计算）、ffmpeg（外部编码进程）。
+        deps (Sequence[str]): 依赖的任务名。
+        outputs (Sequence[Path]): 任务产物；全部存在且不旧于输入时跳过执行，结果为产物路径。
+        inputs (Sequence[Path]): 额外的输入文件（依赖任务结果中的路径会自动计入）。
+        signature (Callable[..., str], optional): 由依赖结果计算的参数签名，与上次执行时不同则重新执行。
+        allow_failed_deps (bool): 依赖失败时仍执行，失败依赖的结果为None。
+    """
+    name: str
+    fn: Callable[..., Any]
+    resource: str = "cpu"
+    deps: Sequence[str] = ()
+    outputs: Sequence[Path] = ()
+    inputs: Sequence[Path] = ()
+    signature: Optional[Callable[..., str]] = None
+    allow_failed_deps: bool = False
+
+    @property
+    def kind(self) -> str:
+        return self.name.split(":", 1)[0]
+
+def _iter_paths(value: Any) -> Iterable[Path]:
+    if isinstance(value, Path):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _iter_paths(v)
+
+class RenderGraph:
+    """
+    任务图调度器。
+    每种资源一个线程池，池大小即该资源的并发上限；任务的全部依赖完成后立即提交到对应的池，
+    不再按阶段整体等待。参数签名持久化在 state_path 中，用于判断缓存产物是否仍然有效。
+    """
+    def __init__(self, limits: Dict[str, int], state_path: Optional[Path] = None):
+        """
+        Args:
+            limits (Dict[str, int]): 各资源类型的并发上限，例如 {"io": 4, "cpu": 8, "ffmpeg": 3}。
+            state_path (Path, optional): 参数签名文件路径，为None时不做签名校验。
+        """
+        unknown = set(limits) - set(RESOURCES)
+        if unknown:
+            raise ValueError(f"未知的资源类型: {sorted(unknown)}")
+        self.limits = {r: max(1, int(limits.get(r, 1))) for r in RESOURCES}
+        self.state_path = state_path
+        self.tasks: Dict[str, Task] = {}
+        self.results: Dict[str, Any] = {}
+        self.failed: Set[str] = set()
+        self.skipped: Set[str] = set()
+        # 各任务执行耗时（秒），跳过的任务不计入
+        self.task_seconds: Dict[str, float] = {}
+        self._state: Dict[str, str] = self._load_state()
+        self._lock = threading.Lock()
+
+    def add(self, task: Task) -> Task:
+        """添加任务；同名任务已存在时返回已有任务（例如多个片段引用同一首歌的下载）。"""
+        if task.resource not in RESOURCES:
+            raise ValueError(f"[{task.name}] 未知的资源类型: {task.resource}")
+        return self.tasks.setdefault(task.name, task)
+
+    def _load_state(self) -> Dict[str, str]:
+        if not self.state_path or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._state, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _check_graph(self) -> None:
+        for t in self.tasks.values():
+            for d in t.deps:
+                if d not in self.tasks:
+                    raise ValueError(f"[{t.name}] 依赖的任务不存在: {d}")
+        # Kahn 拓扑排序检查环
+        indegree = {n: len(t.deps) for n, t in self.tasks.items()}
+        children = defaultdict(list)
+        for n, t in self.tasks.items():
+            for d in t.deps:
+                children[d].append(n)
+        queue = [n for n, k in indegree.items() if k == 0]
+        seen = 0
+        while queue:
+            n = queue.pop()
+            seen += 1
+            for c in children[n]:
+                indegree[c] -= 1
+                if indegree[c] == 0:
+                    queue.append(c)
+        if seen != len(self.tasks):
+            raise ValueError("任务图中存在循环依赖")
+
+    def _is_fresh(self, task: Task, dep_results: List[Any]) -> bool:
+        if not task.outputs:
+            return False
+        try:
+            out_mtime = min(p.stat().st_mtime_ns for p in task.outputs)
+            for p in list(task.inputs) + list(_iter_paths(dep_results)):
+                if p.stat().st_mtime_ns > out_mtime:
+                    return False
+        except FileNotFoundError:
+            return False
+        if task.signature is not None:
+            return self._state.get(str(task.outputs[0])) == task.signature(*dep_results)
+        return True
+
+    def _execute(self, task: Task) -> Optional[Future]:
+        """执行任务；任务函数返回 Future 时不等待，返回一个在结果登记完成后结束的 Future。"""
+        dep_results = [self.results.get(d) for d in task.deps]
+        failed_deps = [d for d in task.deps if d in self.failed]
+        if failed_deps and not task.allow_failed_deps:
+            logger.warning(f"[{task.name}] 依赖失败，跳过: {', '.join(failed_deps)}")
+            with self._lock:
+                self.failed.add(task.name)
+            return None
+
+        if self._is_fresh(task, dep_results):
+            outputs = list(task.outputs)
+            with self._lock:
+                self.results[task.name] = outputs[0] if len(outputs) == 1 else outputs
+                self.skipped.add(task.name)
+            return None
+
+        t0 = time.perf_counter()
+        try:
+            result = task.fn(*dep_results)
+        except Exception as e:
+            self._store(task, dep_results, t0, error=e)
+            return None
+
+        if not isinstance(result, Future):
+            self._store(task, dep_results, t0, result=result)
+            return None
+
+        # 异步任务（如下载）：不占用线程等待，完成时再登记结果
+        stored: Future = Future()
+
+        def on_done(f: Future) -> None:
+            try:
+                self._store(task, dep_results, t0, result=f.result())
+            except Exception as e:
+                self._store(task, dep_results, t0, error=e)
+            stored.set_result(None)
+
+        result.add_done_callback(on_done)
+        return stored
+
+    def _store(self, task: Task, dep_results: List[Any], t0: float,
+               result: Any = None, error: Optional[Exception] = None) -> None:
+        with self._lock:
+            self.task_seconds[task.name] = time.perf_counter() - t0
+            if error is not None:
+                self.failed.add(task.name)
+            else:
+                self.results[task.name] = result
+                if task.signature is not None and task.outputs:
+                    self._state[str(task.outputs[0])] = task.signature(*dep_results)
+                    self._save_state()
+        if error is not None:
+            logger.error(f"[{task.name}] 执行失败: {error}")
+
+    def run(self) -> Dict[str, Any]:
+        """执行全部任务，返回 {任务名: 结果}；失败的任务不在结果中。
+
+        Raises:
+            ValueError: 依赖的任务不存在或存在循环依赖。
+        """
+        self._check_graph()
+        waiting = {n: len(t.deps) for n, t in self.tasks.items()}
+        children: Dict[str, List[str]] = defaultdict(list)
+        for n, t in self.tasks.items():
+            for d in t.deps:
+                children[d].append(n)
+
+        pools = {
+            r: ThreadPoolExecutor(max_workers=self.limits[r], thread_name_prefix=f"graph-{r}")
+            for r in RESOURCES
+        }
+        remaining = [len(self.tasks)]
+        all_done = threading.Event()
+        if not self.tasks:
+            all_done.set()
+
+        def submit(name: str) -> None:
+            pools[self.tasks[name].resource].submit(run_one, name)
+
+        def run_one(name: str) -> None:
+            pending = None
+            try:
+                pending = self._execute(self.tasks[name])
+            finally:
+                if pending is None:
+                    finish(name)
+            if pending is not None:
+                pending.add_done_callback(lambda _: finish(name))
+
+        def finish(name: str) -> None:
+            ready = []
+            with self._lock:
+                for c in children[name]:
+                    waiting[c] -= 1
+                    if waiting[c] == 0:
+                        ready.append(c)
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            for c in ready:
+                submit(c)
+            if finished:
+                all_done.set()
+
+        try:
+            for n, k in list(waiting.items()):
+                if k == 0:
+                    submit(n)
+            all_done.wait()
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+
+        if self.skipped:
+            logger.info(f"任务图: {len(self.skipped)} 个任务的产物已是最新，已跳过")
+        return dict(self.results)
+
+    def seconds_by_kind(self) -> Dict[str, float]:
+        """按任务类别汇总的累计执行耗时（秒）。"""
+        totals: Dict[str, float] = defaultdict(float)
+        for name, seconds in self.task_seconds.items():
+            totals[self.tasks[name].kind] += seconds
+        return dict(totals)
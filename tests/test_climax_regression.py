@@ -0,0 +1,108 @@
+# tests/test_climax_regression.py
+# 高潮检测回归测试：特征计算改为共用 STFT、固定分析采样率、向量化重复度之后，
+# 同一段固定音频上新旧两条特征路径选出的起点之差不超过一拍。
+import pytest
+
+np = pytest.importorskip("numpy")
+librosa = pytest.importorskip("librosa")
+sf = pytest.importorskip("soundfile")
+
+from utils import climax_clipper
+from utils.climax_clipper import _compute_block_chroma_repetition, _normalize, analyze_audio, select_climax_segment
+
+SR = 22050
+BPM = 120
+DURATION = 60.0
+CHORUS = (25.0, 40.0)
+CLIP_DURATION = 15.0
+
+def _synth_song(path) -> None:
+    """合成固定的测试音频：120 BPM 底鼓 + 四和弦循环，CHORUS 区间更响并加入旋律。"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(SR * DURATION)) / SR
+    chorus = (t >= CHORUS[0]) & (t < CHORUS[1])
+    level = np.where(chorus, 1.0, 0.3)
+
+    chords = [(220.0, 277.18, 329.63), (196.0, 246.94, 293.66), (174.61, 220.0, 261.63), (164.81, 207.65, 246.94)]
+    chord_idx = (t // 2.0).astype(int) % len(chords)
+    pad = np.zeros_like(t)
+    for i, freqs in enumerate(chords):
+        mask = chord_idx == i
+        pad[mask] = sum(np.sin(2 * np.pi * f * t[mask]) for f in freqs) / len(freqs)
+
+    beat = 60.0 / BPM
+    phase = t % beat
+    kick = np.exp(-phase * 30.0) * np.sin(2 * np.pi * 60.0 * phase)
+    hat = np.exp(-((t + beat / 2) % beat) * 80.0) * rng.standard_normal(len(t)) * 0.2
+
+    melody_notes = np.array([440.0, 493.88, 554.37, 659.25])
+    melody = np.sin(2 * np.pi * melody_notes[(t // beat).astype(int) % len(melody_notes)] * t) * chorus
+
+    y = level * (0.4 * pad + 0.6 * kick + hat) + 0.3 * melody
+    sf.write(str(path), (0.5 * y / np.max(np.abs(y))).astype(np.float32), SR)
+
+def _block_chroma_repetition_v1(y: np.ndarray, sr: int, block_sec: float = 1.0):
+    """旧版（算法版本1）的逐块循环实现。"""
+    cqt_hop = 1024
+    chroma_full = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=cqt_hop)
+    frames_per_block = max(1, int(block_sec * sr / cqt_hop))
+    n_blocks = chroma_full.shape[1] // frames_per_block
+    chroma_blocks = []
+    for i in range(n_blocks):
+        block_chroma = chroma_full[:, i * frames_per_block:(i + 1) * frames_per_block]
+        chroma_mean = block_chroma.mean(axis=1)
+        chroma_blocks.append(chroma_mean / (np.linalg.norm(chroma_mean) + 1e-8))
+    arr = np.stack(chroma_blocks, axis=0)
+    rep_score = _normalize((arr @ arr.T).sum(axis=1) - 1.0)
+    return rep_score, (np.arange(len(rep_score)) + 0.5) * block_sec
+
+def _analyze_audio_v1(audio_path: str, hop_length: int = 512):
+    """旧版特征计算：原始采样率，响度与起音各自计算频谱。"""
+    y, sr = librosa.load(audio_path, sr=None, mono=True)
+    rms = librosa.feature.rms(y=y, hop_length=hop_length)[0]
+    rep_block, block_times = _block_chroma_repetition_v1(y, sr)
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    _, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=hop_length, units='frames')
+    return {
+        "sr": int(sr),
+        "hop_length": int(hop_length),
+        "duration": len(y) / sr,
+        "rms": rms,
+        "rep_block": rep_block,
+        "block_times": block_times,
+        "vocal_rms": np.zeros(0),
+        "beat_times": librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length),
+        "onset_times": librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop_length),
+    }
+
+@pytest.fixture(scope="module")
+def song(tmp_path_factory):
+    path = tmp_path_factory.mktemp("audio") / "song.wav"
+    _synth_song(path)
+    return path
+
+@pytest.fixture(autouse=True)
+def no_vocal_separation(monkeypatch):
+    # 两条路径都不使用人声分离，只比较特征计算本身
+    monkeypatch.setattr(climax_clipper, "separate_vocals", lambda *args, **kwargs: None)
+
+def test_block_chroma_matches_loop_version(song):
+    y, sr = librosa.load(str(song), sr=SR, mono=True)
+    new_score, new_times = _compute_block_chroma_repetition(y, sr)
+    old_score, old_times = _block_chroma_repetition_v1(y, sr)
+    np.testing.assert_allclose(new_score, old_score, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(new_times, old_times)
+
+@pytest.mark.parametrize("analysis_sr", [22050, 11025])
+def test_start_within_one_beat_of_v1(song, analysis_sr):
+    old = _analyze_audio_v1(str(song))
+    new = analyze_audio(str(song), analysis_sr=analysis_sr)
+    assert new is not None
+
+    old_start, _ = select_climax_segment(old, CLIP_DURATION)
+    new_start, _ = select_climax_segment(new, CLIP_DURATION)
+
+    beats = old["beat_times"]
+    beat = float(np.median(np.diff(beats))) if len(beats) > 1 else 60.0 / BPM
+    assert abs(new_start - old_start) <= beat + 1e-3, (old_start, new_start, beat)
@@ -35,8 +35,8 @@ class AchievementClipper:
         if not rows:
             return Image.new("RGBA", (width, 100), (0,0,0,0)), 100
             
-        # 使用注入的 image_factory 生成卡片，无需传参
-        cards = [self.img_factory.create_card(row) for row in rows]
+        # 使用注入的 image_factory 并发预取封面并渲染卡片（命中缓存的卡片不再重绘）
+        cards = self.img_factory.render_cards(rows)
         
         card_h = cards[0].height
         card_w = cards[0].width
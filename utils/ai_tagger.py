@@ -11,6 +11,8 @@ from typing import List, Dict, Set, Tuple, Optional
 from utils.data_handler import DataHandler
 from utils.config_handler import ConfigHandler
 from utils.io_utils import save_to_excel 
+from utils.excel_cache import read_excel_cached
+from utils.song_db import SongDatabase
 
 COLOR_YELLOW = 'FFFF00' # 黄色，用于AI收录的歌曲
 COLOR_LIGHT_BLUE = 'ADD8E6' # 浅蓝色，用于预先已标注的歌曲
@@ -66,10 +68,13 @@ class AITagger:
         return tags
 
     def _load_known_tags(self) -> Tuple[Set[str], Set[str]]:
-        """从 '收录曲目.xlsx' 加载已知列表。"""
+        """从收录曲目数据库加载已知列表。"""
         data_handler = DataHandler(self.config_handler) 
+        collected_path = Path("收录曲目.xlsx")
         try:
-            df = data_handler._read_excel(Path("收录曲目.xlsx"), usecols_key='record')
+            if not collected_path.exists() and not collected_path.with_suffix('.db').exists():
+                raise FileNotFoundError(collected_path)
+            df = SongDatabase(collected_path, columns=data_handler.usecols.get('record')).load()
             synthesizers = self._extract_tags(df['synthesizer']) if 'synthesizer' in df.columns else set()
             vocals = self._extract_tags(df['vocal']) if 'vocal' in df.columns else set()
             return synthesizers, vocals
@@ -165,7 +170,7 @@ class AITagger:
     
     def _prepare_dataframe(self) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[int, str]]:
         """读取并准备DataFrame，区分已标注和待处理的数据。"""
-        df = pd.read_excel(self.input_file)
+        df = read_excel_cached(self.input_file)
         tagging_cols = ['synthesizer', 'vocal', 'type']
         for col in tagging_cols:
             if col not in df.columns:
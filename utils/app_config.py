@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict
 import yaml
+from utils.media_probe import default_ffprobe_bin
+from utils.render_profile import RenderProfile, load_render_profile
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 VIDEO_CONFIG_PATH = PROJECT_ROOT / "config" / "video.yaml"
@@ -24,12 +26,27 @@ class FontsConfig:
 @dataclass(frozen=True)
 class FfmpegConfig:
     bin: str
+    probe_bin: str
 
 @dataclass(frozen=True)
 class VideoBasicConfig:
     top_n: int
     clip_duration: float
     first_issue_date: str
+    single_pass: bool
+    download_mode: str  # section: 先下载音频再只下载所需区间；full: 下载完整视频
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    io_workers: int
+    cpu_workers: int  # 0 表示按物理核心数
+    ffmpeg_workers: int
+    download_workers: int
+    download_retries: int
+
+@dataclass(frozen=True)
+class CacheConfig:
+    budget_gb: float  # videos_root 容量上限，0 表示不限制
 
 @dataclass(frozen=True)
 class UiConfig:
@@ -49,9 +66,17 @@ class AppConfig:
     ffmpeg: FfmpegConfig
     video: VideoBasicConfig
     ui: UiConfig
+    render: RenderProfile
+    scheduler: SchedulerConfig
+    cache: CacheConfig
+
+def load_app_config(config_path: Path = VIDEO_CONFIG_PATH, profile: str | None = None) -> AppConfig:
+    """加载视频生成相关的应用配置
 
-def load_app_config(config_path: Path = VIDEO_CONFIG_PATH) -> AppConfig:
-    """加载视频生成相关的应用配置"""
+    Args:
+        config_path (Path): 配置文件路径。
+        profile (str, optional): 渲染档位（final/preview），为None时使用配置中 render.profile，默认 final。
+    """
     with open(config_path, "r", encoding="utf-8") as f:
         raw: Dict[str, Any] = yaml.safe_load(f)
 
@@ -68,13 +93,19 @@ def load_app_config(config_path: Path = VIDEO_CONFIG_PATH) -> AppConfig:
     f_cfg = raw["fonts"]
     fonts = FontsConfig(regular=str(f_cfg["regular"]), bold=str(f_cfg["bold"]))
 
-    ffmpeg = FfmpegConfig(bin=str(raw["ffmpeg"]["bin"]))
+    ff = raw["ffmpeg"]
+    ffmpeg = FfmpegConfig(
+        bin=str(ff["bin"]),
+        probe_bin=str(ff.get("probe_bin") or default_ffprobe_bin(str(ff["bin"]))),
+    )
 
     v = raw["video"]
     video = VideoBasicConfig(
         top_n=int(v["top_n"]),
         clip_duration=float(v["clip_duration"]),
         first_issue_date=str(v["first_issue_date"]),
+        single_pass=bool(v.get("single_pass", True)),
+        download_mode=str(v.get("download_mode", "section")),
     )
 
     u = raw["ui"]
@@ -91,6 +122,18 @@ def load_app_config(config_path: Path = VIDEO_CONFIG_PATH) -> AppConfig:
         scroll_speed_pps=float(u["scroll_speed_pps"]),
     )
 
+    sc = raw.get("scheduler") or {}
+    scheduler = SchedulerConfig(
+        io_workers=int(sc.get("io_workers", 4)),
+        cpu_workers=int(sc.get("cpu_workers", 0)),
+        ffmpeg_workers=int(sc.get("ffmpeg_workers", 3)),
+        download_workers=int(sc.get("download_workers", 4)),
+        download_retries=int(sc.get("download_retries", 3)),
+    )
+
+    ca = raw.get("cache") or {}
+    cache = CacheConfig(budget_gb=float(ca.get("budget_gb", 50)))
+
     return AppConfig(
         project_root=PROJECT_ROOT,
         paths=paths,
@@ -98,4 +141,7 @@ def load_app_config(config_path: Path = VIDEO_CONFIG_PATH) -> AppConfig:
         ffmpeg=ffmpeg,
         video=video,
         ui=ui,
+        render=load_render_profile(raw.get("render"), profile),
+        scheduler=scheduler,
+        cache=cache,
     )
@@ -1,12 +1,19 @@
 # utils/climax_clipper.py
-import subprocess
-import tempfile
+import hashlib
+import json
+import os
+import threading
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Any, Dict, Tuple, Optional
 import librosa
 import numpy as np
-import torch
 from utils.logger import logger
+from utils.vocal_separator import separate_vocals
+
+# 分析算法版本，修改特征计算或选段逻辑时递增，使旧的缓存失效
+ALGO_VERSION = 2
+# 分析采样率：音频提取时已重采样为 22050Hz，设为 11025 可进一步降采样以加快分析
+ANALYSIS_SR = 22050
 
 def _normalize(x: np.ndarray) -> np.ndarray:
     """将数组线性归一化到 [0, 1] 区间。"""
@@ -18,43 +25,6 @@ def _normalize(x: np.ndarray) -> np.ndarray:
         return np.zeros_like(x)
     return (x - min_v) / (max_v - min_v)
 
-def _separate_vocals_demucs(audio_path: str, sr: int) -> Optional[np.ndarray]:
-    """
-    使用Demucs分离人声。
-    """
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_out = Path(temp_dir)
-        
-        device = "cpu"
-        if torch and torch.cuda.is_available():
-            device = "cuda"
-
-        cmd = [
-            "demucs",
-            "-n", "htdemucs", 
-            "--two-stems=vocals",
-            "-d", device,
-            str(audio_path),
-            "-o", str(temp_out)
-        ]
-        
-        try:
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except Exception:
-            logger.warning("Demucs 分离失败或未安装，将跳过人声过滤步骤。")
-            return None
-
-        found_files = list(temp_out.rglob("vocals.wav"))
-        target_file = found_files[0] if found_files else None
-            
-        if target_file and target_file.exists():
-            try:
-                y_vocals, _ = librosa.load(str(target_file), sr=sr, mono=True)
-                return y_vocals
-            except Exception:
-                return None
-        return None
-
 def _compute_block_chroma_repetition(
     y: np.ndarray,
     sr: int,
@@ -63,7 +33,7 @@ def _compute_block_chroma_repetition(
     """
     计算重复度。
     """
-    cqt_hop = 1024
+    cqt_hop = 1024 if sr > 16000 else 512
     try:
         chroma_full = librosa.feature.chroma_cqt(y=y, sr=sr, hop_length=cqt_hop)
     except Exception:
@@ -79,91 +49,151 @@ def _compute_block_chroma_repetition(
     if n_blocks < 4:
          return np.zeros(n_blocks), np.linspace(block_sec / 2, n_blocks * block_sec - block_sec / 2, n_blocks)
 
-    chroma_blocks = []
-    for i in range(n_blocks):
-        start_f = i * frames_per_block
-        end_f = (i + 1) * frames_per_block
-        block_chroma = chroma_full[:, start_f:end_f]
-        if block_chroma.shape[1] > 0:
-            chroma_mean = block_chroma.mean(axis=1)
-            norm = np.linalg.norm(chroma_mean) + 1e-8
-            chroma_blocks.append(chroma_mean / norm)
-        else:
-            chroma_blocks.append(np.zeros(12))
-
-    chroma_blocks_arr = np.stack(chroma_blocks, axis=0)
+    # (12, n_blocks * fpb) -> (12, n_blocks, fpb)，按块求均值后逐块做 L2 归一化
+    blocks = chroma_full[:, :n_blocks * frames_per_block].reshape(chroma_full.shape[0], n_blocks, frames_per_block)
+    chroma_blocks_arr = blocks.mean(axis=2).T
+    chroma_blocks_arr /= np.linalg.norm(chroma_blocks_arr, axis=1, keepdims=True) + 1e-8
+
     sim = chroma_blocks_arr @ chroma_blocks_arr.T
     rep_score = sim.sum(axis=1) - 1.0
     rep_score = _normalize(rep_score)
     block_times = (np.arange(len(rep_score)) + 0.5) * block_sec
     return rep_score, block_times
 
-def find_climax_segment(
-    audio_path: str,
-    clip_duration: float = 20.0,
-    hop_length: int = 512
-) -> Tuple[float, float]:
-    """高潮检测算法"""
+def _file_signature(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+def _audio_hash(path: Path, meta: Optional[Dict[str, Any]]) -> str:
+    """音频内容哈希；文件的修改时间和大小与缓存记录一致时直接复用记录中的哈希。"""
+    mtime, size = _file_signature(path)
+    if meta and meta.get("mtime_ns") == mtime and meta.get("size") == size and meta.get("audio_hash"):
+        return meta["audio_hash"]
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_paths(audio_path: Path) -> Tuple[Path, Path]:
+    """分析缓存与音频放在同一目录（即 videos_root/{bvid}/）。"""
+    stem = audio_path.stem
+    return audio_path.with_name(f"{stem}_climax.json"), audio_path.with_name(f"{stem}_climax.npz")
+
+def _read_meta(meta_path: Path) -> Optional[Dict[str, Any]]:
+    if not meta_path.exists():
+        return None
     try:
-        y, sr = librosa.load(audio_path, sr=None, mono=True)
+        return json.loads(meta_path.read_text(encoding="utf-8"))
     except Exception:
-        return 0.0, clip_duration
+        return None
+
+def _write_meta(meta_path: Path, meta: Dict[str, Any]) -> None:
+    tmp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+def analyze_audio(audio_path: str, hop_length: int = 512, analysis_sr: int = ANALYSIS_SR) -> Optional[Dict[str, Any]]:
+    """计算与片段时长无关的音频特征（响度、重复度、人声响度、节拍和起音时间）。
+
+    响度与起音强度共用同一次 STFT；analysis_sr 低于 22050 时降采样分析，
+    hop_length 按比例缩放以保持相同的时间分辨率。
+
+    Returns:
+        Optional[Dict[str, Any]]: 特征字典，音频无法读取时返回None。
+    """
+    try:
+        y, sr = librosa.load(audio_path, sr=analysis_sr, mono=True)
+    except Exception:
+        return None
+    hop = max(64, int(round(hop_length * sr / 22050)))
+    n_fft = 2048 if sr > 16000 else 1024
+
+    # 共用的幅度谱
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop))
 
     # 1. 响度
-    rms = librosa.feature.rms(y=y, hop_length=hop_length)[0]
-    
+    rms = librosa.feature.rms(S=S, frame_length=n_fft, hop_length=hop)[0]
+
     # 2. 重复度
     rep_block, block_times = _compute_block_chroma_repetition(y, sr, block_sec=1.0)
-    
-    # 3. 对齐数据长度
+
+    # 3. 人声响度
+    y_vocals = separate_vocals(audio_path, sr)
+    if y_vocals is not None:
+        vocal_rms = librosa.feature.rms(y=y_vocals[:len(y)], frame_length=n_fft, hop_length=hop)[0]
+    else:
+        vocal_rms = np.zeros(0)
+
+    # 4. 节拍与起音（由同一幅度谱计算对数梅尔谱）
+    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S ** 2, sr=sr))
+    onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr, hop_length=hop)
+    _, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=hop, units='frames')
+
+    return {
+        "sr": int(sr),
+        "hop_length": int(hop),
+        "duration": len(y) / sr,
+        "rms": rms,
+        "rep_block": rep_block,
+        "block_times": block_times,
+        "vocal_rms": vocal_rms,
+        "beat_times": librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop),
+        "onset_times": librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop),
+    }
+
+def select_climax_segment(features: Dict[str, Any], clip_duration: float) -> Tuple[float, float]:
+    """根据已计算的特征选取高潮片段，只包含轻量的数组运算。"""
+    sr = features["sr"]
+    hop_length = features["hop_length"]
+    duration = float(features["duration"])
+    rms = np.asarray(features["rms"])
+    rep_block = np.asarray(features["rep_block"])
+    block_times = np.asarray(features["block_times"])
+    vocal_rms = np.asarray(features["vocal_rms"])
+
+    # 对齐数据长度，将块级重复度插值到帧级
     min_len = len(rms)
-    frame_idx = np.arange(min_len)
-    frame_times = librosa.frames_to_time(frame_idx, sr=sr, hop_length=hop_length)
-    
-    # 将块级重复度插值到帧级
+    frame_times = np.arange(min_len) * hop_length / sr
     if len(rep_block) > 1:
         rep_frame = np.interp(frame_times, block_times, rep_block)
     else:
         rep_frame = np.zeros_like(rms)
-        
+
     rms_n = _normalize(rms)
     rep_n = _normalize(rep_frame)
 
     raw_score = 0.65 * rms_n + 0.35 * rep_n
 
-    y_vocals = _separate_vocals_demucs(audio_path, sr)
-    
-    if y_vocals is not None:
-        y_vocals = y_vocals[:len(y)]
-        
-        vocal_rms = librosa.feature.rms(y=y_vocals, hop_length=hop_length)[0]
+    if len(vocal_rms) > 0:
         vocal_rms = vocal_rms[:min_len]
+        if len(vocal_rms) < min_len:
+            vocal_rms = np.pad(vocal_rms, (0, min_len - len(vocal_rms)))
         vocal_rms_n = _normalize(vocal_rms)
-        
+
         silence_thresh = 0.15
-        
+
         vocal_mask = np.where(vocal_rms_n > silence_thresh, 1.0, 0.0)
-        
+
         if np.mean(vocal_mask) > 0.05:
             raw_score = raw_score * vocal_mask
 
     frames_per_sec = sr / hop_length
     window_frames = int(clip_duration * frames_per_sec)
-    duration = len(y) / sr
 
     if window_frames <= 1 or window_frames >= len(raw_score):
-        return 0.0, min(float(duration), clip_duration)
+        return 0.0, min(duration, clip_duration)
 
     kernel = np.ones(window_frames, dtype=float)
     window_scores = np.convolve(raw_score, kernel, mode="valid")
-    
-    start_frame_idx = np.arange(len(window_scores))
-    start_times = librosa.frames_to_time(start_frame_idx, sr=sr, hop_length=hop_length)
+
+    start_times = np.arange(len(window_scores)) * hop_length / sr
 
     start_margin = 10.0
     end_margin = 10.0
-    max_ratio = 0.60 
-    
+    max_ratio = 0.60
+
     if duration <= clip_duration + start_margin + end_margin:
         min_start = 0.0
         max_start = max(0.0, duration - clip_duration)
@@ -181,33 +211,114 @@ def find_climax_segment(
     best_idx = int(np.argmax(masked_scores))
     rough_start = float(start_times[best_idx])
     rough_start = max(0.0, min(rough_start, max_start))
-    
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
-    
+
     search_range = 1.0
-    
-    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
-    
-    candidates = beat_times[
-        (beat_times >= rough_start - search_range) & 
-        (beat_times <= rough_start + search_range)
-    ]
 
+    # 优先对齐到最近的节拍，没有节拍时对齐到最近的起音
     final_start = rough_start
-    if len(candidates) > 0:
-        final_start = float(candidates[np.argmin(np.abs(candidates - rough_start))])
-    else:
-        onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=hop_length, units='frames')
-        onset_times = librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop_length)
-        candidates = onset_times[
-            (onset_times >= rough_start - search_range) & 
-            (onset_times <= rough_start + search_range)
+    for times in (np.asarray(features["beat_times"]), np.asarray(features["onset_times"])):
+        candidates = times[
+            (times >= rough_start - search_range) &
+            (times <= rough_start + search_range)
         ]
         if len(candidates) > 0:
-             final_start = float(candidates[np.argmin(np.abs(candidates - rough_start))])
+            final_start = float(candidates[np.argmin(np.abs(candidates - rough_start))])
+            break
 
     final_start = max(0.0, min(final_start, max_start))
-    final_end = min(float(duration), final_start + clip_duration)
+    final_end = min(duration, final_start + clip_duration)
 
     return float(final_start), float(final_end)
+
+def _load_features(npz_path: Path) -> Optional[Dict[str, Any]]:
+    if not npz_path.exists():
+        return None
+    try:
+        with np.load(npz_path) as data:
+            feats: Dict[str, Any] = {k: data[k] for k in data.files}
+        for k in ("sr", "hop_length"):
+            feats[k] = int(feats[k])
+        feats["duration"] = float(feats["duration"])
+        return feats
+    except Exception:
+        return None
+
+def _save_features(npz_path: Path, features: Dict[str, Any]) -> None:
+    tmp = npz_path.with_name(f"{npz_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+    np.savez(tmp, **{k: np.asarray(v) for k, v in features.items()})
+    os.replace(tmp, npz_path)
+
+def _meta_valid(meta: Optional[Dict[str, Any]], audio_hash: str, hop_length: int) -> bool:
+    return (
+        meta is not None
+        and meta.get("audio_hash") == audio_hash
+        and meta.get("algo_version") == ALGO_VERSION
+        and meta.get("hop_length") == hop_length
+        and meta.get("analysis_sr") == ANALYSIS_SR
+    )
+
+def features_cached(audio_path: str, hop_length: int = 512) -> bool:
+    """音频的分析特征是否已有有效缓存（此时不再需要人声分离）。"""
+    path = Path(audio_path)
+    meta_path, npz_path = _cache_paths(path)
+    try:
+        meta = _read_meta(meta_path)
+        return npz_path.exists() and _meta_valid(meta, _audio_hash(path, meta), hop_length)
+    except OSError:
+        return False
+
+def find_climax_segment(
+    audio_path: str,
+    clip_duration: float = 20.0,
+    hop_length: int = 512
+) -> Tuple[float, float]:
+    """
+    高潮检测算法（带持久化缓存）。
+
+    分析结果保存在音频文件旁：`{stem}_climax.npz` 保存与片段时长无关的特征，
+    `{stem}_climax.json` 记录音频哈希、算法版本及各片段时长对应的起止时间。
+    音频内容、算法版本、hop_length 或分析采样率变化时缓存失效；片段时长变化时复用已保存的特征。
+    """
+    path = Path(audio_path)
+    meta_path, npz_path = _cache_paths(path)
+    try:
+        meta = _read_meta(meta_path)
+        audio_hash = _audio_hash(path, meta)
+    except OSError:
+        return 0.0, clip_duration
+
+    valid = _meta_valid(meta, audio_hash, hop_length)
+    duration_key = f"{float(clip_duration):g}"
+    if valid and duration_key in meta.get("segments", {}):
+        start, end = meta["segments"][duration_key]
+        return float(start), float(end)
+
+    features = _load_features(npz_path) if valid else None
+    if features is None:
+        features = analyze_audio(audio_path, hop_length=hop_length)
+        if features is None:
+            return 0.0, clip_duration
+        try:
+            _save_features(npz_path, features)
+        except Exception as e:
+            logger.warning(f"保存高潮分析特征失败 {npz_path}: {e}")
+        valid = False
+
+    start, end = select_climax_segment(features, clip_duration)
+
+    mtime, size = _file_signature(path)
+    segments = dict(meta.get("segments", {})) if valid else {}
+    segments[duration_key] = [start, end]
+    try:
+        _write_meta(meta_path, {
+            "audio_hash": audio_hash,
+            "mtime_ns": mtime,
+            "size": size,
+            "algo_version": ALGO_VERSION,
+            "hop_length": hop_length,
+            "analysis_sr": ANALYSIS_SR,
+            "segments": segments,
+        })
+    except Exception as e:
+        logger.warning(f"保存高潮分析结果失败 {meta_path}: {e}")
+    return start, end
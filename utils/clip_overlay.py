@@ -1,33 +1,15 @@
 # utils/clip_overlay.py
 
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import List, Optional, Tuple
+import io
 import math
-from PIL import ImageFont
+import os
+import threading
 import pandas as pd
-
-def ffmpeg_escape(text: str) -> str:
-    s = str(text)
-    return (s.replace("\\", "\\\\")
-             .replace(":", r"\:")
-             .replace("'", r"\'")
-             .replace("%", r"\%"))
-
-def ffmpeg_escape_path(path: str) -> str:
-    p = str(path).replace("\\", "/")
-    if ":" in p:
-        drive, rest = p.split(":", 1)
-        p = f"{drive}\\:{rest}"
-    return p
-
-def write_text_to_file(content: str, folder: Path, filename: str) -> str:
-    if not folder.exists():
-        folder.mkdir(parents=True, exist_ok=True)
-    
-    file_path = folder / filename
-    file_path.write_text(content, encoding='utf-8')
-    
-    return ffmpeg_escape_path(str(file_path))
+from PIL import Image, ImageColor, ImageDraw
+from utils.font_cache import get_font, wrap_text
+from utils.icon_assets import get_baked_icon
 
 def format_number(x) -> str:
     if x is None:
@@ -52,41 +34,62 @@ def split_text_by_pixel_width(
     if not text:
         return []
 
-    font = ImageFont.truetype(font_path, font_size)
-    lines = []
-    current_line = ""
-    for char in text:
-        test_line = current_line + char
-        width = font.getlength(test_line)
-
-        if width <= max_width:
-            current_line = test_line
-        else:
-            if len(lines) >= max_lines - 1:
-                while current_line and font.getlength(current_line + "...") > max_width:
-                    current_line = current_line[:-1]
-                lines.append(current_line + "...")
-                return lines
-            
-            lines.append(current_line)
-            current_line = char
-    
-    if current_line:
-        lines.append(current_line)
-        
-    return lines
-
-def build_clip_overlay_cmd(
-    *,
-    segment_source_path: Path,
-    row: pd.Series,
-    clip_index: int,
-    issue_date_str: str,
-    daily_video_dir: Path,
-    icon_dir: Path,
-    font_file: str,
-) -> Tuple[List[str], Path]:
-
+    return wrap_text(text, get_font(font_path, font_size), max_width, max_lines=max_lines)
+
+FRAME_W, FRAME_H = 1080, 1920
+# 数据区使用的图标（对应 icon_dir 下的同名 PNG）
+STAT_ICON_LABELS = ["播放", "收藏", "硬币", "点赞", "弹幕", "评论", "分享"]
+
+def _rgba(spec: str) -> Tuple[int, int, int, int]:
+    """将 ffmpeg 风格的颜色（如 'white@0.65'、'#FFD700'）转换为 RGBA。"""
+    color, _, alpha = spec.partition("@")
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return r, g, b, int(round(255 * float(alpha))) if alpha else 255
+
+class _OverlayCanvas:
+    """透明叠加层画布，每个元素单独绘制后做 alpha 合成，使半透明的阴影、底框与文字正确叠加。"""
+    def __init__(self, font_file: str):
+        self.img = Image.new("RGBA", (FRAME_W, FRAME_H), (0, 0, 0, 0))
+        self.font_file = font_file
+
+    def _composite(self, draw_fn) -> None:
+        layer = Image.new("RGBA", self.img.size, (0, 0, 0, 0))
+        draw_fn(ImageDraw.Draw(layer))
+        self.img.alpha_composite(layer)
+
+    def text(
+        self,
+        xy: Tuple[float, float],
+        text: str,
+        size: int,
+        color: str,
+        anchor: str = "lt",
+        shadow: Optional[Tuple[int, int, str]] = None,
+        box: Optional[Tuple[str, int]] = None,
+    ) -> None:
+        """绘制文字；anchor 为 'lt'（左上）或 'rt'（右上），与 drawtext 的 x/y 及 w-tw-N 写法对应。"""
+        if not text:
+            return
+        font = get_font(self.font_file, size)
+        x, y = xy
+        if box is not None:
+            box_color, border = box
+            l, t, r, b = font.getbbox(text, anchor=anchor)
+            self._composite(lambda d: d.rectangle(
+                (x + l - border, y + t - border, x + r + border, y + b + border), fill=_rgba(box_color)
+            ))
+        if shadow is not None:
+            sx, sy, shadow_color = shadow
+            self._composite(lambda d: d.text((x + sx, y + sy), text, font=font, fill=_rgba(shadow_color), anchor=anchor))
+        self._composite(lambda d: d.text((x, y), text, font=font, fill=_rgba(color), anchor=anchor))
+
+    def icon(self, icon_path: Path, x: int, y: int, size: int, shadow_offset: int) -> None:
+        """绘制预先烘焙好的灰色图标及其模糊阴影。"""
+        baked, offset = get_baked_icon(icon_path, size, shadow_offset)
+        self.img.alpha_composite(baked, (x - offset, y - offset))
+
+def render_overlay_image(row: pd.Series, font_file: str, icon_dir: Path) -> Image.Image:
+    """将片段的全部静态信息（标题、排名、升降、得分、数据、图标、水印）渲染为透明叠加层。"""
     bvid = str(row.get("bvid", "")).strip()
     title = str(row.get("title", "")).strip()
     author = str(row.get("author", "")).strip()
@@ -102,14 +105,8 @@ def build_clip_overlay_cmd(
     rank = row.get("rank", None)
     count = row.get("count", 0)
     is_new = bool(row.get("is_new", False))
-    temp_text_dir = daily_video_dir / "temp_texts" / f"{issue_date_str}_{bvid}"
-    fontfile_expr = ffmpeg_escape_path(font_file)
-    bvid_text = ffmpeg_escape(bvid)
-    pubdate_text = ffmpeg_escape(pubdate)
-    count_text = ffmpeg_escape(count)
-    point_text = ffmpeg_escape(format_number(point))
-    wm_line1 = ffmpeg_escape("术力口数据姬")
-    wm_line2 = ffmpeg_escape("vocabili.top")
+
+    canvas = _OverlayCanvas(font_file)
 
     TITLE_START_Y = 60
     TITLE_FONT_SIZE = 50
@@ -129,18 +126,12 @@ def build_clip_overlay_cmd(
     num_lines = len(title_lines)
     shift_y = (num_lines - 1) * TITLE_LINE_H
 
-    left_text_filters = []
     curr_title_y = TITLE_START_Y
-
-    for i, line in enumerate(title_lines):
-        txt_path = write_text_to_file(line, temp_text_dir, f"title_{i}.txt")
-        
-        f = (
-            f"drawtext=fontfile='{fontfile_expr}':textfile='{txt_path}':x=60:y={curr_title_y}:"
-            f"fontsize={TITLE_FONT_SIZE}:fontcolor=white:box=1:boxcolor=black@0.45:boxborderw=14:"
-            f"shadowx=2:shadowy=2:shadowcolor=black@0.55"
+    for line in title_lines:
+        canvas.text(
+            (60, curr_title_y), line, TITLE_FONT_SIZE, "white",
+            shadow=(2, 2, "black@0.55"), box=("black@0.45", 14),
         )
-        left_text_filters.append(f)
         curr_title_y += TITLE_LINE_H
 
     RANK_Y = 140 + shift_y
@@ -150,13 +141,12 @@ def build_clip_overlay_cmd(
     rank_before_str = str(rank_before_raw).strip() if rank_before_raw is not None else "-"
 
     if is_new and rank > 10:
-        rank_text = ffmpeg_escape("NEW!!")
+        rank_text = "NEW!!"
         rank_color = "#FF3333"
-        show_rank_change = False
-        arrow_text_escaped = ""
-        prev_rank_text_escaped = ""
+        arrow_text = ""
+        prev_rank_text = ""
     else:
-        rank_text = ffmpeg_escape(f"# {rank}")
+        rank_text = f"# {rank}"
         
         if rank == 1:
             rank_color = "#FFD700"
@@ -167,8 +157,6 @@ def build_clip_overlay_cmd(
         else:
             rank_color = "#00E5FF"
 
-        show_rank_change = True
-
         if is_new or rank_before_str == "-":
             arrow_text = "▲"
             arrow_color = "#FF3333"
@@ -187,182 +175,64 @@ def build_clip_overlay_cmd(
                 arrow_text = "■"
                 arrow_color = "#888888"
 
-        arrow_text_escaped = ffmpeg_escape(arrow_text)
-        prev_rank_text_escaped = ffmpeg_escape(prev_rank_text)
-
-    author_full_str = f"作者：{author}"
-    author_txt_path = write_text_to_file(author_full_str, temp_text_dir, "author.txt")
-
     INFO_START_Y = 280 + shift_y
-    
-    left_text_filters += [
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='{rank_text}':x=60:y={RANK_Y}:"
-            f"fontsize=120:fontcolor={rank_color}:"
-            f"shadowx=3:shadowy=3:shadowcolor=black@0.9"
-        ),
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='{bvid_text}':x=60:y={INFO_START_Y}:"
-            f"fontsize=36:fontcolor=white:shadowx=2:shadowy=2:shadowcolor=black@0.9"
-        ),
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='{pubdate_text}':x=60:y={INFO_START_Y + 40}:"
-            f"fontsize=36:fontcolor=white:shadowx=2:shadowy=2:shadowcolor=black@0.9"
-        ),
-        (
-            f"drawtext=fontfile='{fontfile_expr}':textfile='{author_txt_path}':x=60:y={INFO_START_Y + 80}:"
-            f"fontsize=36:fontcolor=white:shadowx=2:shadowy=2:shadowcolor=black@0.9"
-        ),
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='上榜次数：{count_text}':x=60:y={INFO_START_Y + 120}:"
-            f"fontsize=36:fontcolor=white:shadowx=2:shadowy=2:shadowcolor=black@0.9"
-        ),
-    ]
 
-    if show_rank_change and arrow_text_escaped:
+    canvas.text((60, RANK_Y), rank_text, 120, rank_color, shadow=(3, 3, "black@0.9"))
+    info_lines = [bvid, pubdate, f"作者：{author}", f"上榜次数：{count}"]
+    for i, line in enumerate(info_lines):
+        canvas.text((60, INFO_START_Y + 40 * i), line, 36, "white", shadow=(2, 2, "black@0.9"))
+
+    if arrow_text and prev_rank_text:
         rank_val = int(rank) if (rank is not None and str(rank).isdigit()) else 0
         arrow_x = 310 if rank_val >= 10 else 240
 
-        if prev_rank_text_escaped:
-            prev_rank_int = int(prev_rank_text_escaped) if prev_rank_text_escaped.isdigit() else 0
-            is_one_digit = prev_rank_int > 0 and prev_rank_int < 10
-            is_new_text = prev_rank_text_escaped == "NEW"
-            
-            curr_arrow_y = ARROW_Y
-            prev_rank_x_offset = 22
+        prev_rank_int = int(prev_rank_text) if prev_rank_text.isdigit() else 0
+        is_one_digit = prev_rank_int > 0 and prev_rank_int < 10
+        is_new_text = prev_rank_text == "NEW"
+
+        prev_rank_x_offset = 22
+        prev_rank_y_offset = 22
+
+        if arrow_text == "■":
             prev_rank_y_offset = 22
-            
-            if arrow_text_escaped == ffmpeg_escape("■"):
-                prev_rank_y_offset = 22
-                if is_one_digit: prev_rank_x_offset += 10
-            elif arrow_text_escaped == ffmpeg_escape("▲"):
-                prev_rank_y_offset = 32
-                if is_one_digit: prev_rank_x_offset += 10
-            elif arrow_text_escaped == ffmpeg_escape("▼"):
-                prev_rank_y_offset = 12
-                if is_one_digit: prev_rank_x_offset += 10
-
-            if is_new_text:
-                prev_rank_x_offset = 0
-                prev_rank_fontsize = 40
-            else:
-                prev_rank_fontsize = 40
-
-            arrow_filter = (
-                f"drawtext=fontfile='{fontfile_expr}':text='{arrow_text_escaped}':"
-                f"x={arrow_x}:y={curr_arrow_y}:"
-                f"fontsize=90:fontcolor={arrow_color}:"
-                f"shadowx=2:shadowy=2:shadowcolor=black@0.8"
-            )
-            left_text_filters.append(arrow_filter)
-
-            prev_rank_filter = (
-                f"drawtext=fontfile='{fontfile_expr}':text='{prev_rank_text_escaped}':"
-                f"x={arrow_x + prev_rank_x_offset}:y={curr_arrow_y + prev_rank_y_offset}:"
-                f"fontsize={prev_rank_fontsize}:fontcolor=white:"
-                f"shadowx=2:shadowy=2:shadowcolor=black@0.9"
-            )
-            left_text_filters.append(prev_rank_filter)
+            if is_one_digit: prev_rank_x_offset += 10
+        elif arrow_text == "▲":
+            prev_rank_y_offset = 32
+            if is_one_digit: prev_rank_x_offset += 10
+        elif arrow_text == "▼":
+            prev_rank_y_offset = 12
+            if is_one_digit: prev_rank_x_offset += 10
+
+        if is_new_text:
+            prev_rank_x_offset = 0
+
+        canvas.text((arrow_x, ARROW_Y), arrow_text, 90, arrow_color, shadow=(2, 2, "black@0.8"))
+        canvas.text(
+            (arrow_x + prev_rank_x_offset, ARROW_Y + prev_rank_y_offset), prev_rank_text, 40, "white",
+            shadow=(2, 2, "black@0.9"),
+        )
 
     POINT_Y = 140 + shift_y
     right_margin = 60
-    point_value_filter = (
-        f"drawtext=fontfile='{fontfile_expr}':text='{point_text}':"
-        f"x=w-tw-{right_margin+60}:"
-        f"y={POINT_Y}:"
-        f"fontsize=100:"
-        f"fontcolor=#FFD700:"
-        f"shadowx=2:shadowy=2:shadowcolor=black@0.6"
-    )
-    point_unit_filter = (
-        f"drawtext=fontfile='{fontfile_expr}':text='pts':"
-        f"x=w-tw-{right_margin}:"
-        f"y={POINT_Y}+(100-30)/2:"
-        f"fontsize=30:"
-        f"fontcolor=white"
+    canvas.text(
+        (FRAME_W - right_margin - 60, POINT_Y), format_number(point), 100, "#FFD700",
+        anchor="rt", shadow=(2, 2, "black@0.6"),
     )
+    canvas.text((FRAME_W - right_margin, POINT_Y + (100 - 30) // 2), "pts", 30, "white", anchor="rt")
 
-    icon_map = {
-        "播放": icon_dir / "播放.png",
-        "收藏": icon_dir / "收藏.png",
-        "硬币": icon_dir / "硬币.png",
-        "点赞": icon_dir / "点赞.png",
-        "弹幕": icon_dir / "弹幕.png",
-        "评论": icon_dir / "评论.png",
-        "分享": icon_dir / "分享.png",
-    }
-
-    stats = [
-        ("播放", view),
-        ("收藏", favorite),
-        ("硬币", coin),
-        ("点赞", like),
-        ("弹幕", danmaku),
-        ("评论", reply),
-        ("分享", share),
-    ]
-
+    # 数据区：播放居中一行，其余六项分左右两列
     icon_size = 30
-    value_x_right = "w-tw-50"
-    icon_x_right = "W-220"
-    value_x_left = "w-tw-240"
-    icon_x_left = "W-410"
-    icon_x_center = "W-315"
-    value_x_center = "w-tw-145"
-
+    shadow_offset = 2
     base_y = POINT_Y + 100
     line_height = 38
+    columns = {
+        # 列: (图标x, 数值右边界x)
+        "center": (FRAME_W - 315, FRAME_W - 145),
+        "left": (FRAME_W - 410, FRAME_W - 240),
+        "right": (FRAME_W - 220, FRAME_W - 50),
+    }
 
-    cmd: List[str] = [
-        "-y",
-        "-i",
-        str(segment_source_path),
-    ]
-
-    icon_input_indices: Dict[str, int] = {}
-    for idx, (label, value) in enumerate(stats):
-        icon_path = icon_map[label]
-        cmd += ["-loop", "1", "-i", str(icon_path)]
-        icon_input_indices[label] = idx + 1 
-
-    base_filters = [
-        "[0:v]settb=AVTB,setpts=PTS-STARTPTS,setsar=1,fps=60[v0]",
-        "[v0]scale=trunc(1920*a/2)*2:1920,setsar=1,"
-        "crop=1080:1920:(in_w-1080)/2:(in_h-1920)/2,boxblur=20:8[bg]",
-        "[v0]scale=1080:-1,setsar=1[fg]",
-        "[bg][fg]overlay=(W-w)/2:(H-h)/2[vbase]",
-        "[0:a]asetpts=PTS-STARTPTS[aout]",
-    ]
-
-    icon_filters: List[str] = []
-    icon_processed_labels: Dict[str, Tuple[str, str]] = {}
-
-    for idx, (label, value) in enumerate(stats):
-        input_idx = icon_input_indices[label]
-        
-        raw_scaled_label = f"icon{idx}_raw"
-        shadow_label = f"icon{idx}_shadow"
-        main_label = f"icon{idx}_main"
-        
-        icon_processed_labels[label] = (main_label, shadow_label)
-
-        gray_val = 220 
-        
-        filter_chain = (
-            f"[{input_idx}:v]"
-            f"scale={icon_size}:{icon_size}:flags=lanczos,"
-            f"format=rgba,"
-            f"split[{raw_scaled_label}_1][{raw_scaled_label}_2];"
-            f"[{raw_scaled_label}_1]geq=r=0:g=0:b=0:a='alpha(X,Y)*0.6',gblur=sigma=1[{shadow_label}];"
-            f"[{raw_scaled_label}_2]geq=r={gray_val}:g={gray_val}:b={gray_val}:a='alpha(X,Y)'[{main_label}]"
-        )
-        icon_filters.append(filter_chain)
-
-    stats_layout: List[Tuple[str, object, str, str, int]] = []
-
-    y_play = base_y
-    stats_layout.append(("播放", view, icon_x_center, value_x_center, y_play))
-
+    stats_layout: List[Tuple[str, object, str, int]] = [("播放", view, "center", base_y)]
     others = [
         ("收藏", favorite),
         ("硬币", coin),
@@ -373,92 +243,113 @@ def build_clip_overlay_cmd(
     ]
     for idx, (label, value) in enumerate(others):
         row_idx = idx % 3
-        col_idx = idx // 3  
-        y = base_y + (row_idx + 1) * line_height
-
-        if col_idx == 0:
-            icon_x = icon_x_left
-            value_x = value_x_left
-        else:
-            icon_x = icon_x_right
-            value_x = value_x_right
-
-        stats_layout.append((label, value, icon_x, value_x, y))
-
-    stat_value_filters: List[str] = []
-    for label, value, icon_x_pos, value_x_pos, y in stats_layout:
-        value_escaped = ffmpeg_escape(format_number(value))
-        stat_value_filter = (
-            f"drawtext=fontfile='{fontfile_expr}':text='+{value_escaped}':"
-            f"x={value_x_pos}:y={y+2}:"
-            f"fontsize=30:fontcolor=#FFD700:"
-            f"shadowx=1:shadowy=1:shadowcolor=black@0.5"
+        col = "left" if idx // 3 == 0 else "right"
+        stats_layout.append((label, value, col, base_y + (row_idx + 1) * line_height))
+
+    for label, value, col, y in stats_layout:
+        icon_x, value_right = columns[col]
+        canvas.text(
+            (value_right, y + 2), f"+{format_number(value)}", 30, "#FFD700",
+            anchor="rt", shadow=(1, 1, "black@0.5"),
         )
-        stat_value_filters.append(stat_value_filter)
-
-    watermark_filters = [
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='{wm_line1}':"
-            f"x=60:y=h-600:fontsize=36:fontcolor=white@0.65:"
-            f"shadowx=1:shadowy=1:shadowcolor=black@0.65"
-        ),
-        (
-            f"drawtext=fontfile='{fontfile_expr}':text='{wm_line2}':"
-            f"x=60:y=h-560:fontsize=32:fontcolor=white@0.35:"
-            f"shadowx=1:shadowy=1:shadowcolor=black@0.35"
-        ),
-    ]
+        canvas.icon(icon_dir / f"{label}.png", icon_x, y, icon_size, shadow_offset)
 
-    draw_ops = (
-        left_text_filters
-        + [point_value_filter, point_unit_filter]
-        + stat_value_filters
-        + watermark_filters
-    )
+    canvas.text((60, FRAME_H - 600), "术力口数据姬", 36, "white@0.65", shadow=(1, 1, "black@0.65"))
+    canvas.text((60, FRAME_H - 560), "vocabili.top", 32, "white@0.35", shadow=(1, 1, "black@0.35"))
 
-    draw_filters: List[str] = []
-    current_label = "vbase"
+    return canvas.img
 
-    for idx, expr in enumerate(draw_ops):
-        next_label = f"vtxt{idx}"
-        draw_filters.append(f"[{current_label}]{expr}[{next_label}]")
-        current_label = next_label
+def clip_output_path(daily_video_dir: Path, issue_date_str: str, clip_index: int, bvid: str) -> Path:
+    return daily_video_dir / f"tmp_{issue_date_str}_{clip_index:02d}_{bvid}.mp4"
 
-    shadow_offset = 2
-    
-    # 叠加图标
-    for idx, (label, value, icon_x_pos, value_x_pos, y) in enumerate(stats_layout):
-        main_label, shadow_label = icon_processed_labels[label]
-        
-        step1_label = f"vicon{idx}_sh"
-        step2_label = f"vicon{idx}"
-        
-        shadow_overlay = (
-            f"[{current_label}][{shadow_label}]"
-            f"overlay={icon_x_pos}+{shadow_offset}:{y}+{shadow_offset}[{step1_label}]"
+def overlay_image_path(daily_video_dir: Path, issue_date_str: str, bvid: str) -> Path:
+    return daily_video_dir / "temp_texts" / f"{issue_date_str}_{bvid}" / "overlay.png"
+
+def save_overlay_image(
+    row: pd.Series,
+    issue_date_str: str,
+    daily_video_dir: Path,
+    icon_dir: Path,
+    font_file: str,
+) -> Path:
+    """渲染叠加层并保存；内容与已有文件相同时不改写，保留原修改时间以便下游判断缓存是否有效。"""
+    bvid = str(row.get("bvid", "")).strip()
+    overlay_path = overlay_image_path(daily_video_dir, issue_date_str, bvid)
+    overlay_path.parent.mkdir(parents=True, exist_ok=True)
+    buf = io.BytesIO()
+    render_overlay_image(row, font_file, icon_dir).save(buf, format="PNG")
+    data = buf.getvalue()
+    if overlay_path.exists() and overlay_path.read_bytes() == data:
+        return overlay_path
+    tmp = overlay_path.with_name(f"{overlay_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.png")
+    tmp.write_bytes(data)
+    os.replace(tmp, overlay_path)
+    return overlay_path
+
+def build_clip_overlay_cmd(
+    *,
+    segment_source_path: Path,
+    row: pd.Series,
+    clip_index: int,
+    issue_date_str: str,
+    daily_video_dir: Path,
+    icon_dir: Path,
+    font_file: str,
+    source_start: Optional[float] = None,
+    source_duration: Optional[float] = None,
+    fade_duration: float = 1.0,
+    overlay_path: Optional[Path] = None,
+) -> Tuple[List[str], Path]:
+    """构建片段叠加信息的 ffmpeg 参数。
+
+    全部静态信息预先渲染为一张透明 PNG，滤镜图中只需一次 overlay。
+    source_start/source_duration 不为 None 时直接从完整源视频中裁剪，
+    并在同一滤镜图中加入淡入淡出，实现一次编码完成整个片段。
+    overlay_path 不为 None 时直接使用已渲染好的叠加层图片。
+    """
+    bvid = str(row.get("bvid", "")).strip()
+    if overlay_path is None:
+        overlay_path = save_overlay_image(row, issue_date_str, daily_video_dir, icon_dir, font_file)
+
+    cmd: List[str] = ["-y"]
+    if source_start is not None:
+        cmd += ["-ss", f"{source_start:.3f}"]
+    if source_duration is not None:
+        cmd += ["-t", f"{source_duration:.3f}"]
+    cmd += ["-i", str(segment_source_path), "-i", str(overlay_path)]
+
+    v_fade = ""
+    a_fade = ""
+    if source_duration is not None and fade_duration > 0:
+        out_start = max(source_duration - fade_duration, 0.0)
+        v_fade = (
+            f",fade=t=in:st=0:d={fade_duration:g}"
+            f",fade=t=out:st={out_start:.3f}:d={fade_duration:g}"
         )
-        draw_filters.append(shadow_overlay)
-        
-        main_overlay = (
-            f"[{step1_label}][{main_label}]"
-            f"overlay={icon_x_pos}:{y}[{step2_label}]"
+        a_fade = (
+            f",afade=t=in:st=0:d={fade_duration:g}"
+            f",afade=t=out:st={out_start:.3f}:d={fade_duration:g}"
         )
-        draw_filters.append(main_overlay)
-        
-        current_label = step2_label
-
-    final_video_label = current_label
 
-    filter_complex = ";".join(base_filters + icon_filters + draw_filters)
+    filters = [
+        f"[0:v]settb=AVTB,setpts=PTS-STARTPTS,setsar=1,fps=60{v_fade},split[v0a][v0b]",
+        "[v0a]scale=trunc(1920*a/2)*2:1920,setsar=1,"
+        "crop=1080:1920:(in_w-1080)/2:(in_h-1920)/2,boxblur=20:8[bg]",
+        "[v0b]scale=1080:-1,setsar=1[fg]",
+        "[bg][fg]overlay=(W-w)/2:(H-h)/2[vbase]",
+        # 叠加层为单帧图片，eof_action=repeat 使其在整个片段中保持
+        "[vbase][1:v]overlay=0:0:eof_action=repeat:format=auto[vout]",
+        f"[0:a]asetpts=PTS-STARTPTS{a_fade}[aout]",
+    ]
 
     daily_video_dir.mkdir(exist_ok=True)
-    clip_filename = daily_video_dir / f"tmp_{issue_date_str}_{clip_index:02d}_{bvid}.mp4"
+    clip_filename = clip_output_path(daily_video_dir, issue_date_str, clip_index, bvid)
 
     cmd += [
         "-filter_complex",
-        filter_complex,
+        ";".join(filters),
         "-map",
-        f"[{final_video_label}]",
+        "[vout]",
         "-map",
         "[aout]",
         "-shortest",
@@ -1,22 +1,26 @@
 # utils/cover.py
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
 import random
-import subprocess
+import threading
 from datetime import datetime
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image, ImageDraw, ImageFont
 from utils.logger import logger
+from utils.font_cache import get_font, wrap_text
+from utils.cover_compositor import render_grid_cover, render_vertical_cover
+from utils.media_cache import MediaCache
 
-def ffmpeg_escape_path(path: str) -> str:
-    """FFmpeg 路径转义辅助函数"""
-    p = str(path).replace("\\", "/")
-    if ":" in p:
-        drive, rest = p.split(":", 1)
-        p = f"{drive}\\:{rest}"
-    return p
+# 成就卡片版式版本，修改 create_card 的绘制逻辑时递增，使旧的卡片缓存失效
+CARD_LAYOUT_VERSION = 1
+# 封面下载的并发数与连接池大小
+HTTP_POOL_SIZE = 16
 
 class Cover:
     def __init__(
@@ -28,7 +32,8 @@ class Cover:
         card_width: int,
         card_height: int,
         card_radius: int,
-        ffmpeg_bin: str = "ffmpeg" 
+        ffmpeg_bin: str = "ffmpeg",
+        media_cache: Optional[MediaCache] = None,
     ):
         self.videos_root = videos_root
         self.font_file = font_regular
@@ -37,8 +42,18 @@ class Cover:
         self.card_h = card_height
         self.card_radius = card_radius
         self.ffmpeg_bin = ffmpeg_bin
+        # 封面与卡片缓存写在 videos_root/{bvid}/ 下，写入后登记到素材缓存索引
+        self.media_cache = media_cache
         
         self.videos_root.mkdir(exist_ok=True)
+
+        # 共享的 HTTP 会话与连接池，供封面下载复用连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # 选片时登记的 封面URL -> bvid，用于把 URL 解析为本地封面缓存
+        self._url_bvids: Dict[str, str] = {}
         
         # 星期主题色映射 (周一=0, 周日=6)
         self.weekday_colors = {
@@ -93,6 +108,9 @@ class Cover:
 
         data = [self._parse_row_data(r) for r in combined_rows]
         data.sort(key=lambda x: x["rank"])
+        for d in data:
+            if d["url"] and d["bvid"]:
+                self._url_bvids[d["url"]] = d["bvid"]
         
         used_bvids = set()
         result = {}
@@ -226,6 +244,42 @@ class Cover:
             
         return final_list
 
+    def _load_cover_images(self, urls: List[str]) -> List[Image.Image]:
+        images = []
+        for url in urls:
+            with Image.open(self._local_cover_file(url)) as img:
+                images.append(img.convert("RGB"))
+        return images
+
+    def render_grid_cover(self, urls: List[str], issue_date: str = "", issue_index: int = 0) -> Optional[Image.Image]:
+        """在进程内合成 16:9 封面并返回图像，没有可用封面时返回None。"""
+        if not urls:
+            return None
+        return render_grid_cover(
+            self._load_cover_images(urls[:6]),
+            self.font_bold_file,
+            self._get_theme_color(issue_date),
+            issue_date=issue_date,
+            issue_index=issue_index,
+        )
+
+    def render_vertical_cover(self, urls: List[str], issue_date: str = "") -> Optional[Image.Image]:
+        """在进程内合成 3:4 封面并返回图像，没有可用封面时返回None。"""
+        if not urls:
+            return None
+        return render_vertical_cover(
+            self._load_cover_images(urls[:6]),
+            self.font_bold_file,
+            self._get_theme_color(issue_date),
+            issue_date=issue_date,
+        )
+
+    @staticmethod
+    def _save_cover(img: Image.Image, output_path: Path) -> None:
+        tmp = output_path.with_name(f"{output_path.stem}.{threading.get_ident()}.tmp.jpg")
+        img.save(tmp, quality=95)
+        os.replace(tmp, output_path)
+
     def generate_grid_cover(
         self, 
         urls: List[str], 
@@ -237,153 +291,10 @@ class Cover:
         if not urls:
             logger.warning("封面生成失败：没有可用的封面 URL")
             return
-
-        display_urls = urls[:6]
-        while len(display_urls) < 6:
-            display_urls.append(display_urls[-1])
-
-        theme_color = self._get_theme_color(issue_date)
-        font_path = ffmpeg_escape_path(self.font_bold_file)
-
-        cmd = [self.ffmpeg_bin, "-y"]
-        for url in display_urls:
-            cmd += ["-i", url]
-
-        filters = []
-        
-        #图片处理
-        # v0: 左侧大图 (Total Rank 1)
-        filters.append(
-            f"[0:v]scale=1000:562:force_original_aspect_ratio=increase,crop=1000:562,setsar=1,"
-            f"pad=1024:586:12:12:white[v0_raw]"
-        )
-        # v1: 右侧大图 (Best New Song)
-        filters.append(
-            f"[1:v]scale=800:450:force_original_aspect_ratio=increase,crop=800:450,setsar=1,"
-            f"pad=824:474:12:12:white[v1_raw]"
-        )
-        # v2-v5: 上方小图
-        for i in range(2, 6):
-            filters.append(
-                f"[{i}:v]scale=420:236:force_original_aspect_ratio=increase,crop=420:236,setsar=1,"
-                f"pad=436:252:8:8:white[v{i}_raw]"
-            )
-
-        #坐标
-        pos = {
-            # 小图层
-            "v2": {"x": 68,   "y": 290},
-            "v3": {"x": 524,  "y": 290},
-            "v4": {"x": 980,  "y": 290},
-            "v5": {"x": 1436, "y": 290},
-            
-            # 大图层
-            "v0": {"x": 80,   "y": 460},
-            "v1": {"x": 1016, "y": 570}, 
-        }
-
-        filters.append(
-            f"[0:v]scale=1920:1080:force_original_aspect_ratio=increase,crop=1920:1080,"
-            f"gblur=sigma=30,"
-            f"eq=saturation=1.4:brightness=-0.05,"
-            f"drawbox=c=white@0.1:t=fill[bg_blur]"
-        )
-        
-        shadow_cmds = []
-        shadow_cmds.append(
-            f"drawbox=x={pos['v0']['x']+12}:y={pos['v0']['y']+12}:w=1024:h=586:c=black@0.2:t=fill"
-        )
-        shadow_cmds.append(
-            f"drawbox=x={pos['v1']['x']+12}:y={pos['v1']['y']+12}:w=824:h=474:c=black@0.2:t=fill"
-        )
-        for k in ["v2", "v3", "v4", "v5"]:
-            shadow_cmds.append(
-                f"drawbox=x={pos[k]['x']+10}:y={pos[k]['y']+10}:w=436:h=252:c=black@0.25:t=fill"
-            )
-        
-        shadow_str = ",".join(shadow_cmds) + ",gblur=sigma=25"
-        filters.append(f"[bg_blur]{shadow_str}[bg_shadow]")
-
-        current = "bg_shadow"
-        for i, k in enumerate(["v2", "v3", "v4", "v5"]):
-            nxt = f"l_s_{i}"
-            src_label = f"{k}_raw"
-            filters.append(f"[{current}][{src_label}]overlay=x={pos[k]['x']}:y={pos[k]['y']}[{nxt}]")
-            current = nxt
-            
-        filters.append(f"[{current}][v0_raw]overlay=x={pos['v0']['x']}:y={pos['v0']['y']}[l_main]")
-        filters.append(f"[l_main][v1_raw]overlay=x={pos['v1']['x']}:y={pos['v1']['y']}[l_final_img]")
-        filters.append(
-            f"[l_final_img]drawbox=x=0:y=0:w=1920:h=260:color={theme_color}:t=fill[banner]"
-        )
-        
-        # 解析日期
-        if issue_date:
-            try:
-                date_obj = datetime.strptime(issue_date, "%Y%m%d")
-                month = date_obj.strftime("%m")
-                day = date_obj.strftime("%d")
-            except:
-                month, day = "12", "09"
-        else:
-            month, day = "12", "09"
-
-        # 分割线
-        filters.append(
-            f"[banner]drawbox=x=770:y=50:w=6:h=180:color=white@0.7:t=fill[deco]"
-        )
-
-        # 日期
-        draw_month = (
-            f"drawtext=fontfile='{font_path}':text='{month}/':"
-            f"fontsize=140:fontcolor=white:"
-            f"x=240:y=85:shadowx=4:shadowy=4:shadowcolor=black@0.3"
-        )
-        draw_day = (
-            f"drawtext=fontfile='{font_path}':text='{day}':"
-            f"fontsize=240:fontcolor=white:"
-            f"x=460:y=60:shadowx=6:shadowy=6:shadowcolor=black@0.3"
-        )
-        
-        # 标题
-        draw_title_main = (
-            f"drawtext=fontfile='{font_path}':text='日刊虚拟歌手':"
-            f"fontsize=80:fontcolor=white@0.95:"
-            f"x=800:y=50:shadowx=3:shadowy=3:shadowcolor=black@0.3"
-        )
-        draw_title_sub = (
-            f"drawtext=fontfile='{font_path}':text='外语排行榜':"
-            f"fontsize=100:fontcolor=white:"
-            f"x=800:y=135:shadowx=4:shadowy=4:shadowcolor=black@0.3"
-        )
-        
-        # 期数
-        issue_text = f"VOL.{issue_index}" if issue_index > 0 else ""
-        draw_issue = (
-            f"drawtext=fontfile='{font_path}':text='{issue_text}':"
-            f"fontsize=110:fontcolor=white@0.25:"
-            f"x=1920-tw-140:y=(260-th)/2" 
-        )
-        
-        filters.append(f"[deco]{draw_month}[t1]")
-        filters.append(f"[t1]{draw_day}[t2]")
-        filters.append(f"[t2]{draw_title_main}[t3]")
-        filters.append(f"[t3]{draw_title_sub}[t4]")
-        filters.append(f"[t4]{draw_issue}[vout]")
-
-        cmd += [
-            "-filter_complex", ";".join(filters),
-            "-map", "[vout]",
-            "-frames:v", "1",
-            "-q:v", "2",
-            str(output_path),
-            "-loglevel", "error",
-        ]
-
         try:
-            subprocess.run(cmd, check=True)
+            self._save_cover(self.render_grid_cover(urls, issue_date, issue_index), output_path)
             logger.info(f"封面图片已保存: {output_path}")
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             logger.error(f"封面图片生成失败: {e}")
 
     def generate_vertical_cover(
@@ -397,202 +308,132 @@ class Cover:
         if not urls:
             logger.warning("3:4 封面生成失败：没有可用的封面 URL")
             return
-        
-        border_color = self._get_theme_color(issue_date)
-        valid_urls = urls[:6]
-        count = len(valid_urls)
-        
-        # 确保有6张图
-        while len(valid_urls) < 6:
-            valid_urls.append(valid_urls[0])
-
-        cmd = [self.ffmpeg_bin, "-y"]
-        for u in valid_urls:
-            cmd += ["-i", u]
-
-        W, H = 1920, 2560
-        font_path = ffmpeg_escape_path(self.font_bold_file)
-
-        bg_filter = (
-            f"[0:v]scale={W}:{H}:force_original_aspect_ratio=increase,"
-            f"crop={W}:{H},setsar=1,"
-            f"boxblur=40:5,eq=brightness=-0.1:saturation=1.3[bg]"
-        )
-        filters = [bg_filter]
-        
-        hero_w = 1600
-        hero_h = int(hero_w * 9 / 16)
-        hero_pad = 20
-        small_w = 1000
-        small_h = int(small_w * 9 / 16)
-        small_pad = 15
-        
-        processed_labels = []
-        for i in range(count):
-            is_hero = (i == 0)
-            tw = hero_w if is_hero else small_w
-            th = hero_h if is_hero else small_h
-            pad = hero_pad if is_hero else small_pad
-            pw, ph = tw + 2 * pad, th + 2 * pad
-            lbl = f"img{i}"
-            processed_labels.append(lbl)
-            filters.append(
-                f"[{i}:v]scale={tw}:{th}:force_original_aspect_ratio=decrease,"
-                f"pad={pw}:{ph}:{pad}:{pad}:white[{lbl}]"
-            )
-        
-        hero_y = "(H-h)/2 + 250"
-        hero_x = "(W-w)/2"
-        top_row_y = 600
-        btm_row_y = "H-h-100"
-        
-        small_positions = [
-            {"x": "-100", "y": top_row_y},         # i=1 Top Left
-            {"x": "W-w+100", "y": top_row_y},      # i=2 Top Right
-            {"x": "-150", "y": btm_row_y},         # i=3 Bottom Left
-            {"x": "(W-w)/2", "y": btm_row_y},      # i=4 Bottom Center
-            {"x": "W-w+150", "y": btm_row_y},      # i=5 Bottom Right
-        ]
-        
-        current_bg = "bg"
-        for i in range(1, count):
-            lbl = processed_labels[i]
-            pos_idx = i - 1
-            if pos_idx >= len(small_positions): pos_idx = 0
-            
-            pos = small_positions[pos_idx]
-            next_bg = f"tmp_bg_{i}"
-            filters.append(f"[{current_bg}][{lbl}]overlay=x={pos['x']}:y={pos['y']}[{next_bg}]")
-            current_bg = next_bg
-            
-        hero_lbl = processed_labels[0]
-        filters.append(
-            f"[{hero_lbl}]split[h_src][h_sh_raw];"
-            f"[h_sh_raw]drawbox=c=black:t=fill,format=rgba,gblur=sigma=40,colorchannelmixer=aa=0.45[hero_shadow]"
-        )
-        filters.append(f"[{current_bg}][hero_shadow]overlay=x={hero_x}+30:y={hero_y}+40[bg_w_shadow]")
-        filters.append(f"[bg_w_shadow][h_src]overlay=x={hero_x}:y={hero_y}[combined_img]")
-        
-        text1 = "日刊虚拟歌手"
-        text2 = "外语排行榜"
-        fill_color = "white@0.95"
-        border_w = 22
-        font_size_1 = 260
-        font_size_2 = 220
-        title_base_y = 220
-
-        font_obj = ImageFont.truetype(self.font_bold_file, font_size_1)
-        w1 = font_obj.getlength(text1)
-        right_anchor_x = (W / 2) + (w1 / 2)
-        
-        draw_t1 = (
-            f"drawtext=fontfile='{font_path}':text='{text1}':fontsize={font_size_1}:"
-            f"fontcolor={fill_color}:borderw={border_w}:bordercolor={border_color}:"
-            f"x={right_anchor_x}-tw:y={title_base_y}:shadowx=8:shadowy=8:shadowcolor=black@0.4"
-        )
-        gap = 40
-        draw_t2 = (
-            f"drawtext=fontfile='{font_path}':text='{text2}':fontsize={font_size_2}:"
-            f"fontcolor={fill_color}:borderw={border_w}:bordercolor={border_color}:"
-            f"x={right_anchor_x}-tw:y={title_base_y + font_size_1 + gap}:"
-            f"shadowx=5:shadowy=5:shadowcolor=black@0.4"
-        )
-
-        filters.append(f"[combined_img]{draw_t1}[txt1]")
-        filters.append(f"[txt1]{draw_t2}[txt2]")
-
-        if issue_date:
-            try:
-                date_obj = datetime.strptime(issue_date, "%Y%m%d")
-                month = date_obj.strftime("%m")
-                day = date_obj.strftime("%d")
-            except:
-                month = issue_date[-4:-2]
-                day = issue_date[-2:]
-            
-            month_font_size = 300
-            day_font_size = int(month_font_size * 2)  
-            
-            date_base_y = 1700
-            
-            draw_month = (
-                f"drawtext=fontfile='{font_path}':text='{month}':"
-                f"fontsize={month_font_size}:fontcolor={fill_color}:"
-                f"borderw=24:bordercolor={border_color}:"
-                f"x=(w/2)-500:y={date_base_y}:"
-                f"shadowx=8:shadowy=8:shadowcolor=black@0.6"
-            )
-            
-            draw_slash = (
-                f"drawtext=fontfile='{font_path}':text='/':"
-                f"fontsize={month_font_size}:fontcolor={fill_color}:"
-                f"borderw=24:bordercolor={border_color}:"
-                f"x=(w/2)-80:y={date_base_y}:"
-                f"shadowx=6:shadowy=6:shadowcolor=black@0.5"
-            )
-            
-            day_offset_y = (day_font_size - month_font_size) / 2
-            draw_day = (
-                f"drawtext=fontfile='{font_path}':text='{day}':"
-                f"fontsize={day_font_size}:fontcolor={fill_color}:"
-                f"borderw=32:bordercolor={border_color}:"
-                f"x=(w/2)+80:y={date_base_y - day_offset_y}:"
-                f"shadowx=10:shadowy=10:shadowcolor=black@0.6"
-            )
-            
-            filters.append(f"[txt2]{draw_month}[txt3]")
-            filters.append(f"[txt3]{draw_slash}[txt4]")
-            filters.append(f"[txt4]{draw_day}[vout]")
-        else:
-            filters.append("[txt2]copy[vout]")
-
-        cmd += [
-            "-filter_complex", ";".join(filters),
-            "-map", "[vout]",
-            "-frames:v", "1",
-            "-q:v", "2",
-            str(output_path),
-            "-loglevel", "error",
-        ]
-
         try:
-            subprocess.run(cmd, check=True)
+            self._save_cover(self.render_vertical_cover(urls, issue_date), output_path)
             logger.info(f"3:4 封面图片已保存: {output_path}")
-        except subprocess.CalledProcessError as e:
+        except Exception as e:
             logger.error(f"3:4 封面图片生成失败: {e}")
 
-    def _get_pil_image(self, url: str, bvid: str) -> Image.Image:
-        cover_cache = self.videos_root / bvid / "cover.jpg"
+    def _cover_cache_path(self, bvid: str) -> Path:
+        return self.videos_root / bvid / "cover.jpg"
+
+    def _fetch_cover(self, url: str, bvid: str) -> Optional[Image.Image]:
+        """通过共享会话下载封面并写入缓存，失败时返回None。"""
+        if not (url and url.startswith("http")):
+            return None
+        try:
+            response = self.session.get(url, timeout=5)
+            if response.status_code != 200:
+                return None
+            img = Image.open(BytesIO(response.content)).convert("RGBA")
+            cover_cache = self._cover_cache_path(bvid)
+            cover_cache.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cover_cache.with_name(f"cover.{threading.get_ident()}.tmp.jpg")
+            img.convert("RGB").save(tmp)
+            os.replace(tmp, cover_cache)
+            if self.media_cache:
+                self.media_cache.record(bvid)
+            return img
+        except Exception:
+            return None
+
+    def _placeholder_cover(self) -> Path:
+        path = self.videos_root / "_cover_placeholder.jpg"
+        if not path.exists():
+            tmp = path.with_name(f"_cover_placeholder.{threading.get_ident()}.tmp.jpg")
+            Image.new("RGB", (640, 360), (200, 200, 200)).save(tmp)
+            os.replace(tmp, path)
+        return path
+
+    def _local_cover_file(self, url: str) -> Path:
+        """把封面 URL 解析为本地缓存文件；缓存缺失时下载一次，无法获取时使用灰色占位图。"""
+        bvid = self._url_bvids.get(url)
+        if bvid:
+            cover_cache = self._cover_cache_path(bvid)
+            if cover_cache.exists() or self._fetch_cover(url, bvid) is not None:
+                return cover_cache
+        logger.warning(f"封面不可用，使用占位图: {url or '(空)'}")
+        return self._placeholder_cover()
+
+    def prefetch_covers(self, rows: List[pd.Series], max_workers: int = HTTP_POOL_SIZE) -> int:
+        """并发下载尚未缓存的封面。
+
+        Returns:
+            int: 本次下载成功的封面数。
+        """
+        pending = {}
+        for r in rows:
+            bvid = str(r.get("bvid", ""))
+            if bvid and bvid not in pending and not self._cover_cache_path(bvid).exists():
+                pending[bvid] = str(r.get("image_url", "")).strip()
+        if not pending:
+            return 0
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(lambda kv: self._fetch_cover(kv[1], kv[0]), pending.items()))
+        fetched = sum(1 for img in results if img is not None)
+        logger.info(f"封面预取: {fetched}/{len(pending)}")
+        return fetched
+
+    def _get_pil_image(self, url: str, bvid: str) -> Tuple[Image.Image, bool]:
+        """读取封面，返回 (图像, 是否为灰色占位图)。"""
+        cover_cache = self._cover_cache_path(bvid)
         if cover_cache.exists():
-            try: return Image.open(cover_cache).convert("RGBA")
+            try: return Image.open(cover_cache).convert("RGBA"), False
             except: pass
 
-        if url and url.startswith("http"):
-            try:
-                response = requests.get(url, timeout=5)
-                if response.status_code == 200:
-                    img = Image.open(BytesIO(response.content)).convert("RGBA")
-                    if not cover_cache.parent.exists():
-                        cover_cache.parent.mkdir(parents=True)
-                    img.convert("RGB").save(cover_cache)
-                    return img
-            except: pass
-        return Image.new("RGBA", (300, 200), (200, 200, 200, 255))
+        img = self._fetch_cover(url, bvid)
+        if img is not None:
+            return img, False
+        return Image.new("RGBA", (300, 200), (200, 200, 200, 255)), True
 
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
-        lines = []
-        curr = ""
-        if not text: return lines
-        for char in text:
-            if font.getbbox(curr + char)[2] <= max_width:
-                curr += char
-            else:
-                lines.append(curr)
-                curr = char
-        if curr: lines.append(curr)
-        return lines
+        if not text: return []
+        return wrap_text(text, font, max_width, measure=lambda s: font.getbbox(s)[2])
+
+    def _card_cache_path(self, row: pd.Series) -> Path:
+        bvid = str(row.get("bvid", ""))
+        milestone = int(row.get("10w_crossed", 0))
+        # 卡片上绘制的文字与封面地址变化（如批量替换标题）时缓存失效
+        drawn = "\x1f".join(str(row.get(k, "")) for k in ("title", "author", "pubdate", "image_url"))
+        digest = hashlib.sha1(drawn.encode("utf-8")).hexdigest()[:12]
+        key = f"v{CARD_LAYOUT_VERSION}_{milestone}_{self.card_w}x{self.card_h}r{self.card_radius}_{digest}"
+        return self.videos_root / bvid / "cards" / f"{key}.png"
+
+    def get_card(self, row: pd.Series) -> Image.Image:
+        """获取成就卡片，按 (bvid, 里程碑, 版式版本, 尺寸, 绘制内容) 缓存渲染结果；封面使用占位图时不写缓存。"""
+        bvid = str(row.get("bvid", ""))
+        cache_path = self._card_cache_path(row) if bvid else None
+        if cache_path is not None and cache_path.exists():
+            try:
+                with Image.open(cache_path) as cached:
+                    return cached.convert("RGBA")
+            except Exception:
+                pass
+
+        card, placeholder = self._render_card(row)
+        if cache_path is not None and not placeholder:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = cache_path.with_name(f"{cache_path.stem}.{threading.get_ident()}.tmp.png")
+                card.save(tmp)
+                os.replace(tmp, cache_path)
+                if self.media_cache:
+                    self.media_cache.record(bvid)
+            except Exception as e:
+                logger.warning(f"保存卡片缓存失败 {cache_path}: {e}")
+        return card
+
+    def render_cards(self, rows: List[pd.Series], max_workers: int = 8) -> List[Image.Image]:
+        """先并发预取封面，再在线程池中渲染（或读取缓存）全部卡片，保持输入顺序。"""
+        self.prefetch_covers(rows)
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            return list(ex.map(self.get_card, rows))
 
     def create_card(self, row: pd.Series) -> Image.Image:
+        return self._render_card(row)[0]
+
+    def _render_card(self, row: pd.Series) -> Tuple[Image.Image, bool]:
+        """绘制成就卡片，返回 (卡片, 封面是否为占位图)。"""
         title = str(row.get("title", ""))
         bvid = str(row.get("bvid", ""))
         author = str(row.get("author", ""))
@@ -611,7 +452,7 @@ class Cover:
         cover_h = self.card_h - 2 * margin
         cover_w = int(cover_h * (16 / 9))
 
-        cover_img = self._get_pil_image(image_url, bvid)
+        cover_img, placeholder = self._get_pil_image(image_url, bvid)
         cover_img = cover_img.resize((cover_w, cover_h), Image.Resampling.LANCZOS)
 
         mask = Image.new("L", (cover_w, cover_h), 0)
@@ -622,10 +463,10 @@ class Cover:
         text_y = margin + 5
         text_width = self.card_w - text_x - margin
 
-        f_title = ImageFont.truetype(self.font_bold_file, 34)
-        f_info = ImageFont.truetype(self.font_file, 22)
-        f_author = ImageFont.truetype(self.font_bold_file, 28)
-        f_achieve = ImageFont.truetype(self.font_bold_file, 54)
+        f_title = get_font(self.font_bold_file, 34)
+        f_info = get_font(self.font_file, 22)
+        f_author = get_font(self.font_bold_file, 28)
+        f_achieve = get_font(self.font_bold_file, 54)
 
         lines = self._wrap_text(title, f_title, text_width)
         for line in lines[:2]:
@@ -641,51 +482,74 @@ class Cover:
         draw.text((text_x + 2, achieve_y + 2), achievement_text, font=f_achieve, fill="#CCAC00")
         draw.text((text_x, achieve_y), achievement_text, font=f_achieve, fill="#FFD700")
 
-        return img
+        return img, placeholder
 
-    def create_header(self, width: int, height: int, opacity: float, ed_info: Optional[Dict] = None, list_top_y: Optional[int] = None) -> Image.Image:
-        img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        
-        alpha = int(255 * opacity)
-        if alpha <= 0: return img
+    def create_header_layers(self, width: int, height: int, ed_info: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        预渲染成就视频标题区域的静态图层（不透明度为1），供逐帧合成时复用。
 
-        title_font = ImageFont.truetype(self.font_bold_file, 80)
+        Returns:
+            Dict[str, Any]: 
+                title: (标题图层, (x, y))；
+                ed: (ED信息图层, x)，无ED信息时为None；
+                ed_region_top: ED信息区域的上边界，ED图层的纵坐标由 header_ed_y 根据榜单位置计算。
+        """
+        title_font = get_font(self.font_bold_file, 80)
         title = "今日成就达成"
         bbox = title_font.getbbox(title)
         tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
         tx, ty = (width - tw) // 2, 150
 
-        draw.text((tx + 3, ty + 3), title, font=title_font, fill=(255, 255, 255, alpha))
-        draw.text((tx, ty), title, font=title_font, fill=(0, 139, 139, alpha))
+        title_img = Image.new("RGBA", (bbox[2] + 3, bbox[3] + 3), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(title_img)
+        draw.text((3, 3), title, font=title_font, fill=(255, 255, 255, 255))
+        draw.text((0, 0), title, font=title_font, fill=(0, 139, 139, 255))
+
+        layers: Dict[str, Any] = {"title": (title_img, (tx, ty)), "ed": None, "ed_region_top": ty + th + 25}
 
         if ed_info and (ed_info.get("name") or ed_info.get("bvid")):
             line1 = f"ED：{ed_info.get('name', '')}"
             if ed_info.get("author"): line1 += f" / {ed_info['author']}"
             line2 = ed_info.get("bvid", "")
 
-            ed_font = ImageFont.truetype(self.font_file, 32)
-            
-            region_top = ty + th + 25
-            region_bottom = list_top_y if list_top_y is not None else int(height * 0.5)
-            region_bottom = max(0, min(height, region_bottom))
-            
-            block_h = 80
-            if region_bottom - region_top >= block_h + 10:
-                ed_y = region_top + (region_bottom - region_top - block_h) // 2
-            else:
-                ed_y = region_top
-
+            ed_font = get_font(self.font_file, 32)
             l1_box = ed_font.getbbox(line1)
             l2_box = ed_font.getbbox(line2)
             w_blk = max(l1_box[2], l2_box[2])
-            ed_x = width - 80 - w_blk
 
-            draw.text((ed_x + 2, ed_y + 2), line1, font=ed_font, fill=(255, 255, 255, alpha))
-            draw.text((ed_x, ed_y), line1, font=ed_font, fill=(0, 0, 0, alpha))
-            
-            y2 = ed_y + 40
-            draw.text((ed_x + 2, y2 + 2), line2, font=ed_font, fill=(255, 255, 255, alpha))
-            draw.text((ed_x, y2), line2, font=ed_font, fill=(0, 0, 0, alpha))
+            ed_img = Image.new("RGBA", (w_blk + 2, max(l1_box[3], 40 + l2_box[3]) + 2), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(ed_img)
+            for y, line in ((0, line1), (40, line2)):
+                draw.text((2, y + 2), line, font=ed_font, fill=(255, 255, 255, 255))
+                draw.text((0, y), line, font=ed_font, fill=(0, 0, 0, 255))
+            layers["ed"] = (ed_img, width - 80 - w_blk)
+
+        return layers
+
+    @staticmethod
+    def header_ed_y(region_top: int, height: int, list_top_y: Optional[int] = None) -> int:
+        """ED信息位于标题与榜单顶部之间的区域中部，空间不足时紧贴标题。"""
+        block_h = 80
+        region_bottom = list_top_y if list_top_y is not None else int(height * 0.5)
+        region_bottom = max(0, min(height, region_bottom))
+        if region_bottom - region_top >= block_h + 10:
+            return region_top + (region_bottom - region_top - block_h) // 2
+        return region_top
+
+    def create_header(self, width: int, height: int, opacity: float, ed_info: Optional[Dict] = None, list_top_y: Optional[int] = None) -> Image.Image:
+        img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        
+        alpha = int(255 * opacity)
+        if alpha <= 0: return img
+
+        layers = self.create_header_layers(width, height, ed_info)
+        title_img, title_pos = layers["title"]
+        img.alpha_composite(title_img, title_pos)
+        if layers["ed"] is not None:
+            ed_img, ed_x = layers["ed"]
+            img.alpha_composite(ed_img, (ed_x, self.header_ed_y(layers["ed_region_top"], height, list_top_y)))
 
+        if alpha < 255:
+            a = img.getchannel("A").point(lambda v: v * alpha // 255)
+            img.putalpha(a)
         return img
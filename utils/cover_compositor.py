@@ -0,0 +1,246 @@
+# utils/cover_compositor.py
+# 封面合成模块：在进程内用 PIL/NumPy 合成横版（16:9）与竖版（3:4）封面，替代单帧 ffmpeg 滤镜图。
+import math
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
+from utils.font_cache import get_font
+
+RGBA = Tuple[int, int, int, int]
+
+def rgba(spec: str) -> RGBA:
+    """解析 ffmpeg 风格的颜色，例如 "white@0.95"、"#8C4E70"。"""
+    color, _, alpha = spec.partition("@")
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return r, g, b, int(round(float(alpha) * 255)) if alpha else 255
+
+def _box_sizes(sigma: float, n: int = 3) -> List[int]:
+    """用 n 次盒式模糊近似高斯模糊时各次的盒宽（奇数）。"""
+    ideal = math.sqrt(12 * sigma * sigma / n + 1)
+    wl = int(ideal)
+    if wl % 2 == 0:
+        wl -= 1
+    wl = max(wl, 1)
+    wu = wl + 2
+    m = round((12 * sigma * sigma - n * wl * wl - 4 * n * wl - 3 * n) / (-4 * wl - 4))
+    return [wl if i < m else wu for i in range(n)]
+
+def fast_gaussian_blur(img: Image.Image, sigma: float) -> Image.Image:
+    """快速高斯模糊近似：先按 sigma 缩小图像，在小图上做三次盒式模糊，再放大回原尺寸。"""
+    if sigma <= 0:
+        return img.copy()
+    factor = min(8, max(1, int(sigma / 3)))
+    small = img.reduce(factor) if factor > 1 else img
+    for size in _box_sizes(sigma / factor):
+        if size > 1:
+            small = small.filter(ImageFilter.BoxBlur((size - 1) / 2))
+    return small.resize(img.size, Image.Resampling.BILINEAR) if factor > 1 else small
+
+def fast_box_blur(img: Image.Image, radius: int, passes: int) -> Image.Image:
+    """等效于 ffmpeg boxblur=radius:passes，按相同方差换算为高斯模糊近似。"""
+    sigma = math.sqrt(passes * ((2 * radius + 1) ** 2 - 1) / 12)
+    return fast_gaussian_blur(img, sigma)
+
+def adjust(img: Image.Image, brightness: float = 0.0, saturation: float = 1.0) -> Image.Image:
+    """等效于 ffmpeg eq=brightness:saturation（亮度为 [-1, 1] 的加性偏移）。"""
+    arr = np.asarray(img.convert("RGB"), dtype=np.float32)
+    if saturation != 1.0:
+        gray = arr @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        arr = gray[..., None] + (arr - gray[..., None]) * saturation
+    if brightness:
+        arr += brightness * 255
+    out = Image.fromarray(np.clip(arr + 0.5, 0, 255).astype(np.uint8), "RGB")
+    return out.convert("RGBA") if img.mode == "RGBA" else out
+
+def fill(img: Image.Image, w: int, h: int) -> Image.Image:
+    """等比放大至覆盖 w×h 后居中裁剪（scale=increase + crop）。"""
+    scale = max(w / img.width, h / img.height)
+    sw, sh = max(w, round(img.width * scale)), max(h, round(img.height * scale))
+    resized = img.resize((sw, sh), Image.Resampling.BICUBIC)
+    left, top = (sw - w) // 2, (sh - h) // 2
+    return resized.crop((left, top, left + w, top + h))
+
+def fit(img: Image.Image, w: int, h: int) -> Image.Image:
+    """等比缩小至不超过 w×h（scale=decrease）。"""
+    scale = min(w / img.width, h / img.height)
+    return img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.Resampling.BICUBIC)
+
+def framed(img: Image.Image, w: int, h: int, pad: int, cover: bool = True) -> Image.Image:
+    """缩放到 w×h 并加白色边框（pad 位于左上，画布为 (w+2pad)×(h+2pad)）。"""
+    inner = fill(img, w, h) if cover else fit(img, w, h)
+    out = Image.new("RGBA", (w + 2 * pad, h + 2 * pad), (255, 255, 255, 255))
+    out.paste(inner.convert("RGBA"), (pad, pad))
+    return out
+
+def paste(canvas: Image.Image, layer: Image.Image, x: float, y: float) -> None:
+    """带透明度叠加，允许图层部分超出画布。"""
+    x, y = int(x), int(y)
+    left, top = max(0, -x), max(0, -y)
+    right = min(layer.width, canvas.width - x)
+    bottom = min(layer.height, canvas.height - y)
+    if left >= right or top >= bottom:
+        return
+    part = layer.convert("RGBA").crop((left, top, right, bottom))
+    canvas.alpha_composite(part, (x + left, y + top))
+
+def fill_rect(canvas: Image.Image, box: Sequence[float], color: RGBA) -> None:
+    x, y, w, h = (int(v) for v in box)
+    paste(canvas, Image.new("RGBA", (w, h), color), x, y)
+
+def draw_text(
+    canvas: Image.Image,
+    xy: Tuple[float, float],
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    color: RGBA,
+    stroke_width: int = 0,
+    stroke_color: Optional[RGBA] = None,
+    shadow: Optional[Tuple[int, int, RGBA]] = None,
+) -> None:
+    """绘制文字（与 drawtext 一致，y 为上升线位置），可带描边与投影。只在文字包围框内合成。"""
+    if not text:
+        return
+    l, t, r, b = font.getbbox(text, anchor="la", stroke_width=stroke_width)
+    l, t, r, b = math.floor(l), math.floor(t), math.ceil(r), math.ceil(b)
+    pad = 2
+
+    def stamp(dx: int, dy: int, fill_color: RGBA, stroke: Optional[RGBA]) -> None:
+        layer = Image.new("RGBA", (r - l + 2 * pad, b - t + 2 * pad), (0, 0, 0, 0))
+        ImageDraw.Draw(layer).text(
+            (pad - l, pad - t), text, font=font, fill=fill_color, anchor="la",
+            stroke_width=stroke_width, stroke_fill=stroke,
+        )
+        paste(canvas, layer, xy[0] + dx + l - pad, xy[1] + dy + t - pad)
+
+    if shadow is not None:
+        dx, dy, shadow_color = shadow
+        stamp(dx, dy, shadow_color, shadow_color if stroke_width else None)
+    stamp(0, 0, color, stroke_color)
+
+def _month_day(issue_date: str, default: Tuple[str, str]) -> Tuple[str, str]:
+    try:
+        d = datetime.strptime(issue_date, "%Y%m%d")
+        return d.strftime("%m"), d.strftime("%d")
+    except (TypeError, ValueError):
+        return default
+
+def render_grid_cover(
+    images: List[Image.Image],
+    font_path: str,
+    theme_color: str,
+    issue_date: str = "",
+    issue_index: int = 0,
+) -> Image.Image:
+    """合成 16:9 封面（1920×1080）。images: [左侧大图, 右侧大图, 上方小图×4]，不足6张时重复最后一张。"""
+    W, H = 1920, 1080
+    imgs = list(images[:6])
+    while len(imgs) < 6:
+        imgs.append(imgs[-1])
+
+    pos = {
+        2: (68, 290), 3: (524, 290), 4: (980, 290), 5: (1436, 290),
+        0: (80, 460), 1: (1016, 570),
+    }
+
+    # 背景：第一张图模糊、提亮饱和度并蒙一层白
+    canvas = fast_gaussian_blur(fill(imgs[0].convert("RGB"), W, H), 30)
+    canvas = adjust(canvas, brightness=-0.05, saturation=1.4).convert("RGBA")
+    fill_rect(canvas, (0, 0, W, H), (255, 255, 255, 26))
+
+    # 投影：画在背景上后整体再模糊一次
+    fill_rect(canvas, (pos[0][0] + 12, pos[0][1] + 12, 1024, 586), (0, 0, 0, 51))
+    fill_rect(canvas, (pos[1][0] + 12, pos[1][1] + 12, 824, 474), (0, 0, 0, 51))
+    for i in range(2, 6):
+        fill_rect(canvas, (pos[i][0] + 10, pos[i][1] + 10, 436, 252), (0, 0, 0, 64))
+    canvas = fast_gaussian_blur(canvas, 25)
+
+    for i in range(2, 6):
+        paste(canvas, framed(imgs[i], 420, 236, 8), *pos[i])
+    paste(canvas, framed(imgs[0], 1000, 562, 12), *pos[0])
+    paste(canvas, framed(imgs[1], 800, 450, 12), *pos[1])
+
+    # 顶部横幅
+    fill_rect(canvas, (0, 0, W, 260), rgba(theme_color))
+    fill_rect(canvas, (770, 50, 6, 180), rgba("white@0.7"))
+
+    month, day = _month_day(issue_date, ("12", "09"))
+    shadow = rgba("black@0.3")
+    draw_text(canvas, (240, 85), f"{month}/", get_font(font_path, 140), rgba("white"), shadow=(4, 4, shadow))
+    draw_text(canvas, (460, 60), day, get_font(font_path, 240), rgba("white"), shadow=(6, 6, shadow))
+    draw_text(canvas, (800, 50), "日刊虚拟歌手", get_font(font_path, 80), rgba("white@0.95"), shadow=(3, 3, shadow))
+    draw_text(canvas, (800, 135), "外语排行榜", get_font(font_path, 100), rgba("white"), shadow=(4, 4, shadow))
+
+    if issue_index > 0:
+        issue_text = f"VOL.{issue_index}"
+        font = get_font(font_path, 110)
+        _, t, _, b = font.getbbox(issue_text, anchor="la")
+        draw_text(canvas, (W - font.getlength(issue_text) - 140, (260 - (b - t)) / 2), issue_text, font, rgba("white@0.25"))
+
+    return canvas.convert("RGB")
+
+def render_vertical_cover(
+    images: List[Image.Image],
+    font_path: str,
+    border_color: str,
+    issue_date: str = "",
+) -> Image.Image:
+    """合成 3:4 封面（1920×2560）。images: [中央主图, 左上, 右上, 下排×3]，最多6张。"""
+    W, H = 1920, 2560
+    imgs = list(images[:6])
+    count = len(imgs)
+
+    canvas = fast_box_blur(fill(imgs[0].convert("RGB"), W, H), 40, 5)
+    canvas = adjust(canvas, brightness=-0.1, saturation=1.3).convert("RGBA")
+
+    hero_w, hero_pad = 1600, 20
+    hero_h = int(hero_w * 9 / 16)
+    small_w, small_pad = 1000, 15
+    small_h = int(small_w * 9 / 16)
+    tiles = [
+        framed(img, hero_w, hero_h, hero_pad, cover=False) if i == 0 else framed(img, small_w, small_h, small_pad, cover=False)
+        for i, img in enumerate(imgs)
+    ]
+
+    top_row_y = 600
+    for i in range(1, count):
+        w, h = tiles[i].size
+        small_positions = [
+            (-100, top_row_y),          # 左上
+            (W - w + 100, top_row_y),   # 右上
+            (-150, H - h - 100),        # 左下
+            ((W - w) / 2, H - h - 100), # 中下
+            (W - w + 150, H - h - 100), # 右下
+        ]
+        paste(canvas, tiles[i], *small_positions[i - 1])
+
+    hero = tiles[0]
+    hero_x, hero_y = (W - hero.width) / 2, (H - hero.height) / 2 + 250
+    paste(canvas, Image.new("RGBA", hero.size, (0, 0, 0, 115)), hero_x + 30, hero_y + 40)
+    paste(canvas, hero, hero_x, hero_y)
+
+    fill_color = rgba("white@0.95")
+    stroke = rgba(border_color)
+    text1, text2 = "日刊虚拟歌手", "外语排行榜"
+    font1, font2 = get_font(font_path, 260), get_font(font_path, 220)
+    right_anchor_x = W / 2 + font1.getlength(text1) / 2
+    title_base_y = 220
+    draw_text(canvas, (right_anchor_x - font1.getlength(text1), title_base_y), text1, font1, fill_color,
+              stroke_width=22, stroke_color=stroke, shadow=(8, 8, rgba("black@0.4")))
+    draw_text(canvas, (right_anchor_x - font2.getlength(text2), title_base_y + 260 + 40), text2, font2, fill_color,
+              stroke_width=22, stroke_color=stroke, shadow=(5, 5, rgba("black@0.4")))
+
+    if issue_date:
+        month, day = _month_day(issue_date, (issue_date[-4:-2], issue_date[-2:]))
+        month_size = 300
+        day_size = month_size * 2
+        date_base_y = 1700
+        month_font, day_font = get_font(font_path, month_size), get_font(font_path, day_size)
+        draw_text(canvas, (W / 2 - 500, date_base_y), month, month_font, fill_color,
+                  stroke_width=24, stroke_color=stroke, shadow=(8, 8, rgba("black@0.6")))
+        draw_text(canvas, (W / 2 - 80, date_base_y), "/", month_font, fill_color,
+                  stroke_width=24, stroke_color=stroke, shadow=(6, 6, rgba("black@0.5")))
+        draw_text(canvas, (W / 2 + 80, date_base_y - (day_size - month_size) / 2), day, day_font, fill_color,
+                  stroke_width=32, stroke_color=stroke, shadow=(10, 10, rgba("black@0.6")))
+
+    return canvas.convert("RGB")
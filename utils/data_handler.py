@@ -1,11 +1,19 @@
 # utils/data_handler.py
 # 数据处理器模块：管理数据的读取、合并和保存操作
+import os
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Optional, List, Union, Sequence
+from concurrent.futures import ProcessPoolExecutor
 import json
 from utils.config_handler import ConfigHandler
 from utils.io_utils import save_to_excel
+from utils.excel_cache import ExcelCache, read_excel_cached
+from utils.logger import logger
+
+def _parse_excel(path: Path, usecols: Optional[List[str]]) -> pd.DataFrame:
+    """子进程中执行的解析函数，需位于模块顶层以便被pickle。"""
+    return pd.read_excel(path, usecols=usecols)
 
 class DataHandler:
     """
@@ -38,7 +46,7 @@ class DataHandler:
         """
         if path.exists():
             # 如果文件存在，则使用指定的列配置读取
-            return pd.read_excel(path, usecols=self.usecols.get(usecols_key))
+            return read_excel_cached(path, usecols=self.usecols.get(usecols_key))
         # 如果文件不存在，返回一个空的DataFrame以避免错误
         return pd.DataFrame()
 
@@ -86,4 +94,50 @@ class DataHandler:
         """
         path.parent.mkdir(parents=True, exist_ok=True)
         cols_to_use = self.usecols.get(usecols_key) if usecols_key else None
-        save_to_excel(df, path, usecols=cols_to_use)
\ No newline at end of file
+        save_to_excel(df, path, usecols=cols_to_use)
+
+    @staticmethod
+    def load_many(paths: Sequence[Union[str, Path]], usecols: Optional[List[str]] = None,
+                  max_workers: Optional[int] = None, use_cache: bool = True) -> List[Optional[pd.DataFrame]]:
+        """使用进程池并行读取多个Excel文件，按输入顺序返回结果。
+
+        解析结果会以 (文件内容, 读取列) 为键缓存到本地磁盘，
+        再次读取未修改的文件时直接命中缓存。
+
+        Args:
+            paths (Sequence[Union[str, Path]]): 待读取的文件路径列表。
+            usecols (List[str], optional): 需要读取的列，为None时读取全部列。
+            max_workers (int, optional): 进程池大小，默认为CPU核数。
+            use_cache (bool): 是否启用磁盘缓存。
+
+        Returns:
+            List[Optional[pd.DataFrame]]: 与paths一一对应的数据；文件不存在时为None，文件存在但没有数据时为空DataFrame。
+        """
+        paths = [Path(p) for p in paths]
+        cache = ExcelCache() if use_cache else None
+        results: List[Optional[pd.DataFrame]] = [None] * len(paths)
+        pending: List[int] = []
+
+        for i, path in enumerate(paths):
+            if not path.exists():
+                continue
+            cached = cache.get(path, usecols) if cache else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        if pending:
+            logger.info(f"并行解析 {len(pending)} 个文件（缓存命中 {len(paths) - len(pending)} 个）")
+            workers = min(len(pending), max_workers or os.cpu_count() or 1)
+            if workers <= 1:
+                parsed = [_parse_excel(paths[i], usecols) for i in pending]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    parsed = list(executor.map(_parse_excel, [paths[i] for i in pending], [usecols] * len(pending)))
+            for i, df in zip(pending, parsed):
+                results[i] = df
+                if cache:
+                    cache.put(paths[i], usecols, df)
+
+        return results
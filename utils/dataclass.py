@@ -40,6 +40,9 @@ class VideoInvalidException(Exception):
         super().__init__(message)
         self.message = message
 
+class SectionAlignmentError(Exception):
+    """区间视频下载成功但无法与完整音频对齐；重新下载同一区间结果相同，不应重试。"""
+
 @dataclass
 class SearchOptions:
     """B站搜索参数配置类"""
@@ -0,0 +1,147 @@
+# utils/excel_cache.py
+# Excel解析缓存模块：将解析后的DataFrame按文件内容缓存到本地磁盘，避免重复解析同一文件。
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+import pandas as pd
+from utils.logger import logger
+
+CACHE_DIR = Path("excel_cache")
+# 缓存目录的容量上限（字节），超出后按最近使用时间淘汰
+MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+class ExcelCache:
+    """
+    Excel解析结果的磁盘缓存（内容寻址）。
+    以 (文件内容哈希, 读取列, 列类型等读取参数) 为键，缓存命中时直接反序列化，无需再次解析。
+    缓存目录总大小超过上限时，按最近使用时间（LRU）淘汰最旧的缓存文件。
+    """
+    # 进程内的文件哈希备忘：(路径, 修改时间, 大小) -> 内容哈希，避免重复计算哈希
+    _hash_memo: Dict[Tuple[str, int, int], str] = {}
+    _memo_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        """
+        Args:
+            cache_dir (Path): 缓存文件所在目录。
+            max_bytes (int): 缓存目录的容量上限（字节）。
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def file_hash(cls, path: Path) -> str:
+        """计算文件内容哈希，文件未修改时直接复用进程内的计算结果。"""
+        stat = path.stat()
+        memo_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with cls._memo_lock:
+            cached = cls._hash_memo.get(memo_key)
+        if cached:
+            return cached
+
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with cls._memo_lock:
+            cls._hash_memo[memo_key] = digest
+        return digest
+
+    def _key(self, path: Path, usecols: Optional[List[str]], options: Optional[Dict[str, Any]]) -> str:
+        """根据文件内容、读取列和其他读取参数生成缓存键。"""
+        cols = ",".join(map(str, usecols)) if usecols else "*"
+        opts = repr(sorted((options or {}).items(), key=lambda kv: kv[0]))
+        raw = f"{self.file_hash(path)}|{cols}|{opts}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path: Path, usecols: Optional[List[str]] = None,
+            options: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """读取缓存，未命中或缓存损坏时返回None。命中时刷新其使用时间。"""
+        cache_file = self.cache_dir / f"{self._key(path, usecols, options)}.pkl"
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, "rb") as f:
+                df = pickle.load(f)
+            os.utime(cache_file)
+            logger.info(f"解析缓存命中: {path}")
+            return df
+        except Exception as e:
+            logger.warning(f"解析缓存损坏，将重新解析 {path}: {e}")
+            cache_file.unlink(missing_ok=True)
+            return None
+
+    def put(self, path: Path, usecols: Optional[List[str]], df: pd.DataFrame,
+            options: Optional[Dict[str, Any]] = None) -> None:
+        """写入缓存，先写临时文件再替换，避免并发读取到不完整的文件。"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self.cache_dir / f"{self._key(path, usecols, options)}.pkl"
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_file.replace(cache_file)
+        except Exception as e:
+            logger.warning(f"写入解析缓存失败 {path}: {e}")
+            tmp_file.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """缓存总大小超过上限时，按最近使用时间从旧到新删除缓存文件。"""
+        entries = []
+        total = 0
+        for f in self.cache_dir.glob("*.pkl"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort(key=lambda e: e[0])
+        for _, size, f in entries:
+            if total <= self.max_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+            logger.info(f"淘汰解析缓存: {f.name}")
+
+def read_excel_cached(path: Union[str, Path], usecols: Optional[List[str]] = None,
+                      dtype: Optional[Dict[str, Any]] = None, cache: Optional[ExcelCache] = None,
+                      **kwargs) -> pd.DataFrame:
+    """带解析缓存的 pd.read_excel，参数含义与 pd.read_excel 一致。
+
+    Args:
+        path (Union[str, Path]): Excel文件路径。
+        usecols (List[str], optional): 需要读取的列。
+        dtype (Dict[str, Any], optional): 列类型。
+        cache (ExcelCache, optional): 使用的缓存实例，默认使用全局缓存目录。
+        **kwargs: 其他传递给 pd.read_excel 的参数。
+
+    Returns:
+        pd.DataFrame: 读取的数据。
+
+    Raises:
+        FileNotFoundError: 文件不存在时抛出，与 pd.read_excel 行为一致。
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(2, "No such file or directory", str(path))
+
+    cache = cache or ExcelCache()
+    options = {"dtype": dtype, **kwargs} if dtype or kwargs else None
+    df = cache.get(path, usecols, options)
+    if df is not None:
+        return df
+
+    df = pd.read_excel(path, usecols=usecols, dtype=dtype, **kwargs)
+    cache.put(path, usecols, df, options)
+    return df
@@ -0,0 +1,100 @@
+# utils/excel_stream.py
+# Excel流式读取模块：按行流式读取工作表，支持列投影和提前终止，适用于只需要部分数据的场景。
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+def _to_frame(rows: List[tuple], columns: List[str], dtype: Optional[Dict[str, Any]]) -> pd.DataFrame:
+    """将一批行记录转换为DataFrame，空单元格统一为NaN，并按dtype转换列类型。"""
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df = df.where(df.notna(), np.nan)
+    for col, t in (dtype or {}).items():
+        if col not in df.columns:
+            continue
+        if t is str:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+        else:
+            df[col] = df[col].astype(t)
+    return df
+
+def iter_excel_batches(
+    path: Union[str, Path],
+    columns: Optional[List[str]] = None,
+    batch_size: int = 1000,
+    stop_when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    limit: Optional[int] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> Iterator[pd.DataFrame]:
+    """按批次流式读取Excel第一个工作表。
+
+    Args:
+        path (Union[str, Path]): Excel文件路径。
+        columns (List[str], optional): 需要读取的列（列投影），为None时读取全部列。
+        batch_size (int): 每批的行数。
+        stop_when (Callable, optional): 以行字典为参数的谓词，首次返回True时停止读取（该行不包含在结果中）。
+        limit (int, optional): 最多读取的行数。
+        dtype (Dict[str, Any], optional): 列类型，与 pd.read_excel 的 dtype 含义一致。
+
+    Yields:
+        pd.DataFrame: 每批数据。
+
+    Raises:
+        ValueError: 请求的列不存在于表头中。
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else "" for h in header]
+
+        if columns is None:
+            names = header
+            indices = list(range(len(header)))
+        else:
+            missing = [c for c in columns if c not in header]
+            if missing:
+                raise ValueError(f"{path} 中不存在列: {missing}")
+            names = list(columns)
+            indices = [header.index(c) for c in columns]
+
+        batch: List[tuple] = []
+        count = 0
+        for row in rows:
+            if limit is not None and count >= limit:
+                break
+            values = tuple(row[i] if i < len(row) else None for i in indices)
+            if all(v is None for v in values):
+                continue
+            if stop_when is not None and stop_when(dict(zip(names, values))):
+                break
+            batch.append(values)
+            count += 1
+            if len(batch) >= batch_size:
+                yield _to_frame(batch, names, dtype)
+                batch = []
+        if batch:
+            yield _to_frame(batch, names, dtype)
+    finally:
+        wb.close()
+
+def read_excel_stream(
+    path: Union[str, Path],
+    columns: Optional[List[str]] = None,
+    stop_when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    limit: Optional[int] = None,
+    dtype: Optional[Dict[str, Any]] = None,
+) -> pd.DataFrame:
+    """流式读取Excel并合并为一个DataFrame，参数含义同 iter_excel_batches。
+
+    Returns:
+        pd.DataFrame: 读取到的数据，无数据时为仅含列名的空DataFrame。
+    """
+    batches = list(iter_excel_batches(path, columns=columns, stop_when=stop_when, limit=limit, dtype=dtype))
+    if not batches:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,61 @@
+# utils/font_cache.py
+# 字体缓存与文本排版模块：按 (字体路径, 字号) 复用 FreeTypeFont 对象，并用二分查找按像素宽度折行。
+from functools import lru_cache
+from typing import Callable, List, Optional
+from PIL import ImageFont
+
+@lru_cache(maxsize=64)
+def get_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """加载字体，同一 (路径, 字号) 在进程内只加载一次。"""
+    return ImageFont.truetype(path, size)
+
+def _fit_prefix(text: str, start: int, max_width: float, measure: Callable[[str], float]) -> int:
+    """二分查找从 start 开始、宽度不超过 max_width 的最长前缀的结束位置（至少包含一个字符）。"""
+    lo, hi = start + 1, len(text)
+    if measure(text[start:hi]) <= max_width:
+        return hi
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if measure(text[start:mid]) <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def wrap_text(
+    text: str,
+    font: ImageFont.FreeTypeFont,
+    max_width: float,
+    max_lines: Optional[int] = None,
+    ellipsis: str = "...",
+    measure: Optional[Callable[[str], float]] = None,
+) -> List[str]:
+    """按像素宽度逐字折行。
+
+    每行通过二分查找确定断点，测量次数为 O(log n)，而不是逐字重新测量整行。
+
+    Args:
+        text (str): 待折行的文本。
+        font (ImageFont.FreeTypeFont): 字体。
+        max_width (float): 每行最大像素宽度。
+        max_lines (int, optional): 最大行数，超出时最后一行截断并追加省略号。
+        ellipsis (str): 截断时追加的省略号。
+        measure (Callable[[str], float], optional): 宽度测量函数，默认 font.getlength。
+
+    Returns:
+        List[str]: 折行后的各行文本。
+    """
+    measure = measure or font.getlength
+    lines: List[str] = []
+    pos = 0
+    while pos < len(text):
+        end = _fit_prefix(text, pos, max_width, measure)
+        if max_lines is not None and len(lines) >= max_lines - 1 and end < len(text):
+            line = text[pos:end]
+            while line and measure(line + ellipsis) > max_width:
+                line = line[:-1]
+            lines.append(line + ellipsis)
+            return lines
+        lines.append(text[pos:end])
+        pos = end
+    return lines
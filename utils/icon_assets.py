@@ -0,0 +1,73 @@
+# utils/icon_assets.py
+# 图标预处理模块：将原始图标一次性烘焙为“灰色图标 + 模糊阴影”的成品，按图标文件哈希缓存到磁盘。
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Tuple
+from PIL import Image, ImageFilter
+
+# 烘焙逻辑版本，修改着色或阴影参数时递增
+ICON_BAKE_VERSION = 1
+ICON_GRAY = 220
+SHADOW_ALPHA = 0.6
+SHADOW_BLUR = 1
+# 阴影模糊外扩的像素
+PAD = 4
+
+def _file_hash(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()[:16]
+
+def _bake(icon_path: Path, size: int, shadow_offset: int) -> Image.Image:
+    src = Image.open(icon_path).convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+    alpha = src.getchannel("A")
+    canvas_size = size + 2 * PAD + shadow_offset
+    out = Image.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 0))
+
+    shadow = Image.new("RGBA", (canvas_size, canvas_size), (0, 0, 0, 0))
+    shadow_src = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    shadow_src.putalpha(alpha.point(lambda v: int(v * SHADOW_ALPHA)))
+    shadow.paste(shadow_src, (PAD + shadow_offset, PAD + shadow_offset))
+    out.alpha_composite(shadow.filter(ImageFilter.GaussianBlur(SHADOW_BLUR)))
+
+    main = Image.new("RGBA", (size, size), (ICON_GRAY, ICON_GRAY, ICON_GRAY, 0))
+    main.putalpha(alpha)
+    out.alpha_composite(main, (PAD, PAD))
+    return out
+
+@lru_cache(maxsize=64)
+def _load_baked(icon_path: str, size: int, shadow_offset: int, mtime_ns: int) -> Image.Image:
+    path = Path(icon_path)
+    cache_dir = path.parent / "_baked"
+    cache_file = cache_dir / f"{path.stem}_{_file_hash(path)}_{size}_{shadow_offset}_v{ICON_BAKE_VERSION}.png"
+    if cache_file.exists():
+        try:
+            with Image.open(cache_file) as img:
+                return img.convert("RGBA")
+        except Exception:
+            pass
+    baked = _bake(path, size, shadow_offset)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_file.with_name(f"{cache_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp.png")
+    baked.save(tmp)
+    os.replace(tmp, cache_file)
+    return baked
+
+def get_baked_icon(icon_path: Path, size: int = 30, shadow_offset: int = 2) -> Tuple[Image.Image, int]:
+    """获取烘焙好的图标。
+
+    Returns:
+        Tuple[Image.Image, int]: (图标成品, 偏移)，绘制时放在 (x - 偏移, y - 偏移) 处，使图标本体对齐到 (x, y)。
+    """
+    path = Path(icon_path)
+    return _load_baked(str(path), size, shadow_offset, path.stat().st_mtime_ns), PAD
+
+def build_icon_assets(icon_paths: Iterable[Path], size: int = 30, shadow_offset: int = 2) -> int:
+    """一次性烘焙全部图标（已缓存的直接读取），返回处理的图标数。"""
+    n = 0
+    for p in icon_paths:
+        if Path(p).exists():
+            get_baked_icon(Path(p), size, shadow_offset)
+            n += 1
+    return n
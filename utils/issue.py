@@ -2,9 +2,10 @@
 from pathlib import Path
 import re
 from datetime import datetime, timedelta
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import pandas as pd
 from utils.logger import logger
+from utils.excel_stream import read_excel_stream
 
 class Issue:
     def __init__(self, total_dir: Path, newsong_dir: Path, first_issue_date: str):
@@ -17,6 +18,21 @@ class Issue:
         latest = max(files, key=lambda p: p.stat().st_mtime)
         return latest
 
+    def find_total_excels(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Path]:
+        """按期日期（YYYYMMDD，含两端）筛选总榜文件，按日期升序返回；同一期有多个文件时取最新修改的。"""
+        by_date = {}
+        for p in self.total_dir.glob("*.xlsx"):
+            m = re.search(r"(20\d{6})", p.stem)
+            if not m:
+                continue
+            issue_date = (datetime.strptime(m.group(1), "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
+            if (start and issue_date < start) or (end and issue_date > end):
+                continue
+            old = by_date.get(issue_date)
+            if old is None or p.stat().st_mtime > old.stat().st_mtime:
+                by_date[issue_date] = p
+        return [by_date[d] for d in sorted(by_date)]
+
     def get_newsong_excel(self, total_excel_path: Path) -> Path:
         m = re.search(r"(20\d{6})", total_excel_path.stem)
         date_str = m.group(1)
@@ -41,11 +57,13 @@ class Issue:
         logger.info(f"日期: {issue_date_str}, 期数: {issue_index}")
         return issue_date_str, issue_index, excel_date_str
 
-    def prepare_video_data(self, top_n: int) -> Tuple[List[pd.Series], str, int, str]:
-        excel_path = self.get_latest_total_excel()
+    def prepare_video_data(self, top_n: int, excel_path: Optional[Path] = None) -> Tuple[List[pd.Series], str, int, str]:
+        """读取一期的上榜数据；excel_path 为None时使用最新的总榜文件。"""
+        excel_path = excel_path or self.get_latest_total_excel()
         issue_date, idx, ex_date = self.infer_issue_info(excel_path)
         
-        df_total = pd.read_excel(excel_path, dtype={'bvid': str})
+        # 总榜按排名升序保存，只需流式读取前 top_n 行
+        df_total = read_excel_stream(excel_path, limit=top_n, dtype={'bvid': str})
         df_top = df_total.sort_values("rank").head(top_n).sort_values("rank", ascending=False)
         
         top_bvids = set()
@@ -54,7 +72,8 @@ class Issue:
                 top_bvids.add(str(r['bvid']).strip())
 
         newsong_path = self.get_newsong_excel(excel_path)
-        df_new = pd.read_excel(newsong_path, dtype={'bvid': str})
+        # 最多需要跳过与总榜重复的 len(top_bvids) 首，才能取到2首新曲
+        df_new = read_excel_stream(newsong_path, limit=len(top_bvids) + 2, dtype={'bvid': str})
         if "rank" in df_new.columns:
             df_new = df_new.sort_values("rank")
 
@@ -0,0 +1,175 @@
+# utils/media_cache.py
+# 素材缓存管理模块：为 videos_root 维护索引文件与容量上限，超出上限时按“再次上榜的可能性”淘汰整首歌的缓存。
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from utils.logger import logger
+
+INDEX_VERSION = 1
+# 排名换算为上榜可能性的尺度：第1名约0.95，第20名0.5，新曲（排名999）接近0
+RANK_SCALE = 20.0
+# 在榜次数与使用次数的权重（均取 log1p）
+STREAK_WEIGHT = 0.5
+USE_WEIGHT = 0.25
+# 距上次使用每过 HALF_LIFE_DAYS 天，保留分数减半
+HALF_LIFE_DAYS = 7.0
+
+class MediaCache:
+    """
+    videos_root 的缓存索引。每首歌（bvid 目录）对应一条记录：
+    {"bytes": 目录总大小, "last_used": 时间戳, "uses": 使用次数, "rank": 最近排名, "count": 在榜次数, "files": [文件名]}。
+    查询只读内存中的索引，写入新文件后才统计一次目录大小；淘汰时删除整个 bvid 目录。
+    """
+    def __init__(self, root: Path, budget_bytes: int, index_name: str = "_cache_index.json"):
+        """
+        Args:
+            root (Path): 缓存根目录（videos_root）。
+            budget_bytes (int): 容量上限（字节），0 表示不限制。
+            index_name (str): 索引文件名，位于根目录下。
+        """
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.index_path = root / index_name
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.index_path.exists():
+            try:
+                data = json.loads(self.index_path.read_text(encoding="utf-8"))
+                if data.get("version") == INDEX_VERSION:
+                    return data.get("entries", {})
+            except (OSError, ValueError):
+                pass
+        # 索引缺失或版本不符时扫描一次目录重建
+        entries: Dict[str, Dict[str, Any]] = {}
+        if self.root.exists():
+            for d in self.root.iterdir():
+                if d.is_dir() and not d.name.startswith(("_", ".")):
+                    entries[d.name] = self._scan(d, last_used=d.stat().st_mtime)
+        logger.info(f"重建素材缓存索引: {len(entries)} 首")
+        return entries
+
+    @staticmethod
+    def _scan(bvid_dir: Path, last_used: float) -> Dict[str, Any]:
+        sizes: Dict[str, int] = {}
+        for p in bvid_dir.rglob("*"):
+            # 其他线程/进程可能正在替换临时文件，统计期间消失的文件直接忽略
+            try:
+                if p.is_file():
+                    sizes[str(p.relative_to(bvid_dir))] = p.stat().st_size
+            except OSError:
+                continue
+        return {
+            "bytes": sum(sizes.values()),
+            "last_used": last_used,
+            "uses": 0,
+            "rank": None,
+            "count": 0,
+            "files": sorted(sizes),
+        }
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps({"version": INDEX_VERSION, "entries": self.entries}, ensure_ascii=False)
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def lookup(self, bvid: str, name: str) -> Optional[Path]:
+        """按索引查询缓存文件，命中时再确认文件存在（被手动删除的文件从索引中移除）；未缓存时返回None。"""
+        with self._lock:
+            entry = self.entries.get(bvid)
+            if entry is None or name not in entry["files"]:
+                return None
+        path = self.root / bvid / name
+        if not path.exists():
+            logger.warning(f"[{bvid}] 缓存文件已不存在，从索引中移除: {name}")
+            self.discard(bvid, name)
+            return None
+        with self._lock:
+            entry = self.entries.get(bvid)
+            if entry is not None:
+                entry["last_used"] = time.time()
+        return path
+
+    def record(self, bvid: str) -> None:
+        """bvid 目录中写入新文件后调用，重新统计该目录的文件与大小。"""
+        bvid_dir = self.root / bvid
+        if not bvid_dir.exists():
+            return
+        with self._lock:
+            old = self.entries.get(bvid)
+            entry = self._scan(bvid_dir, last_used=time.time())
+            if old:
+                entry.update(uses=old["uses"], rank=old["rank"], count=old["count"])
+            self.entries[bvid] = entry
+
+    def discard(self, bvid: str, name: str) -> None:
+        """索引中的文件实际已不存在时调用（例如被手动删除），同时重新统计目录大小。"""
+        with self._lock:
+            entry = self.entries.get(bvid)
+            if not entry or name not in entry["files"]:
+                return
+            entry["files"].remove(name)
+            if not (self.root / bvid).exists():
+                entry.update(bytes=0, files=[])
+                return
+        self.record(bvid)
+
+    def touch(self, bvid: str, rank: Optional[int] = None, count: Optional[int] = None) -> None:
+        """记录一次使用及本期的排名、在榜次数。"""
+        with self._lock:
+            entry = self.entries.setdefault(
+                bvid, {"bytes": 0, "last_used": 0.0, "uses": 0, "rank": None, "count": 0, "files": []}
+            )
+            entry["last_used"] = time.time()
+            entry["uses"] += 1
+            if rank is not None:
+                entry["rank"] = int(rank)
+            if count is not None:
+                entry["count"] = int(count)
+
+    @staticmethod
+    def retention_score(entry: Dict[str, Any], now: float) -> float:
+        """保留分数：排名越高、在榜次数与使用次数越多越值得保留，并随闲置时间指数衰减。"""
+        rank = entry.get("rank") or 999
+        chart = 1.0 / (1.0 + max(rank - 1, 0) / RANK_SCALE)
+        score = chart + STREAK_WEIGHT * math.log1p(entry.get("count") or 0) + USE_WEIGHT * math.log1p(entry.get("uses") or 0)
+        age_days = max(0.0, now - float(entry.get("last_used") or 0)) / 86400
+        return score * 0.5 ** (age_days / HALF_LIFE_DAYS)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e["bytes"] for e in self.entries.values())
+
+    def evict(self, protect: Iterable[str] = ()) -> int:
+        """淘汰保留分数最低的歌曲直到总大小不超过上限，protect 中的 bvid 不会被淘汰。返回释放的字节数。"""
+        if self.budget_bytes <= 0:
+            return 0
+        protected = set(protect)
+        now = time.time()
+        with self._lock:
+            total = sum(e["bytes"] for e in self.entries.values())
+            candidates = sorted(
+                (b for b in self.entries if b not in protected),
+                key=lambda b: self.retention_score(self.entries[b], now),
+            )
+        freed = 0
+        for bvid in candidates:
+            if total - freed <= self.budget_bytes:
+                break
+            with self._lock:
+                entry = self.entries.pop(bvid)
+            shutil.rmtree(self.root / bvid, ignore_errors=True)
+            freed += entry["bytes"]
+            logger.info(f"[{bvid}] 淘汰缓存 {entry['bytes'] / 1024 ** 2:.1f} MB")
+        if freed:
+            self.save()
+        return freed
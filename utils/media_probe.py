@@ -0,0 +1,151 @@
+# utils/media_probe.py
+# 媒体探测模块：通过 ffprobe 读取视频/音频流参数，用于判断片段能否直接流复制拼接；并提供截取文件与完整音频的对齐。
+import json
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from utils.logger import logger
+
+# 拼接时需要一致的流参数
+VIDEO_KEYS = ("codec_name", "width", "height", "r_frame_rate", "pix_fmt")
+AUDIO_KEYS = ("codec_name", "sample_rate", "channels", "channel_layout", "sample_fmt")
+
+def default_ffprobe_bin(ffmpeg_bin: str) -> str:
+    """根据 ffmpeg 可执行文件推断同目录下的 ffprobe。"""
+    p = Path(ffmpeg_bin)
+    name = p.name.replace("ffmpeg", "ffprobe")
+    if name == p.name:
+        return "ffprobe"
+    return str(p.with_name(name))
+
+def probe_stream_params(path: Path, ffprobe_bin: str = "ffprobe") -> Optional[Dict[str, Any]]:
+    """读取文件中第一条视频流和第一条音频流的关键参数。
+
+    Args:
+        path (Path): 媒体文件路径。
+        ffprobe_bin (str): ffprobe 可执行文件。
+
+    Returns:
+        Optional[Dict[str, Any]]: {'video': {...}, 'audio': {...}}，缺失的流为None；探测失败时返回None。
+    """
+    cmd = [
+        ffprobe_bin, "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,width,height,r_frame_rate,pix_fmt,sample_rate,channels,channel_layout,sample_fmt",
+        "-of", "json",
+        str(path),
+    ]
+    try:
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        streams: List[Dict[str, Any]] = json.loads(out).get("streams", [])
+    except Exception as e:
+        logger.warning(f"ffprobe 探测失败 {path}: {e}")
+        return None
+
+    result: Dict[str, Any] = {"video": None, "audio": None}
+    for s in streams:
+        kind = s.get("codec_type")
+        if kind == "video" and result["video"] is None:
+            result["video"] = {k: s.get(k) for k in VIDEO_KEYS}
+        elif kind == "audio" and result["audio"] is None:
+            result["audio"] = {k: s.get(k) for k in AUDIO_KEYS}
+    return result
+
+def stream_mismatches(params: Optional[Dict[str, Any]], target: Dict[str, Dict[str, Any]]) -> List[str]:
+    """对比探测结果与目标参数，返回不一致项的描述，为空表示可以直接流复制。"""
+    if params is None:
+        return ["探测失败"]
+    diffs = []
+    for kind, expected in target.items():
+        actual = params.get(kind)
+        if actual is None:
+            diffs.append(f"缺少{kind}流")
+            continue
+        for k, v in expected.items():
+            if str(actual.get(k)) != str(v):
+                diffs.append(f"{kind}.{k}={actual.get(k)} (应为 {v})")
+    return diffs
+
+def probe_start_times(path: Path, ffprobe_bin: str = "ffprobe") -> Optional[Tuple[float, float]]:
+    """读取文件整体与第一条音频流的起始时间戳（秒）。
+
+    Returns:
+        Optional[Tuple[float, float]]: (文件起始时间, 音频起始时间)，探测失败时返回None。
+    """
+    cmd = [
+        ffprobe_bin, "-v", "error",
+        "-show_entries", "format=start_time:stream=codec_type,start_time",
+        "-of", "json",
+        str(path),
+    ]
+    try:
+        data = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+        fmt_start = float(data.get("format", {}).get("start_time") or 0.0)
+        audio = next(s for s in data.get("streams", []) if s.get("codec_type") == "audio")
+        return fmt_start, float(audio.get("start_time") or fmt_start)
+    except Exception as e:
+        logger.warning(f"ffprobe 探测起始时间失败 {path}: {e}")
+        return None
+
+def _decode_mono(path: Path, ffmpeg_bin: str, sr: int, start: float, duration: float):
+    import numpy as np
+    cmd = [
+        ffmpeg_bin, "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+        "-i", str(path),
+        "-vn", "-ac", "1", "-ar", str(sr), "-f", "f32le", "-",
+    ]
+    out = subprocess.run(cmd, check=True, capture_output=True).stdout
+    return np.frombuffer(out, dtype=np.float32)
+
+def locate_audio_offset(
+    clip_path: Path,
+    reference_path: Path,
+    search_start: float,
+    search_end: float,
+    ffmpeg_bin: str = "ffmpeg",
+    probe_seconds: float = 6.0,
+    sr: int = 11025,
+    min_corr: float = 0.5,
+) -> Optional[float]:
+    """用互相关确定截取文件开头的音频对应完整音频中的哪个时刻。
+
+    以流复制方式截取时实际起点会落在关键帧上，与请求的起点不一致，需要用音频对齐求出准确位置。
+
+    Args:
+        clip_path (Path): 截取得到的文件。
+        reference_path (Path): 完整音频。
+        search_start (float): 候选起点的下限（秒）。
+        search_end (float): 候选起点的上限（秒）。
+        probe_seconds (float): 参与对齐的截取文件开头时长。
+        min_corr (float): 归一化相关系数下限，低于该值视为对齐失败。
+
+    Returns:
+        Optional[float]: 截取文件第一个音频采样在完整音频中的时刻（秒），对齐失败时返回None。
+    """
+    import numpy as np
+    search_start = max(0.0, search_start)
+    try:
+        probe = _decode_mono(clip_path, ffmpeg_bin, sr, 0.0, probe_seconds)
+        ref = _decode_mono(reference_path, ffmpeg_bin, sr, search_start, search_end - search_start + probe_seconds)
+    except Exception as e:
+        logger.warning(f"音频对齐解码失败 {clip_path}: {e}")
+        return None
+    m = len(probe)
+    if m < sr or len(ref) < m:
+        return None
+
+    probe = probe - probe.mean()
+    n = 1 << int(np.ceil(np.log2(len(ref) + m)))
+    corr = np.fft.irfft(np.fft.rfft(ref, n) * np.conj(np.fft.rfft(probe, n)), n)[: len(ref) - m + 1]
+    # 按参考音频滑动窗口的能量归一化，得到相关系数
+    csum = np.concatenate(([0.0], np.cumsum(ref.astype(np.float64) ** 2)))
+    win_energy = csum[m:] - csum[:-m]
+    csum1 = np.concatenate(([0.0], np.cumsum(ref.astype(np.float64))))
+    win_mean = (csum1[m:] - csum1[:-m]) / m
+    win_var = np.maximum(win_energy - m * win_mean ** 2, 1e-12)
+    score = corr / (np.sqrt(win_var) * np.linalg.norm(probe) + 1e-12)
+    k = int(np.argmax(score))
+    if score[k] < min_corr:
+        logger.warning(f"音频对齐失败 {clip_path}: 相关系数 {score[k]:.2f}")
+        return None
+    return search_start + k / sr
@@ -0,0 +1,86 @@
+# utils/render_profile.py
+# 渲染档位模块：定义成片（final）与预览（preview）的编码参数，所有 ffmpeg 编码统一从这里取参数。
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional
+
+BASE_WIDTH, BASE_HEIGHT, BASE_FPS = 1080, 1920, 60
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    preset: Optional[str]   # x264 preset，None 表示使用 x264 默认值（medium）
+    crf: int
+    fps: int
+    scale: float            # 输出分辨率相对 1080x1920 的比例
+    lossless_intermediate: bool  # 中间文件（分段缓存）使用无损 ultrafast 编码
+
+    @property
+    def width(self) -> int:
+        return int(round(BASE_WIDTH * self.scale / 2)) * 2
+
+    @property
+    def height(self) -> int:
+        return int(round(BASE_HEIGHT * self.scale / 2)) * 2
+
+    def _output_shape_args(self) -> List[str]:
+        # 输出端的 -s/-r 会在滤镜图末尾自动插入缩放与帧率转换，成片档位下不添加任何参数
+        args: List[str] = []
+        if (self.width, self.height) != (BASE_WIDTH, BASE_HEIGHT):
+            args += ["-s", f"{self.width}x{self.height}"]
+        if self.fps != BASE_FPS:
+            args += ["-r", str(self.fps)]
+        return args
+
+    def encode_args(self) -> List[str]:
+        """最终会进入成片的编码参数（各片段参数一致，以便拼接时直接流复制）。"""
+        args = ["-c:v", "libx264"]
+        if self.preset:
+            args += ["-preset", self.preset]
+        args += [
+            "-crf", str(self.crf),
+            "-pix_fmt", "yuv420p",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-ar", "44100",
+            "-ac", "2",
+        ]
+        return args + self._output_shape_args()
+
+    def intermediate_encode_args(self) -> List[str]:
+        """只作为中间文件、之后会被再次编码的输出所用的编码参数。"""
+        if not self.lossless_intermediate:
+            return self.encode_args()
+        return [
+            "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0",
+            "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "192k", "-ar", "44100", "-ac", "2",
+        ]
+
+DEFAULT_PROFILES: Dict[str, RenderProfile] = {
+    # 成片：与原有编码参数完全一致
+    "final": RenderProfile(name="final", preset=None, crf=16, fps=60, scale=1.0, lossless_intermediate=False),
+    # 预览：用于调整版式时快速出片
+    "preview": RenderProfile(name="preview", preset="ultrafast", crf=28, fps=30, scale=0.5, lossless_intermediate=True),
+}
+
+def load_render_profile(raw: Optional[Dict[str, Any]], name: Optional[str] = None) -> RenderProfile:
+    """从配置的 render 段中选择档位，配置中的字段覆盖同名档位的默认值。
+
+    Args:
+        raw (Dict[str, Any], optional): video.yaml 中的 render 段，例如
+            {"profile": "final", "profiles": {"preview": {"crf": 30}}}。
+        name (str, optional): 本次运行指定的档位，优先于配置中的 profile。
+
+    Raises:
+        ValueError: 档位不存在。
+    """
+    raw = raw or {}
+    name = name or raw.get("profile") or "final"
+    overrides = (raw.get("profiles") or {}).get(name) or {}
+    base = DEFAULT_PROFILES.get(name)
+    if base is None:
+        if not overrides:
+            raise ValueError(f"未知的渲染档位: {name}")
+        base = replace(DEFAULT_PROFILES["final"], name=name)
+    allowed = {f.name for f in fields(RenderProfile)} - {"name"}
+    return replace(base, **{k: v for k, v in overrides.items() if k in allowed})
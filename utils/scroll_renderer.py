@@ -0,0 +1,95 @@
+# utils/scroll_renderer.py
+# 滚动视频帧生成模块：预先将卡片长图与标题图层转换为NumPy数组，逐帧只做切片拷贝和局部透明度混合。
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+class _Layer:
+    """预乘 alpha 的局部图层，只在自身的包围框内参与混合。"""
+    def __init__(self, img: Image.Image):
+        arr = np.asarray(img.convert("RGBA"), dtype=np.float32)
+        self.alpha = arr[:, :, 3:4] / 255.0
+        self.rgb = arr[:, :, :3] * self.alpha
+        self.h, self.w = arr.shape[:2]
+
+    def blend(self, frame: np.ndarray, x: int, y: int, opacity: float) -> None:
+        """将图层以给定不透明度混合到帧缓冲区的 (x, y) 处，超出画面的部分被裁剪。"""
+        fh, fw = frame.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(fw, x + self.w), min(fh, y + self.h)
+        if x0 >= x1 or y0 >= y1 or opacity <= 0:
+            return
+        ly0, lx0 = y0 - y, x0 - x
+        ly1, lx1 = ly0 + (y1 - y0), lx0 + (x1 - x0)
+        a = self.alpha[ly0:ly1, lx0:lx1] * opacity
+        region = frame[y0:y1, x0:x1]
+        out = region * (1.0 - a) + self.rgb[ly0:ly1, lx0:lx1] * opacity
+        region[:] = np.clip(out + 0.5, 0, 255).astype(np.uint8)
+
+class ScrollFrameRenderer:
+    """
+    成就视频帧生成器（输出 RGB24）。
+    卡片长图预先合成到背景色上，每帧只需把可见范围的行拷贝进预分配的缓冲区；
+    标题与ED信息图层只在淡出期间按包围框做透明度混合，静止阶段的帧直接复用。
+    """
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        bg_color: Tuple[int, int, int, int],
+        strip_img: Image.Image,
+        header_layers: Dict[str, Any],
+        header_ed_y,
+    ):
+        """
+        Args:
+            width (int): 画面宽度。
+            height (int): 画面高度。
+            bg_color (Tuple[int, int, int, int]): 背景色。
+            strip_img (Image.Image): 卡片长图（RGBA）。
+            header_layers (Dict[str, Any]): Cover.create_header_layers 的返回值。
+            header_ed_y (Callable[[Optional[int]], int]): 根据榜单顶部位置计算ED图层纵坐标的函数。
+        """
+        self.width = width
+        self.height = height
+        self.bg_rgb = np.array(bg_color[:3], dtype=np.uint8)
+
+        bg = Image.new("RGBA", strip_img.size, tuple(bg_color[:3]) + (255,))
+        bg.alpha_composite(strip_img.convert("RGBA"))
+        self.strip = np.ascontiguousarray(np.asarray(bg.convert("RGB"), dtype=np.uint8))
+        self.strip_h = self.strip.shape[0]
+        self.strip_x = 0
+        self.strip_w = min(self.strip.shape[1], width)
+
+        title_img, self.title_pos = header_layers["title"]
+        self.title = _Layer(title_img)
+        self.ed: Optional[_Layer] = None
+        self.ed_x = 0
+        if header_layers.get("ed") is not None:
+            ed_img, self.ed_x = header_layers["ed"]
+            self.ed = _Layer(ed_img)
+        self.header_ed_y = header_ed_y
+
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self._last_key: Optional[Tuple[int, float]] = None
+
+    def render(self, strip_y: int, header_opacity: float) -> memoryview:
+        """生成一帧并返回缓冲区视图；与上一帧参数相同时直接返回上一帧。"""
+        key = (strip_y, round(header_opacity, 4))
+        if key == self._last_key:
+            return memoryview(self.buffer).cast("B")
+        self._last_key = key
+
+        buf = self.buffer
+        buf[:] = self.bg_rgb
+        top = max(0, strip_y)
+        bottom = min(self.height, strip_y + self.strip_h)
+        if top < bottom:
+            buf[top:bottom, :self.strip_w] = self.strip[top - strip_y:bottom - strip_y, :self.strip_w]
+
+        if header_opacity > 0:
+            tx, ty = self.title_pos
+            self.title.blend(buf, tx, ty, header_opacity)
+            if self.ed is not None:
+                self.ed.blend(buf, self.ed_x, self.header_ed_y(strip_y), header_opacity)
+        return memoryview(buf).cast("B")
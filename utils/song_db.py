@@ -0,0 +1,241 @@
+# utils/song_db.py
+# 收录曲目数据库模块：以SQLite保存收录曲目，提供事务化的增量更新和Excel导出视图。
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import pandas as pd
+from utils.io_utils import save_to_excel
+from utils.logger import logger
+
+class SongDatabase:
+    """
+    收录曲目数据库。
+
+    数据以 bvid 为主键保存在与Excel同名的 .db 文件中，写入通过事务内的 UPSERT 只修改发生变化的行，
+    多个脚本并发写入时由数据库锁串行化，读取在 WAL 模式下获得一致的快照。
+    `收录曲目.xlsx` 作为导出视图保留：日常写入不再重写整个工作簿，需要时调用 export_excel 单独导出
+    （见 模块-导出收录曲目.py）。数据库为空时以Excel作为初始数据导入；之后对Excel的手动修改不会自动覆盖数据库，
+    需通过 import_excel 显式合并（见 模块-导入收录曲目.py）。
+    """
+    def __init__(self, excel_path: Path, db_path: Optional[Path] = None, columns: Optional[List[str]] = None):
+        """
+        Args:
+            excel_path (Path): 收录曲目Excel视图的路径。
+            db_path (Path, optional): 数据库路径，默认与Excel同名、后缀为 .db。
+            columns (List[str], optional): 收录曲目的列，默认读取 usecols.json 中的 'record' 配置。
+        """
+        self.excel_path = Path(excel_path)
+        self.db_path = Path(db_path) if db_path else self.excel_path.with_suffix('.db')
+        if columns is None:
+            with open('config/usecols.json', 'r', encoding='utf-8') as f:
+                columns = json.load(f)['columns']['record']
+        self.columns = list(columns)
+        self._ensure_schema()
+        self._check_excel_view()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开数据库连接，使用WAL模式以便读写互不阻塞。"""
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """开启写事务，立即获取写锁，异常时回滚。"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _quote(col: str) -> str:
+        return '"' + col.replace('"', '""') + '"'
+
+    @staticmethod
+    def _to_sql_value(value: Any) -> Any:
+        """将pandas/numpy的取值转换为sqlite可接受的类型。"""
+        # 先判断空值：pd.NaT 也是 datetime 的实例，调用 strftime 会抛出 ValueError
+        if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+            return None
+        if isinstance(value, (pd.Timestamp, datetime)):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if hasattr(value, 'item'):
+            value = value.item()
+        return value
+
+    def _ensure_schema(self) -> None:
+        """创建数据表，并为新增的配置列补充字段。"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS songs (bvid TEXT PRIMARY KEY, seq INTEGER)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_songs_seq ON songs(seq)")
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(songs)")}
+            for col in self.columns:
+                if col not in existing:
+                    conn.execute(f"ALTER TABLE songs ADD COLUMN {self._quote(col)}")
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute("INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def _check_excel_view(self) -> None:
+        """数据库为空时从Excel导入初始数据；Excel在上次导出后被手动修改过时提示显式导入。"""
+        if not self.excel_path.exists():
+            return
+        with self._connect() as conn:
+            empty = conn.execute("SELECT 1 FROM songs LIMIT 1").fetchone() is None
+            edited = self._get_meta(conn, 'excel_mtime') != str(self.excel_path.stat().st_mtime_ns)
+        if empty:
+            self.import_excel()
+        elif edited:
+            logger.warning(f"{self.excel_path} 在上次导出后被修改过，修改不会自动生效；如需合并请运行 模块-导入收录曲目.py。")
+
+    def import_excel(self, path: Optional[Path] = None) -> int:
+        """将Excel中的行按 bvid 合并（UPSERT）到数据库。
+
+        只写入取值有变化的行，新曲目追加到末尾；空单元格不会清空已有取值，Excel中删除的行也不会从数据库删除。
+
+        Args:
+            path (Path, optional): 待导入的Excel，默认为收录曲目视图。
+
+        Returns:
+            int: 实际写入（新增或修改）的行数。
+        """
+        source = Path(path) if path else self.excel_path
+        excel_mtime = str(source.stat().st_mtime_ns)
+        df = pd.read_excel(source)
+        if 'bvid' not in df.columns:
+            logger.warning(f"{source} 缺少 bvid 列，跳过导入。")
+            return 0
+        with self._transaction() as conn:
+            changed = self._upsert(conn, df, self.columns)
+            if source.resolve() == self.excel_path.resolve():
+                self._set_meta(conn, 'excel_mtime', excel_mtime)
+        logger.info(f"已从 {source} 合并 {changed} 条收录曲目到 {self.db_path}")
+        return changed
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取收录曲目（单条查询，在WAL模式下为一致快照）。
+
+        Args:
+            columns (List[str], optional): 需要读取的列，默认全部配置列。
+
+        Returns:
+            pd.DataFrame: 按导出顺序排列的收录曲目。
+        """
+        with self._connect() as conn:
+            return self._load(conn, columns)
+
+    def _load(self, conn: sqlite3.Connection, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        cols = columns or self.columns
+        if 'bvid' not in cols:
+            cols = ['bvid', *cols]
+        col_sql = ", ".join(self._quote(c) for c in cols)
+        return pd.read_sql_query(f"SELECT {col_sql} FROM songs ORDER BY seq", conn)
+
+    def upsert(self, df: pd.DataFrame, columns: Sequence[str]) -> int:
+        """按 bvid 插入或更新指定列，只写入与数据库中取值不同的行，空值不会覆盖已有取值。
+
+        Args:
+            df (pd.DataFrame): 包含 bvid 及待更新列的数据。
+            columns (Sequence[str]): 需要更新的列，未列出的列保持不变。
+
+        Returns:
+            int: 实际写入（新增或修改）的行数。
+        """
+        with self._transaction() as conn:
+            return self._upsert(conn, df, columns)
+
+    def _upsert(self, conn: sqlite3.Connection, df: pd.DataFrame, columns: Sequence[str]) -> int:
+        cols = [c for c in columns if c != 'bvid' and c in df.columns and c in self.columns]
+        if df.empty:
+            return 0
+        df = df.dropna(subset=['bvid']).drop_duplicates(subset=['bvid'], keep='last')
+        col_sql = ", ".join(self._quote(c) for c in cols)
+        select_sql = f"SELECT bvid{', ' + col_sql if cols else ''} FROM songs"
+        updates = ", ".join(f"{self._quote(c)} = excluded.{self._quote(c)}" for c in cols)
+        insert_sql = (
+            f"INSERT INTO songs (bvid, seq{', ' + col_sql if cols else ''}) "
+            f"VALUES ({', '.join('?' for _ in range(len(cols) + 2))}) "
+            + (f"ON CONFLICT(bvid) DO UPDATE SET {updates}" if cols else "ON CONFLICT(bvid) DO NOTHING")
+        )
+
+        current = {row[0]: row[1:] for row in conn.execute(select_sql)}
+        next_seq = (conn.execute("SELECT COALESCE(MAX(seq), -1) FROM songs").fetchone()[0]) + 1
+        rows = []
+        for bvid, values in zip(df['bvid'].astype(str), df[cols].itertuples(index=False, name=None)):
+            values = tuple(self._to_sql_value(v) for v in values)
+            if bvid in current:
+                # 与 DataFrame.update 一致：空值不覆盖已有取值
+                values = tuple(old if new is None else new for new, old in zip(values, current[bvid]))
+                if current[bvid] == values:
+                    continue
+                rows.append((bvid, None, *values))
+            else:
+                rows.append((bvid, next_seq, *values))
+                next_seq += 1
+        if rows:
+            conn.executemany(insert_sql, rows)
+        return len(rows)
+
+    def replace_values(self, mapping: Dict[str, str], column: Optional[str] = None, partial: bool = False) -> int:
+        """在一个事务内批量替换文本取值。
+
+        Args:
+            mapping (Dict[str, str]): 旧值到新值的映射。
+            column (str, optional): 目标列，为None时作用于所有列。
+            partial (bool): True 时替换子串，False 时仅替换完全相等的取值。
+
+        Returns:
+            int: 被修改的单元格数。
+        """
+        cols = [column] if column else [c for c in self.columns if c != 'bvid']
+        cols = [c for c in cols if c in self.columns]
+        changed = 0
+        with self._transaction() as conn:
+            for col in cols:
+                q = self._quote(col)
+                for old, new in mapping.items():
+                    if partial:
+                        cur = conn.execute(f"UPDATE songs SET {q} = replace({q}, ?, ?) WHERE typeof({q}) = 'text' AND instr({q}, ?) > 0", (old, new, old))
+                    else:
+                        cur = conn.execute(f"UPDATE songs SET {q} = ? WHERE {q} = ?", (new, old))
+                    changed += cur.rowcount
+        return changed
+
+    def reorder(self, bvids: Sequence[str]) -> None:
+        """按给定的 bvid 顺序重排导出顺序，未列出的曲目保持原有相对顺序排在最后，只写入序号发生变化的行。"""
+        with self._transaction() as conn:
+            old_seq = dict(conn.execute("SELECT bvid, seq FROM songs ORDER BY seq").fetchall())
+            listed = [b for b in dict.fromkeys(str(b) for b in bvids) if b in old_seq]
+            listed_set = set(listed)
+            order = listed + [b for b in old_seq if b not in listed_set]
+            changes = [(i, b) for i, b in enumerate(order) if old_seq[b] != i]
+            if changes:
+                conn.executemany("UPDATE songs SET seq = ? WHERE bvid = ?", changes)
+
+    def export_excel(self, path: Optional[Path] = None) -> None:
+        """将数据库导出为Excel视图（按需调用，日常写入不会自动导出）。
+
+        导出在写事务内完成并记录导出后的修改时间，其他进程不会把这次导出误认为手动编辑而重新导入。
+        """
+        target = Path(path) if path else self.excel_path
+        with self._transaction() as conn:
+            save_to_excel(self._load(conn), target, usecols=self.columns)
+            if target.resolve() == self.excel_path.resolve() and target.exists():
+                self._set_meta(conn, 'excel_mtime', str(target.stat().st_mtime_ns))
@@ -0,0 +1,144 @@
+# utils/value_index.py
+# 取值倒排索引模块：记录每个Excel文件中出现过的单元格取值，用于批量替换时快速定位受影响的文件。
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from openpyxl import load_workbook
+
+INDEX_PATH = Path("excel_cache") / "value_index.db"
+# 表示“全部列”的索引列名
+ALL_COLUMNS = ""
+
+def scan_file_values(path: str, column: Optional[str]) -> Tuple[str, int, int, Optional[Set[str]]]:
+    """读取单个Excel文件中指定列（或全部列）的字符串取值。
+
+    需位于模块顶层，以便在进程池中调用。
+
+    Args:
+        path (str): Excel文件路径。
+        column (str, optional): 表头列名，为None时读取所有单元格。
+
+    Returns:
+        Tuple[str, int, int, Optional[Set[str]]]: (路径, 修改时间, 文件大小, 取值集合)，读取失败时取值集合为None。
+    """
+    stat = os.stat(path)
+    values: Set[str] = set()
+    try:
+        wb = load_workbook(path, read_only=True)
+        try:
+            for ws in wb.worksheets:
+                col_idx = None
+                if column:
+                    header = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+                    if not header or column not in header:
+                        continue
+                    col_idx = header.index(column)
+                for row in ws.iter_rows(values_only=True):
+                    cells = row if col_idx is None else row[col_idx:col_idx + 1]
+                    values.update(v for v in cells if isinstance(v, str))
+        finally:
+            wb.close()
+    except Exception:
+        return path, stat.st_mtime_ns, stat.st_size, None
+    return path, stat.st_mtime_ns, stat.st_size, values
+
+class ValueIndex:
+    """
+    持久化的 取值 -> 文件 倒排索引。
+    以 (文件, 列) 为单位记录修改时间和大小，只有发生变化的文件才会被重新扫描。
+    """
+    def __init__(self, index_path: Path = INDEX_PATH):
+        """
+        Args:
+            index_path (Path): 索引数据库路径。
+        """
+        self.index_path = index_path
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files (path TEXT, col TEXT, mtime INTEGER, size INTEGER, PRIMARY KEY (path, col))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (col TEXT, value TEXT, path TEXT, PRIMARY KEY (col, value, path)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_path ON entries(path, col)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self, paths: Iterable[str], column: Optional[str],
+                mapper: Callable = map) -> int:
+        """同步索引：扫描新增或修改过的文件，移除已不存在的文件。
+
+        Args:
+            paths (Iterable[str]): 当前存在的全部Excel文件。
+            column (str, optional): 索引的列名，为None时索引所有单元格。
+            mapper (Callable): 扫描时使用的 map 函数，可传入进程池的 map 以并行扫描。
+
+        Returns:
+            int: 重新扫描的文件数。
+        """
+        col = column or ALL_COLUMNS
+        paths = list(paths)
+        with self._connect() as conn:
+            known: Dict[str, Tuple[int, int]] = {
+                p: (m, s) for p, m, s in conn.execute("SELECT path, mtime, size FROM files WHERE col = ?", (col,))
+            }
+        stale: List[str] = []
+        for p in paths:
+            st = os.stat(p)
+            if known.get(p) != (st.st_mtime_ns, st.st_size):
+                stale.append(p)
+        removed = set(known) - set(paths)
+
+        scanned = list(mapper(scan_file_values, stale, [column] * len(stale))) if stale else []
+
+        with self._connect() as conn:
+            for p in removed:
+                conn.execute("DELETE FROM entries WHERE path = ? AND col = ?", (p, col))
+                conn.execute("DELETE FROM files WHERE path = ? AND col = ?", (p, col))
+            for p, mtime, size, values in scanned:
+                conn.execute("DELETE FROM entries WHERE path = ? AND col = ?", (p, col))
+                if values is None:
+                    # 读取失败的文件不记录，下次运行时重试
+                    conn.execute("DELETE FROM files WHERE path = ? AND col = ?", (p, col))
+                    continue
+                conn.executemany(
+                    "INSERT OR IGNORE INTO entries (col, value, path) VALUES (?, ?, ?)",
+                    [(col, v, p) for v in values]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO files (path, col, mtime, size) VALUES (?, ?, ?, ?)",
+                    (p, col, mtime, size)
+                )
+        return len(stale)
+
+    def lookup(self, old_values: Iterable[str], column: Optional[str], partial: bool = False) -> Set[str]:
+        """查找包含任一旧值的文件。
+
+        Args:
+            old_values (Iterable[str]): 待替换的旧值。
+            column (str, optional): 索引的列名，为None时查找所有单元格。
+            partial (bool): True 时按子串匹配，False 时精确匹配。
+
+        Returns:
+            Set[str]: 受影响的文件路径集合。
+        """
+        col = column or ALL_COLUMNS
+        result: Set[str] = set()
+        with self._connect() as conn:
+            for ov in old_values:
+                if partial:
+                    rows = conn.execute("SELECT DISTINCT path FROM entries WHERE col = ? AND instr(value, ?) > 0", (col, ov))
+                else:
+                    rows = conn.execute("SELECT path FROM entries WHERE col = ? AND value = ?", (col, ov))
+                result.update(r[0] for r in rows)
+        return result
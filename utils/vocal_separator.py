@@ -0,0 +1,116 @@
+# utils/vocal_separator.py
+# 人声分离模块：在进程内加载一次 Demucs 模型并复用，分离结果按音频文件持久化缓存。
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+import librosa
+import numpy as np
+from utils.logger import logger
+
+MODEL_NAME = "htdemucs"
+# 同时进行分离的歌曲数上限（单进程内由信号量限制；多进程时为分离进程池的大小）
+MAX_CONCURRENT = max(1, min(3, (os.cpu_count() or 2) // 4))
+# 本进程的 torch 线程数。torch.set_num_threads 是进程级设置，在加载模型时设置一次，
+# 由进程内并发的所有分离共用；为None时使用全部 CPU 核，分离进程池中按 CPU核数 / MAX_CONCURRENT 设置
+TORCH_THREADS: Optional[int] = None
+
+# 为False时只读取人声缓存、不加载模型（多进程分析时由独立的分离进程池负责分离）
+ALLOW_SEPARATION = True
+
+_model = None
+_model_failed = False
+_model_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+
+def vocals_cache_path(audio_path: Path) -> Path:
+    """人声缓存与音频放在同一目录，即 videos_root/{bvid}/{bvid}_vocals.npz。"""
+    return audio_path.with_name(f"{audio_path.stem}_vocals.npz")
+
+def _get_model():
+    """首次调用时加载模型，之后在所有线程间复用；加载失败后不再重试。"""
+    global _model, _model_failed
+    with _model_lock:
+        if _model is not None or _model_failed:
+            return _model
+        try:
+            import torch
+            from demucs.pretrained import get_model
+            model = get_model(MODEL_NAME)
+            model.eval()
+            if torch.cuda.is_available():
+                model.cuda()
+            else:
+                torch.set_num_threads(TORCH_THREADS or os.cpu_count() or 1)
+            _model = model
+            logger.info(f"Demucs 模型 {MODEL_NAME} 已加载")
+        except Exception as e:
+            _model_failed = True
+            logger.warning(f"Demucs 加载失败或未安装，将跳过人声过滤步骤: {e}")
+        return _model
+
+def _run_model(model, audio_path: Path) -> np.ndarray:
+    """用 Demucs 分离人声，返回模型采样率下的单声道人声波形。"""
+    import torch
+    from demucs.apply import apply_model
+
+    wav, _ = librosa.load(str(audio_path), sr=model.samplerate, mono=False)
+    if wav.ndim == 1:
+        wav = np.tile(wav, (model.audio_channels, 1))
+    wav_t = torch.from_numpy(np.ascontiguousarray(wav[:model.audio_channels], dtype=np.float32))
+
+    # 与 demucs 命令行一致：按整体均值和标准差归一化
+    ref = wav_t.mean(0)
+    mean, std = ref.mean(), ref.std() + 1e-8
+    device = next(model.parameters()).device
+    with torch.no_grad():
+        sources = apply_model(model, ((wav_t - mean) / std)[None], device=device, split=True, progress=False)[0]
+    vocals = sources[model.sources.index("vocals")] * std + mean
+    return vocals.mean(0).cpu().numpy()
+
+def _load_cached(cache_path: Path) -> Tuple[int, np.ndarray]:
+    """读取缓存文件，返回 (采样率, 人声波形)。"""
+    with np.load(cache_path) as data:
+        return int(data["sr"]), data["vocals"]
+
+def separate_vocals(audio_path: str, sr: int) -> Optional[np.ndarray]:
+    """获取单声道人声波形（采样率为 sr）。
+
+    缓存命中（人声文件比音频新）时直接读取；否则在并发上限内分离并保存（ALLOW_SEPARATION 为False时返回None）。
+
+    Returns:
+        Optional[np.ndarray]: 人声波形，Demucs 不可用或分离失败时返回None。
+    """
+    path = Path(audio_path)
+    cache_path = vocals_cache_path(path)
+    if cache_path.exists() and cache_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+        try:
+            cached_sr, vocals = _load_cached(cache_path)
+            if cached_sr == sr:
+                return vocals
+            return librosa.resample(vocals, orig_sr=cached_sr, target_sr=sr)
+        except Exception:
+            cache_path.unlink(missing_ok=True)
+
+    if not ALLOW_SEPARATION:
+        return None
+    model = _get_model()
+    if model is None:
+        return None
+
+    with _slots:
+        try:
+            vocals = _run_model(model, path)
+        except Exception as e:
+            logger.warning(f"Demucs 分离失败 {path.name}: {e}")
+            return None
+
+    vocals = librosa.resample(vocals, orig_sr=model.samplerate, target_sr=sr).astype(np.float32)
+    tmp = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+    try:
+        np.savez(tmp, sr=sr, vocals=vocals)
+        os.replace(tmp, cache_path)
+    except Exception as e:
+        logger.warning(f"保存人声缓存失败 {cache_path}: {e}")
+        tmp.unlink(missing_ok=True)
+    return vocals
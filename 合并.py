@@ -1,9 +1,15 @@
 # 合并.py
 import asyncio
 import yaml
+from pathlib import Path
 from src.ranking_processor import RankingProcessor
+from utils.song_db import SongDatabase
 from utils.upload_server import connect_ssh, upload_files, close_connections
 
+# 上传前把收录曲目数据库导出为Excel视图（日常写入只更新数据库，不再每次重写工作簿）
+EXPORT_COLLECTED_BEFORE_UPLOAD = True
+COLLECTED_SONGS = "收录曲目.xlsx"
+
 async def main():
     processor = RankingProcessor(period='daily_combination')
     await processor.run()
@@ -30,5 +36,7 @@ def upload():
     
 if __name__ == "__main__":
     asyncio.run(main())
+    if EXPORT_COLLECTED_BEFORE_UPLOAD:
+        SongDatabase(Path(COLLECTED_SONGS)).export_excel()
     upload()
 
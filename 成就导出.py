@@ -6,6 +6,7 @@ from datetime import datetime
 from pathlib import Path
 from enum import Enum
 from utils.logger import logger
+from utils.data_handler import DataHandler
 
 @dataclass
 class AchiDef:
@@ -147,10 +148,11 @@ class WeeklyHonor:
         files.sort(key=lambda x: (x[1], x[0].stem))
         return files
 
+    REQCOLS = ['name', 'title', 'bvid', 'author', 'pubdate']
+
     @staticmethod
-    def process_file(file_path: Path) -> Tuple[List[str], pd.DataFrame]:
-        df = pd.read_excel(file_path, engine='openpyxl')
-        reqcols = ['name', 'title', 'bvid', 'author', 'pubdate']
+    def process_frame(df: pd.DataFrame) -> Tuple[List[str], pd.DataFrame]:
+        reqcols = WeeklyHonor.REQCOLS
         top = df.head(20).copy()
         names: List[str] = []
         for index in top.index:
@@ -247,12 +249,14 @@ def main():
 
     logger.info(f"目标期数: {target_period}")
 
+    periods = list(range(start_period, end_period + 1))
+    period_files = [all_files[start_index + (p - START_IDX)] for p in periods]
+    frames = DataHandler.load_many([file_path for file_path, _ in period_files], usecols=WeeklyHonor.REQCOLS)
+
     period_data: Dict[int, Tuple[List[str], pd.DataFrame, str]] = {}
-    for period_to_load in range(start_period, end_period + 1):
-        file_index = start_index + (period_to_load - START_IDX)
-        file_path, date = all_files[file_index]
+    for period_to_load, (_, date), df in zip(periods, period_files, frames):
         date_str = date.strftime("%Y-%m-%d")
-        names, details = WeeklyHonor.process_file(file_path)
+        names, details = WeeklyHonor.process_frame(df)
         period_data[period_to_load] = (names, details, date_str)
 
     processor = WeeklyHonor(
@@ -1,5 +1,45 @@
 # 日刊视频版.py
+import argparse
+from datetime import datetime
 from src.daily_video_flow import DailyVideoFlow
+from utils.app_config import load_app_config
+
+# 渲染档位：final 为成片，preview 为低分辨率快速预览；命令行传入 --preview 时使用预览档位
+PROFILE = "final"
+# 批量回填的期日期范围 (起, 止)，格式 YYYYMMDD，含两端；为None时只渲染最新一期。
+# 也可在命令行传入 --batch 20250101 20250131
+BATCH_RANGE = None
+
+def issue_date(value: str) -> str:
+    try:
+        if len(value) != 8 or not value.isdigit():
+            raise ValueError(value)
+        datetime.strptime(value, "%Y%m%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYYMMDD: {value}")
+    return value
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="生成日刊视频")
+    parser.add_argument("--preview", action="store_true", help="使用低分辨率预览档位")
+    parser.add_argument(
+        "--batch", nargs=2, type=issue_date, metavar=("START", "END"),
+        help="批量渲染 START 至 END（含）之间的各期，日期格式 YYYYMMDD",
+    )
+    args = parser.parse_args()
+    if args.batch and args.batch[0] > args.batch[1]:
+        parser.error(f"起始日期晚于结束日期: {args.batch[0]} > {args.batch[1]}")
+    return args
 
 if __name__ == "__main__":
-    DailyVideoFlow().run()
+    args = parse_args()
+    profile = "preview" if args.preview else PROFILE
+    batch_range = args.batch or BATCH_RANGE
+
+    flow = DailyVideoFlow(load_app_config(profile=profile))
+    if batch_range:
+        results = flow.run_batch(*batch_range)
+        failed = [d for d, p in results.items() if p is None]
+        print(f"批量渲染完成: {len(results) - len(failed)}/{len(results)} 期" + (f"，失败: {', '.join(failed)}" if failed else ""))
+    else:
+        flow.run()
@@ -10,6 +10,7 @@ import io
 import hashlib
 from tqdm import tqdm
 from utils.io_utils import save_to_excel
+from utils.song_db import SongDatabase
 from utils.logger import logger
 
 INPUT_FILE = Path("收录曲目.xlsx")
@@ -167,14 +168,14 @@ def find_close_pubdates_by_author(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def main():
-    if not INPUT_FILE.exists():
+    if not INPUT_FILE.exists() and not INPUT_FILE.with_suffix('.db').exists():
         logger.info(f"错误: 输入文件 '{INPUT_FILE}' 不存在。")
         return
 
     try:
-        df = pd.read_excel(INPUT_FILE, dtype={'aid': str})
+        df = SongDatabase(INPUT_FILE).load()
     except Exception as e:
-        logger.info(f"读取 Excel 文件时出错: {e}")
+        logger.info(f"读取收录曲目时出错: {e}")
         return
 
     for col in ['name', 'author', 'image_url', 'uploader']:
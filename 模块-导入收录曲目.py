@@ -0,0 +1,12 @@
+# 模块-导入收录曲目.py
+# 将手动修改过的 收录曲目.xlsx 按 bvid 合并到收录曲目数据库。只写入有变化的行，空单元格不会清空数据库中的取值。
+import sys
+from pathlib import Path
+from utils.song_db import SongDatabase
+
+COLLECTED_SONGS = "收录曲目.xlsx"
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    changed = SongDatabase(Path(COLLECTED_SONGS)).import_excel(source)
+    print(f"已合并 {changed} 条收录曲目")
@@ -0,0 +1,11 @@
+# 模块-导出收录曲目.py
+# 将收录曲目数据库导出为Excel视图。日常写入只更新数据库，需要查看或分发 收录曲目.xlsx 时运行本脚本。
+from pathlib import Path
+from utils.song_db import SongDatabase
+
+COLLECTED_SONGS = "收录曲目.xlsx"
+
+if __name__ == "__main__":
+    db = SongDatabase(Path(COLLECTED_SONGS))
+    db.export_excel()
+    print(f"已导出 {len(db.load(['bvid']))} 条收录曲目到 {COLLECTED_SONGS}")
@@ -1,52 +1,28 @@
 import os
 import time
+from pathlib import Path
 from openpyxl import load_workbook
 from openpyxl.cell import MergedCell
 from multiprocessing import Pool, cpu_count
+from utils.value_index import ValueIndex
+from utils.song_db import SongDatabase
 
 OLD_VALUES = {"面包P": "面包p"}
 TARGET_COLUMN_NAME = 'author'  # None 表示全表
 PARTIAL_REPLACE = False  # True: 部分匹配, False: 精确匹配
+COLLECTED_SONGS = "收录曲目.xlsx"
+
+def replace_in_value(value: str) -> str:
+    """对单个取值一次性应用全部替换映射。"""
+    if PARTIAL_REPLACE:
+        for old_value, new_value in OLD_VALUES.items():
+            if old_value in value:
+                value = value.replace(old_value, new_value)
+        return value
+    return OLD_VALUES.get(value, value)
 
 def process_excel_file(file_path: str) -> tuple[str, str]:
     try:
-        wb_readonly = load_workbook(file_path, read_only=True)
-        needs_modification = False
-        old_values_set = set(OLD_VALUES.keys())
-
-        for ws in wb_readonly.worksheets:
-            if needs_modification: break
-
-            col_idx = None
-            if TARGET_COLUMN_NAME:
-                try:
-                    header = [cell.value for cell in ws[1]]
-                    col_idx = header.index(TARGET_COLUMN_NAME) + 1
-                except (ValueError, IndexError):
-                    continue
-
-            for row in ws.iter_rows():
-                if needs_modification: break
-                for cell in row:
-                    if not hasattr(cell, 'column'):
-                        continue
-
-                    if col_idx and cell.column != col_idx:
-                        continue
-                    
-                    if isinstance(cell.value, str):
-                        if PARTIAL_REPLACE:
-                            if any(ov in cell.value for ov in OLD_VALUES):
-                                needs_modification = True
-                                break
-                        else:
-                            if cell.value in old_values_set:
-                                needs_modification = True
-                                break
-        
-        if not needs_modification:
-            return file_path, "无需修改"
-
         wb = load_workbook(file_path)
         modified_count = 0
         for ws in wb.worksheets:
@@ -56,31 +32,31 @@ def process_excel_file(file_path: str) -> tuple[str, str]:
                     if col[0].value == TARGET_COLUMN_NAME:
                         col_idx = col[0].column
                         break
-            
-            for row in ws.iter_rows():
+                if col_idx is None:
+                    continue
+
+            rows = ws.iter_rows(min_col=col_idx, max_col=col_idx) if col_idx else ws.iter_rows()
+            for row in rows:
                 for cell in row:
-                    if isinstance(cell, MergedCell) or not hasattr(cell, 'value'):
+                    if isinstance(cell, MergedCell) or not isinstance(cell.value, str):
                         continue
-                    
-                    if col_idx and cell.column != col_idx:
-                        continue
-                    
-                    if isinstance(cell.value, str):
-                        if PARTIAL_REPLACE:
-                            for old_value, new_value in OLD_VALUES.items():
-                                if old_value in cell.value:
-                                    cell.value = cell.value.replace(old_value, new_value)
-                                    modified_count += 1
-                        else:
-                            if cell.value in OLD_VALUES:
-                                cell.value = OLD_VALUES[cell.value]
-                                modified_count += 1
-        
+                    new_value = replace_in_value(cell.value)
+                    if new_value != cell.value:
+                        cell.value = new_value
+                        modified_count += 1
+
         if modified_count > 0:
-            wb.save(file_path)
+            # 先写入同目录下的临时文件再替换原文件，避免中途失败损坏原文件
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            try:
+                wb.save(tmp_path)
+                os.replace(tmp_path, file_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
             return file_path, f"完成修改 ({modified_count}处)"
         else:
-            return file_path, "预检需修改但实际未修改"
+            return file_path, "索引命中但实际未修改"
 
     except Exception as e:
         return file_path, f"处理出错: {e}"
@@ -88,25 +64,44 @@ def process_excel_file(file_path: str) -> tuple[str, str]:
 def main():
     start_time = time.time()
     root_folder = os.path.abspath(os.path.dirname(__file__))
-    
+
+    # 收录曲目以数据库为准：其Excel视图不直接改写，否则修改时间变化会被当作手动编辑而整表重新导入
+    collected_xlsx = Path(root_folder) / COLLECTED_SONGS
+    collected_db = collected_xlsx.with_suffix('.db').exists()
     filepaths = []
     for dirpath, _, filenames in os.walk(root_folder):
         for filename in filenames:
             if filename.lower().endswith(".xlsx"):
-                filepaths.append(os.path.join(dirpath, filename))
+                path = os.path.join(dirpath, filename)
+                if collected_db and Path(path) == collected_xlsx:
+                    continue
+                filepaths.append(path)
+
+    # 收录曲目在数据库中替换；有修改时重新导出Excel视图（导出时记录修改时间，不会触发重新导入）
+    if collected_db:
+        db = SongDatabase(collected_xlsx)
+        db_changed = db.replace_values(OLD_VALUES, TARGET_COLUMN_NAME, PARTIAL_REPLACE)
+        if db_changed:
+            db.export_excel()
+        print(f"收录曲目数据库: 修改 {db_changed} 处")
 
     if not filepaths:
         print("未找到任何 .xlsx 文件。")
         return
 
-    print(f"找到 {len(filepaths)} 个 .xlsx 文件，开始使用 {cpu_count()} 个核心进行处理...")
-
+    index = ValueIndex(Path(root_folder) / "excel_cache" / "value_index.db")
     with Pool(processes=cpu_count()) as pool:
-        results = pool.map(process_excel_file, filepaths)
+        rescanned = index.refresh(filepaths, TARGET_COLUMN_NAME, mapper=lambda f, *args: pool.starmap(f, zip(*args)))
+        targets = sorted(index.lookup(OLD_VALUES.keys(), TARGET_COLUMN_NAME, PARTIAL_REPLACE))
+        print(f"共 {len(filepaths)} 个 .xlsx 文件，更新索引 {rescanned} 个，需要修改 {len(targets)} 个。")
+        results = pool.map(process_excel_file, targets) if targets else []
+
+    modified = [file_path for file_path, message in results if message.startswith("完成修改")]
+    if modified:
+        index.refresh(filepaths, TARGET_COLUMN_NAME)
 
     for file_path, message in sorted(results):
-        if message != "无需修改":
-            print(f"文件: {os.path.basename(file_path):<30} -> 结果: {message}")
+        print(f"文件: {os.path.basename(file_path):<30} -> 结果: {message}")
 
     end_time = time.time()
     print(f"\n全部处理完成，总耗时: {end_time - start_time:.2f} 秒。")
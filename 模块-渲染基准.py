@@ -0,0 +1,42 @@
+# 模块-渲染基准.py
+# 渲染基准：按最新一期榜单完整生成一次日刊视频，并输出各阶段耗时。
+import time
+from dataclasses import replace
+from src.daily_video_flow import DailyVideoFlow
+from utils.app_config import load_app_config
+
+TOP_N = 20
+# True: 运行前删除本期曲目的高潮分析缓存和人声缓存，测量冷启动下的分析耗时
+COLD_ANALYSIS = False
+
+def clear_analysis_cache(flow: DailyVideoFlow) -> int:
+    rows, *_ = flow.issue_mgr.prepare_video_data(TOP_N)
+    removed = 0
+    for r in rows:
+        bvid_dir = flow.cfg.paths.videos_root / str(r.get("bvid", "")).strip()
+        for pattern in ("*_climax.json", "*_climax.npz", "*_vocals.npz"):
+            for p in bvid_dir.glob(pattern):
+                p.unlink()
+                removed += 1
+    return removed
+
+def main():
+    cfg = load_app_config()
+    cfg = replace(cfg, video=replace(cfg.video, top_n=TOP_N))
+    flow = DailyVideoFlow(cfg)
+
+    if COLD_ANALYSIS:
+        print(f"已清除 {clear_analysis_cache(flow)} 个分析缓存文件")
+
+    t0 = time.perf_counter()
+    flow.run()
+    total = time.perf_counter() - t0
+
+    print(f"\n渲染基准（{TOP_N} 个片段）")
+    print(f"{'阶段':<24}{'耗时(秒)':>10}")
+    for stage, seconds in flow.stage_times.items():
+        print(f"{stage:<24}{seconds:>10.2f}")
+    print(f"{'总计':<24}{total:>10.2f}")
+
+if __name__ == "__main__":
+    main()
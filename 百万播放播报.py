@@ -1,5 +1,6 @@
 import pandas as pd
 from datetime import datetime, timedelta
+from utils.data_handler import DataHandler
 
 def adjust_column_width(writer, sheet_name):
     worksheet = writer.sheets[sheet_name]
@@ -24,25 +25,33 @@ if __name__ == "__main__":
     else:
         modes_to_run = [0]
 
-    for mode in modes_to_run:
-        date2 = (datetime.now()).replace(hour=0, minute=0,second=0,microsecond=0).strftime('%Y%m%d')
+    date2 = (datetime.now()).replace(hour=0, minute=0,second=0,microsecond=0).strftime('%Y%m%d')
+    offsets = {0: 1, 1: 7}
+    # 一次性并行读取所有模式需要的数据文件
+    needed_dates = [date2] + [(datetime.strptime(date2, "%Y%m%d") - timedelta(days=offsets[m])).strftime("%Y%m%d") for m in modes_to_run]
+    needed_dates = list(dict.fromkeys(needed_dates))
+    frames = dict(zip(needed_dates, DataHandler.load_many(
+        [f"数据/{d}.xlsx" for d in needed_dates],
+        usecols=['bvid', 'view', 'title', 'name', 'author', 'pubdate', 'image_url']
+    )))
 
+    for mode in modes_to_run:
+        date1 = (datetime.strptime(date2, "%Y%m%d") - timedelta(days=offsets[mode])).strftime("%Y%m%d")
         if mode == 0: 
-            date1 = (datetime.strptime(date2, "%Y%m%d") - timedelta(days=1)).strftime("%Y%m%d")
             print("\n--- 正在执行日对比 ---")
         else: 
-            date1 = (datetime.strptime(date2, "%Y%m%d") - timedelta(days=7)).strftime("%Y%m%d")
             print("\n--- 正在执行周对比 ---")
 
-        file_date1 = f"数据/{date1}.xlsx"
-        file_date2 = f"数据/{date2}.xlsx"
-        
-        try:
-            df_date1 = pd.read_excel(file_date1)
-            df_date2 = pd.read_excel(file_date2)
-        except FileNotFoundError as e:
-            print(f"错误：找不到文件 {e.filename}")
-            continue 
+        df_date1 = frames[date1]
+        df_date2 = frames[date2]
+        missing = [d for d, df in ((date1, df_date1), (date2, df_date2)) if df is None]
+        if missing:
+            print(f"错误：找不到文件 数据/{missing[0]}.xlsx")
+            continue
+        empty = [d for d, df in ((date1, df_date1), (date2, df_date2)) if df.empty]
+        if empty:
+            print(f"错误：文件 数据/{empty[0]}.xlsx 中没有数据")
+            continue
         
         df_merged = pd.merge(df_date1[['bvid', 'view']], 
                              df_date2[['bvid', 'view', 'title', 'name', 'author', 'pubdate', 'image_url']], 